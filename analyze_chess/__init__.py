@@ -0,0 +1 @@
+"""Chess analysis helpers shared by the Analyze Chess web app."""
@@ -0,0 +1,244 @@
+"""Admission control in front of engine searches.
+
+Without it every analysis that misses the cache takes a server thread and
+queues for an engine however long the queue already is, so an overload
+turns into ever slower responses for everyone. ``AdmissionControl`` lets
+``capacity`` analyses run at once and queues the rest by priority
+(``high`` before ``normal`` before ``low``, first come first served
+within one), with a bounded queue per priority and a queue-time budget.
+A request is turned away with ``Overloaded`` when its queue is full, when
+the expected wait is over the budget, or when it has waited the whole
+budget; the app answers those with 429 and a ``Retry-After`` of the
+expected wait at the current drain rate (capacity over the moving average
+of recent analysis times). Admitted requests therefore wait at most
+``budget`` seconds for their turn.
+
+Settings:
+
+ANALYZE_CHESS_ADMIT_CONCURRENCY
+    analyses run at once (default: the engine pool size); 0 turns
+    admission control off.
+ANALYZE_CHESS_ADMIT_QUEUE
+    waiting requests allowed per priority, as ``high=N,normal=N,low=N`` or
+    one number for all (default: 4, 2 and 1 times the concurrency).
+ANALYZE_CHESS_ADMIT_BUDGET
+    seconds a request may wait for its turn (default 5).
+
+Sync callers (server threads) use ``slot()``, coroutines ``slot_async()``;
+both may share one controller.
+"""
+import contextlib
+import math
+import os
+import threading
+import time
+
+from .metrics import REGISTRY
+
+PRIORITIES = ('high', 'normal', 'low')
+QUEUE_FACTORS = {'high': 4, 'normal': 2, 'low': 1}
+MAX_RETRY_AFTER = 120
+
+DECISIONS = REGISTRY.counter(
+    'analyze_chess_admission_total', 'Analysis admission decisions by priority and outcome.', ['priority', 'outcome'])
+QUEUE_SECONDS = REGISTRY.histogram(
+    'analyze_chess_admission_queue_seconds', 'Time admitted analyses waited for their turn.', ['priority'],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0))
+
+
+class Overloaded(Exception):
+    """The analysis was not admitted; try again after retry_after seconds."""
+
+    def __init__(self, reason, priority, retry_after):
+        super().__init__(f"server busy ({reason}); retry in {retry_after}s")
+        self.reason = reason
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+def parse_queue_limits(spec, capacity):
+    """'high=16,normal=8,low=2' (or '8') -> {priority: limit}."""
+    limits = {priority: capacity * factor for priority, factor in QUEUE_FACTORS.items()}
+    spec = (spec or '').strip()
+    if not spec:
+        return limits
+    if '=' not in spec:
+        return dict.fromkeys(PRIORITIES, max(0, int(spec)))
+    for item in spec.split(','):
+        priority, _, limit = item.partition('=')
+        priority = priority.strip()
+        if priority not in PRIORITIES:
+            raise ValueError(f"unknown priority {priority!r} (expected one of {', '.join(PRIORITIES)})")
+        limits[priority] = max(0, int(limit))
+    return limits
+
+
+def from_environment(default_capacity, service_time):
+    """An AdmissionControl configured from ANALYZE_CHESS_ADMIT_*, or None when turned off."""
+    capacity = int(os.environ.get('ANALYZE_CHESS_ADMIT_CONCURRENCY') or default_capacity)
+    if capacity <= 0:
+        return None
+    return AdmissionControl(capacity,
+                            parse_queue_limits(os.environ.get('ANALYZE_CHESS_ADMIT_QUEUE'), capacity),
+                            float(os.environ.get('ANALYZE_CHESS_ADMIT_BUDGET', 5.0)),
+                            service_time)
+
+
+class _Waiter:
+    __slots__ = ('priority', 'wake', 'granted', 'ticket')
+
+    def __init__(self, priority, wake):
+        self.priority = priority
+        self.wake = wake
+        self.granted = False
+        self.ticket = None
+
+
+class AdmissionControl:
+    # Weight of the newest analysis time in the moving average
+    SMOOTHING = 0.2
+
+    def __init__(self, capacity, queue_limits=None, budget=5.0, service_time=2.0):
+        self.capacity = capacity
+        self.queue_limits = queue_limits or parse_queue_limits(None, capacity)
+        self.budget = budget
+        self.service_time = service_time
+        self.in_flight = 0
+        self._queues = {priority: [] for priority in PRIORITIES}
+        self._lock = threading.Lock()
+
+    def drain_rate(self):
+        """Analyses expected to finish per second at the current pace."""
+        return self.capacity / max(self.service_time, 1e-3)
+
+    def _expected_wait(self, ahead):
+        return (ahead + 1) / self.drain_rate()
+
+    def _reject(self, reason, priority, ahead):
+        DECISIONS.labels(priority, reason).inc()
+        retry_after = min(MAX_RETRY_AFTER, max(1, math.ceil(self._expected_wait(ahead))))
+        return Overloaded(reason, priority, retry_after)
+
+    def _ahead(self, priority):
+        """Waiters served before a new request of this priority."""
+        rank = PRIORITIES.index(priority)
+        return sum(len(self._queues[p]) for p in PRIORITIES[:rank + 1])
+
+    def _enter(self, waiter):
+        """With the lock held: admit (True), queue waiter (False) or raise Overloaded."""
+        priority = waiter.priority
+        if self.in_flight < self.capacity:
+            self.in_flight += 1
+            waiter.granted, waiter.ticket = True, time.perf_counter()
+            return True
+        ahead = self._ahead(priority)
+        if len(self._queues[priority]) >= self.queue_limits.get(priority, 0):
+            raise self._reject('queue_full', priority, ahead)
+        if self._expected_wait(ahead) > self.budget:
+            raise self._reject('over_budget', priority, ahead)
+        self._queues[priority].append(waiter)
+        return False
+
+    def _leave(self, waiter):
+        """With the lock held: drop an ungranted waiter and return its Overloaded."""
+        queue = self._queues[waiter.priority]
+        queue.remove(waiter)
+        return self._reject('timed_out', waiter.priority, self._ahead(waiter.priority))
+
+    def _admitted(self, waiter, started):
+        DECISIONS.labels(waiter.priority, 'admitted').inc()
+        QUEUE_SECONDS.labels(waiter.priority).observe(time.perf_counter() - started)
+        return waiter.ticket
+
+    def acquire(self, priority='normal'):
+        """Wait for a turn; returns a ticket for release() or raises Overloaded."""
+        started = time.perf_counter()
+        event = threading.Event()
+        waiter = _Waiter(priority, event.set)
+        with self._lock:
+            if self._enter(waiter):
+                return self._admitted(waiter, started)
+        event.wait(self.budget)
+        with self._lock:
+            if not waiter.granted:
+                raise self._leave(waiter)
+        return self._admitted(waiter, started)
+
+    async def acquire_async(self, priority='normal'):
+        """acquire() for coroutines: waits without blocking the event loop."""
+        import asyncio
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve():
+            if not future.done():
+                future.set_result(None)
+
+        waiter = _Waiter(priority, lambda: loop.call_soon_threadsafe(resolve))
+        with self._lock:
+            if self._enter(waiter):
+                return self._admitted(waiter, started)
+        try:
+            await asyncio.wait_for(future, self.budget)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._queues[priority].remove(waiter)
+            if granted:
+                # Handed a turn just as the request went away; pass it on
+                self.release(waiter.ticket)
+            raise
+        with self._lock:
+            if not waiter.granted:
+                raise self._leave(waiter)
+        return self._admitted(waiter, started)
+
+    def release(self, ticket):
+        """End the analysis admitted with ticket and hand its turn to the next waiter."""
+        now = time.perf_counter()
+        with self._lock:
+            self.service_time += self.SMOOTHING * ((now - ticket) - self.service_time)
+            for priority in PRIORITIES:
+                queue = self._queues[priority]
+                while queue:
+                    waiter = queue.pop(0)
+                    waiter.granted, waiter.ticket = True, now
+                    try:
+                        waiter.wake()
+                    except RuntimeError:
+                        # Its event loop is gone; nobody will collect this turn
+                        waiter.granted = False
+                        continue
+                    return
+            self.in_flight -= 1
+
+    @contextlib.contextmanager
+    def slot(self, priority='normal'):
+        """Hold a turn for the duration of the with block."""
+        ticket = self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    @contextlib.asynccontextmanager
+    async def slot_async(self, priority='normal'):
+        ticket = await self.acquire_async(priority)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'in_flight': self.in_flight,
+                'waiting': {priority: len(queue) for priority, queue in self._queues.items()},
+                'service_time': round(self.service_time, 4),
+                'drain_rate': round(self.drain_rate(), 4),
+            }
@@ -0,0 +1,333 @@
+"""asyncio serving pieces: an async engine pool and a small ASGI front end.
+
+``AsyncEnginePool`` is the event-loop counterpart of ``EnginePool``, built
+on python-chess's native asyncio UCI protocol (``chess.engine.popen_uci``):
+a waiting request is a suspended coroutine, not a blocked thread, so one
+loop can hold thousands of slow clients while a handful of engines search.
+
+``AsgiApp`` serves the routes registered with it on the event loop and
+hands every other request to a WSGI app (Flask) on a thread pool, streaming
+its response body back chunk by chunk. Handlers take a ``Request`` and
+return a ``JSONResponse`` or an ``EventStreamResponse`` (server-sent
+events). It needs no ASGI framework; any ASGI server (uvicorn, hypercorn)
+can run it.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+import chess.engine
+
+from .engine_pool import WAIT_SECONDS, PoolTimeout, default_size
+
+
+class AsyncEnginePool:
+    def __init__(self, path, size=None, acquire_timeout=30.0):
+        self.path = path
+        self.size = size or default_size()
+        self.acquire_timeout = acquire_timeout
+        self.loop = asyncio.get_running_loop()
+        self._idle = []
+        self._started = 0
+        self._closed = False
+        # Guards _idle and _started; notified when an engine is returned or a
+        # slot is freed, so a waiter can take the engine or start a new one
+        self._available = asyncio.Condition()
+
+    async def _acquire(self):
+        deadline = self.loop.time() + self.acquire_timeout
+        async with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._started < self.size:
+                    self._started += 1
+                    break
+                remaining = deadline - self.loop.time()
+                if remaining <= 0:
+                    raise PoolTimeout(f"all {self.size} engines busy for {self.acquire_timeout}s")
+                try:
+                    await asyncio.wait_for(self._available.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        try:
+            _, engine = await chess.engine.popen_uci(self.path)
+        except BaseException:
+            await self._release_slot()
+            raise
+        return engine
+
+    async def _release_slot(self):
+        async with self._available:
+            self._started -= 1
+            self._available.notify()
+
+    async def _discard(self, engine):
+        await self._release_slot()
+        try:
+            await asyncio.wait_for(engine.quit(), 2.0)
+        except Exception:
+            pass
+
+    @contextlib.asynccontextmanager
+    async def engine(self):
+        """Check out an engine protocol for the duration of the async with block."""
+        started = time.perf_counter()
+        engine = await self._acquire()
+        WAIT_SECONDS.labels('async').observe(time.perf_counter() - started)
+        try:
+            yield engine
+        except BaseException:
+            # Cancelled or failed mid-search; don't hand the engine to the next request
+            await asyncio.shield(self._discard(engine))
+            raise
+        async with self._available:
+            if not self._closed:
+                self._idle.append(engine)
+                self._available.notify()
+                return
+        await self._discard(engine)
+
+    async def play(self, board, limit, **kwargs):
+        async with self.engine() as engine:
+            return await engine.play(board, limit, **kwargs)
+
+    async def analysis(self, board, limit):
+        """Yield the engine's info dicts as the search deepens, then the final one."""
+        async with self.engine() as engine:
+            with await engine.analysis(board, limit) as analysis:
+                async for info in analysis:
+                    yield info
+
+    def stats(self):
+        return {'size': self.size, 'started': self._started, 'idle': len(self._idle)}
+
+    async def close(self):
+        async with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for engine in idle:
+            await self._discard(engine)
+
+    def close_threadsafe(self):
+        """close() from another thread (e.g. a WSGI handler that swapped the engine)."""
+        if not self.loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.close(), self.loop)
+
+
+class Request:
+    def __init__(self, scope, body=b''):
+        self.scope = scope
+        self.method = scope['method']
+        self.path = scope['path']
+        self.args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        self.body = body
+
+
+class JSONResponse:
+    def __init__(self, data, status=200, headers=None):
+        self.body = json.dumps(data).encode('utf-8')
+        self.status = status
+        self.headers = dict(headers or {})
+
+    async def __call__(self, receive, send):
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(self.body)).encode('ascii')),
+            (b'cache-control', b'no-store'),
+        ] + [(name.lower().encode('latin-1'), value.encode('latin-1'))
+             for name, value in self.headers.items() if name.lower() != 'cache-control']})
+        await send({'type': 'http.response.body', 'body': self.body})
+
+
+class EventStreamResponse:
+    """text/event-stream from an async iterable of (event, data) pairs.
+
+    The stream (and whatever engine search feeds it) is cancelled as soon as
+    the client disconnects. on_close, if given, is called once the response
+    is over either way.
+    """
+
+    def __init__(self, events, on_close=None):
+        self.events = events
+        self.on_close = on_close
+
+    async def _stream(self, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        async for event, data in self.events:
+            chunk = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def __call__(self, receive, send):
+        stream = asyncio.ensure_future(self._stream(send))
+
+        async def watch_disconnect():
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    stream.cancel()
+                    return
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await stream
+        except asyncio.CancelledError:
+            if not stream.cancelled():
+                raise
+        finally:
+            watcher.cancel()
+            if self.on_close is not None:
+                self.on_close()
+
+
+def wsgi_environ(scope, body):
+    """A PEP 3333 environ for an ASGI http scope."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class AsgiApp:
+    """Async routes on the event loop; everything else through a WSGI app.
+
+    routes maps a path to {method: async handler}. on_startup and
+    on_shutdown coroutines run on the lifespan startup and shutdown events. observe, if
+    given, is called as observe(path, method, status, seconds) when an async
+    route's response is complete (the WSGI app times its own requests).
+    """
+
+    def __init__(self, wsgi_app, routes=None, on_shutdown=(), threads=16, observe=None, on_startup=()):
+        self.wsgi_app = wsgi_app
+        self.routes = dict(routes or {})
+        self.on_startup = list(on_startup)
+        self.on_shutdown = list(on_shutdown)
+        self.observe = observe
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        body = await self._read_body(receive)
+        handler = self.routes.get(scope['path'], {}).get(scope['method'])
+        if handler is not None:
+            started = time.perf_counter()
+            status = []
+
+            async def send_and_record(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                await send(message)
+
+            try:
+                response = await handler(Request(scope, body))
+                await response(receive, send_and_record)
+            finally:
+                if self.observe is not None:
+                    self.observe(scope['path'], scope['method'], status[0] if status else 500,
+                                 time.perf_counter() - started)
+        else:
+            await self._call_wsgi(scope, body, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                for hook in self.on_startup:
+                    await hook()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for hook in self.on_shutdown:
+                    await hook()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] != 'http.request':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    async def _call_wsgi(self, scope, body, send):
+        loop = asyncio.get_running_loop()
+        environ = wsgi_environ(scope, body)
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            response = {}
+
+            def start_response(status, headers, exc_info=None):
+                response['status'] = int(status.split(' ', 1)[0])
+                response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+                return lambda data: send_chunk(data)
+
+            started = []
+
+            def send_chunk(data):
+                if not started:
+                    send_from_thread({'type': 'http.response.start', 'status': response['status'],
+                                      'headers': response['headers']})
+                    started.append(True)
+                if data:
+                    send_from_thread({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+            result = self.wsgi_app(environ, start_response)
+            try:
+                for data in result:
+                    send_chunk(data)
+                send_chunk(b'')
+                send_from_thread({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+
+        await loop.run_in_executor(self.executor, run)
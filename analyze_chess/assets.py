@@ -0,0 +1,170 @@
+"""Static asset fingerprints and compressed variants.
+
+``AssetStore`` serves the files of one directory from memory. Every file
+gets a content hash, used both as its ETag and as the ``?v=`` fingerprint
+in asset URLs, and compressible files get gzip (and, when the ``brotli``
+package is installed, br) variants built once at maximum compression.
+Variants written to disk next to the source (``analyze.css.gz``,
+``analyze.css.br``) are used instead when they are at least as new::
+
+    python -m analyze_chess.assets static assets
+
+Dynamic responses are compressed per request with ``compress()`` at a
+cheaper level.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+import threading
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'image/svg+xml', 'image/x-icon', 'image/vnd.microsoft.icon',
+})
+MIN_SIZE = 512
+
+# (gzip level, brotli quality) for per-request and build-once compression
+DYNAMIC_LEVELS = (6, 4)
+STATIC_LEVELS = (9, 11)
+
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def encodings():
+    """Supported content codings, preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encodings):
+    """Pick a content coding from a werkzeug Accept-Encoding header, or None."""
+    for encoding in encodings():
+        if accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def compressible(mimetype):
+    return mimetype in COMPRESSIBLE_TYPES
+
+
+def compress(data, encoding, levels=DYNAMIC_LEVELS):
+    if encoding == 'br':
+        return brotli.compress(data, quality=levels[1])
+    # mtime=0 keeps the output (and anything hashed from it) deterministic
+    return gzip.compress(data, compresslevel=levels[0], mtime=0)
+
+
+class Asset:
+    """One file's bytes, fingerprint and lazily built compressed variants."""
+
+    def __init__(self, path, data, mtime):
+        self.path = path
+        self.data = data
+        self.mtime = mtime
+        self.digest = hashlib.sha1(data).hexdigest()
+        self.fingerprint = self.digest[:12]
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self._variants = {}
+
+    def variant(self, encoding):
+        """Compressed bytes for encoding, or None when not worth compressing."""
+        if encoding is None or not compressible(self.mimetype) or len(self.data) < MIN_SIZE:
+            return None
+        if encoding not in self._variants:
+            self._variants[encoding] = self._load_variant(encoding)
+        return self._variants[encoding]
+
+    def _load_variant(self, encoding):
+        precompressed = self.path + SUFFIXES[encoding]
+        try:
+            if os.path.getmtime(precompressed) >= self.mtime:
+                with open(precompressed, 'rb') as f:
+                    return f.read()
+        except OSError:
+            pass
+        data = compress(self.data, encoding, STATIC_LEVELS)
+        return data if len(data) < len(self.data) else None
+
+
+class AssetStore:
+    """In-memory view of a static directory, reloaded when a file changes."""
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def _path(self, filename):
+        path = os.path.abspath(os.path.join(self.directory, filename))
+        if os.path.commonpath([path, self.directory]) != self.directory:
+            return None
+        return path
+
+    def get(self, filename):
+        """The Asset for filename, or None when it does not exist."""
+        path = self._path(filename)
+        if path is None:
+            return None
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        asset = self._assets.get(path)
+        if asset is not None and asset.mtime == mtime:
+            return asset
+        with self._lock:
+            asset = self._assets.get(path)
+            if asset is None or asset.mtime != mtime:
+                try:
+                    with open(path, 'rb') as f:
+                        asset = Asset(path, f.read(), mtime)
+                except OSError:
+                    return None
+                self._assets[path] = asset
+        return asset
+
+    def fingerprint(self, filename):
+        asset = self.get(filename)
+        return asset.fingerprint if asset else None
+
+
+def precompress(directory, codings=None):
+    """Write .gz/.br variants next to every compressible file; returns their paths."""
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(tuple(SUFFIXES.values())):
+                continue
+            path = os.path.join(root, name)
+            mimetype = mimetypes.guess_type(path)[0]
+            if not compressible(mimetype) or os.path.getsize(path) < MIN_SIZE:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            for encoding in codings or encodings():
+                target = path + SUFFIXES[encoding]
+                with open(target, 'wb') as f:
+                    f.write(compress(data, encoding, STATIC_LEVELS))
+                written.append(target)
+    return written
+
+
+def main(argv=None):
+    directories = (argv if argv is not None else sys.argv[1:]) or ['static']
+    for directory in directories:
+        for path in precompress(directory):
+            print(path)
+    if brotli is None:
+        print('brotli is not installed; only gzip variants were written.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
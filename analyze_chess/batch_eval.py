@@ -0,0 +1,131 @@
+"""Vectorized position evaluation over plane-encoded boards.
+
+Boards are encoded as an ``(N, 12, 64)`` uint8 array of piece planes (White
+pawn..king, then Black pawn..king; square index a1 = 0) and scored with
+NumPy dot products: material + piece-square tables, an empty-board mobility
+proxy and a blocked-pawn count. This is meant for bulk work such as ranking
+every child of a position or scoring large PGN/EPD sets; it skips the pawn
+structure terms of ``fallback.evaluate``.
+
+NumPy is optional. ``available()`` reports whether batch scoring can be used.
+"""
+import chess
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+PLANES = [(color, piece_type) for color in (chess.WHITE, chess.BLACK) for piece_type in chess.PIECE_TYPES]
+
+
+def available():
+    return np is not None
+
+
+def _empty_board_mobility(piece_type, square):
+    if piece_type == chess.KNIGHT:
+        return chess.popcount(chess.BB_KNIGHT_ATTACKS[square])
+    if piece_type == chess.KING:
+        return chess.popcount(chess.BB_KING_ATTACKS[square])
+    diag = chess.popcount(chess.BB_DIAG_ATTACKS[square][0])
+    straight = chess.popcount(chess.BB_RANK_ATTACKS[square][0] | chess.BB_FILE_ATTACKS[square][0])
+    if piece_type == chess.BISHOP:
+        return diag
+    if piece_type == chess.ROOK:
+        return straight
+    if piece_type == chess.QUEEN:
+        return diag + straight
+    return 0
+
+
+def piece_masks(board):
+    """The 12 piece bitboards of board in PLANES order."""
+    return [board.pieces_mask(piece_type, color) for color, piece_type in PLANES]
+
+
+def encode_masks(masks):
+    """Unpack an (N, 12) sequence of bitboards into (N, 12, 64) uint8 planes."""
+    words = np.asarray(masks, dtype='<u8').reshape(-1, 12)
+    return np.unpackbits(words.view(np.uint8).reshape(-1, 12, 8), axis=2, bitorder='little')
+
+
+def encode_boards(boards):
+    return encode_masks([piece_masks(board) for board in boards])
+
+
+class BatchEvaluator:
+    """Holds the (12, 64) weight planes for one set of evaluation weights."""
+
+    def __init__(self, piece_values, pst, weights):
+        psqt = np.zeros((12, 64), dtype=np.int32)
+        mobility = np.zeros((12, 64), dtype=np.int32)
+        for plane, (color, piece_type) in enumerate(PLANES):
+            sign = 1 if color == chess.WHITE else -1
+            for square in chess.SQUARES:
+                table_square = square if color == chess.WHITE else chess.square_mirror(square)
+                psqt[plane, square] = sign * (piece_values[piece_type] + pst[piece_type][table_square])
+                mobility[plane, square] = sign * _empty_board_mobility(piece_type, square)
+        self.psqt = psqt.reshape(-1)
+        self.mobility = mobility.reshape(-1)
+        self.mobility_weight = weights.get('mobility', 0)
+        self.blocked_pawn_weight = weights.get('blocked_pawn', 0)
+
+    def white_scores(self, planes):
+        """Scores from White's point of view for (N, 12, 64) planes."""
+        flat = planes.reshape(len(planes), -1).astype(np.int32)
+        scores = flat @ self.psqt
+        if self.mobility_weight:
+            scores += self.mobility_weight * (flat @ self.mobility)
+        if self.blocked_pawn_weight:
+            occupied = planes.max(axis=1)
+            white_blocked = (planes[:, 0, :56] & occupied[:, 8:]).sum(axis=1, dtype=np.int32)
+            black_blocked = (planes[:, 6, 8:] & occupied[:, :56]).sum(axis=1, dtype=np.int32)
+            scores -= self.blocked_pawn_weight * (white_blocked - black_blocked)
+        return scores
+
+    def evaluate(self, boards):
+        """Scores from each board's side-to-move point of view."""
+        boards = list(boards)
+        if not boards:
+            return np.zeros(0, dtype=np.int32)
+        signs = np.array([1 if board.turn == chess.WHITE else -1 for board in boards], dtype=np.int32)
+        return self.white_scores(encode_boards(boards)) * signs
+
+    def score_children(self, board, moves=None):
+        """Static scores of every child of board, from the mover's point of view.
+
+        Returns a list of (move, score) in move order.
+        """
+        moves = list(board.legal_moves) if moves is None else list(moves)
+        if not moves:
+            return []
+        masks = []
+        for move in moves:
+            board.push(move)
+            masks.append(piece_masks(board))
+            board.pop()
+        scores = self.white_scores(encode_masks(masks))
+        if board.turn == chess.BLACK:
+            scores = -scores
+        return list(zip(moves, scores.tolist()))
+
+
+_default = None
+
+
+def default_evaluator():
+    """BatchEvaluator built from the fallback engine's current weights."""
+    global _default
+    if _default is None:
+        from . import fallback
+        _default = BatchEvaluator(fallback.PIECE_VALUES, fallback.PST, fallback.WEIGHTS)
+    return _default
+
+
+def evaluate_boards(boards):
+    return default_evaluator().evaluate(boards)
+
+
+def score_children(board, moves=None):
+    return default_evaluator().score_children(board, moves)
@@ -0,0 +1,137 @@
+"""Build and engine version info, computed once per process.
+
+The application version (``git describe --tags --exact-match`` when run
+from a tagged checkout, else version.py) is resolved on first use and kept
+for the life of the process. The engine entry records the binary's path,
+``--version`` banner, size and mtime; it is refreshed only when a different
+binary is selected or the file's size/mtime change (an in-place update), so
+a request normally costs one ``stat`` and never a subprocess. While
+``warm_in_background`` is still resolving them, requests get placeholders
+(version.py and an ``unknown`` engine version) instead of waiting for it.
+"""
+import os
+import subprocess
+import threading
+from collections import namedtuple
+
+EngineInfo = namedtuple('EngineInfo', 'path version size mtime')
+
+
+def engine_version(path):
+    """First line of '<engine> --version', or 'unknown'."""
+    try:
+        cp = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=5,
+                            stdin=subprocess.DEVNULL)
+        out = (cp.stdout or cp.stderr or '').strip()
+        return out.splitlines()[0] if out else 'unknown'
+    except Exception:
+        return 'unknown'
+
+
+def git_tag(root):
+    """The exact tag of the checkout at root, or None."""
+    try:
+        result = subprocess.run(['git', 'describe', '--tags', '--exact-match'],
+                                capture_output=True, text=True, cwd=root, timeout=5)
+    except Exception:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def _file_version():
+    try:
+        from version import __version__
+        return __version__
+    except ImportError:
+        return 'Unknown'
+
+
+class BuildInfo:
+    """Lazily computed, cached version info for the app and its engine.
+
+    find_engine is called (without arguments) to locate the engine binary
+    when no path has been selected explicitly.
+    """
+
+    def __init__(self, root, find_engine):
+        self.root = root
+        self._find_engine = find_engine
+        self._app_version = None
+        self._engine_path = None
+        self._engine = None
+        self._lock = threading.Lock()
+        self._warming = False
+
+    def app_version(self):
+        if self._app_version is None:
+            if self._warming:
+                return _file_version()
+            self._app_version = git_tag(self.root) or _file_version()
+        return self._app_version
+
+    def engine_path(self, selected=None):
+        """selected if given, else the engine found at the last (re)scan."""
+        if selected:
+            return selected
+        if self._engine_path is None:
+            self._engine_path = self._find_engine() or ''
+        return self._engine_path or None
+
+    def engine(self, selected=None):
+        """EngineInfo for the current engine binary, or None when there is none."""
+        path = self.engine_path(selected)
+        if not path:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return EngineInfo(path, 'unknown', None, None)
+        info = self._engine
+        if info is None or (info.path, info.size, info.mtime) != (path, st.st_size, st.st_mtime):
+            if self._warming:
+                return EngineInfo(path, 'unknown', None, None)
+            with self._lock:
+                info = self._engine
+                if info is None or (info.path, info.size, info.mtime) != (path, st.st_size, st.st_mtime):
+                    info = EngineInfo(path, engine_version(path), st.st_size, st.st_mtime)
+                    self._engine = info
+        return info
+
+    def invalidate_engine(self):
+        """Forget the engine; call after installing, selecting or rolling back a binary."""
+        with self._lock:
+            self._engine_path = None
+            self._engine = None
+
+    def warm(self, selected=None):
+        """Resolve everything now (at startup) so requests only read the cache."""
+        self.app_version()
+        self.engine(selected)
+        return self
+
+    def warm_in_background(self, selected=None):
+        """warm() on a daemon thread; until it is done requests get placeholders."""
+        self._warming = True
+
+        def run():
+            try:
+                self._warming_run(selected)
+            finally:
+                self._warming = False
+
+        thread = threading.Thread(target=run, name='warm-build-info', daemon=True)
+        thread.start()
+        return thread
+
+    def _warming_run(self, selected):
+        self._app_version = git_tag(self.root) or _file_version()
+        path = self.engine_path(selected)
+        if path:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return
+            with self._lock:
+                self._engine = EngineInfo(path, engine_version(path), st.st_size, st.st_mtime)
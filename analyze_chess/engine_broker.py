@@ -0,0 +1,274 @@
+"""Engine broker: one process that owns the Stockfish pool for many web workers.
+
+In pre-fork mode every web worker is its own process. Rather than each of
+them starting engines, they send searches to the broker over a Unix domain
+socket, one JSON object per line::
+
+    {"op": "play", "path": "/usr/bin/stockfish", "fen": "...", "moves": ["e2e4"], "time": 2.0}
+    -> {"move": "e7e5", "info": {"depth": 21, "nps": 1200000, "time": 2.0}}
+
+``path`` names the engine binary the worker wants; the broker switches its
+pool when it changes. Identical searches that arrive while one is running
+share its result, so workers warming the same positions at boot cost one
+search each. ``{"op": "reset"}`` restarts the engines (after an
+in-place update) and ``{"op": "stats"}`` reports the pool state.
+
+The broker runs as ``python -m analyze_chess.engine_broker --socket PATH
+[--engine PATH] [--size N]``; ``start_broker`` does that and waits for the
+socket to come up. ``BrokerClient`` has the same ``play()``/``close()``
+interface as ``EnginePool``, so the app uses either one.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+import chess
+import chess.engine
+
+from . import metrics
+from .engine_pool import EnginePool
+
+
+class BrokerError(Exception):
+    """The broker could not run the request."""
+
+
+class _Flight:
+    """A search in progress that identical requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.reply = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.reply
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = self.server.dispatch(json.loads(line))
+            except Exception as e:
+                reply = {'error': f"{type(e).__name__}: {e}"}
+            try:
+                self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up waiting (timeout) and closed its connection
+                return
+
+
+class BrokerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, engine_path=None, size=None):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+        self.size = size
+        self.pool = EnginePool(engine_path, size) if engine_path else None
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+    def _pool_for(self, path):
+        with self._lock:
+            if path and (self.pool is None or self.pool.path != path):
+                if self.pool is not None:
+                    self.pool.close()
+                self.pool = EnginePool(path, self.size)
+            if self.pool is None:
+                raise BrokerError('no engine configured')
+            return self.pool
+
+    def _play_once(self, request):
+        """_play, unless the same search is already running: then wait for its reply."""
+        key = json.dumps([request.get(name) for name in ('path', 'fen', 'moves', 'time', 'depth', 'nodes')])
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            return flight.wait()
+        try:
+            flight.reply = self._play(request)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.reply
+
+    def _play(self, request):
+        pool = self._pool_for(request.get('path'))
+        board = chess.Board(request['fen'])
+        for uci in request.get('moves', ()):
+            board.push_uci(uci)
+        limit = chess.engine.Limit(time=request.get('time'), depth=request.get('depth'),
+                                   nodes=request.get('nodes'))
+        result = pool.play(board, limit, info=chess.engine.INFO_BASIC)
+        info = {key: result.info[key] for key in ('depth', 'seldepth', 'nodes', 'nps', 'time')
+                if key in result.info}
+        return {'move': result.move.uci() if result.move else None, 'info': info}
+
+    def dispatch(self, request):
+        op = request.get('op')
+        if op == 'play':
+            return self._play_once(request)
+        if op == 'reset':
+            with self._lock:
+                if self.pool is not None:
+                    self.pool.close()
+                    self.pool = EnginePool(self.pool.path, self.size)
+            return {'ok': True}
+        if op == 'stats':
+            return self.pool.stats() if self.pool else {}
+        raise BrokerError(f"unknown op {op!r}")
+
+    def server_close(self):
+        super().server_close()
+        if self.pool is not None:
+            self.pool.close()
+
+
+class BrokerClient:
+    """EnginePool-compatible client; one connection per calling thread."""
+
+    def __init__(self, socket_path, path=None, timeout=120.0):
+        self.socket_path = socket_path
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            conn = (sock, sock.makefile('rwb'))
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    def call(self, request):
+        payload = json.dumps(request).encode('utf-8') + b'\n'
+        for attempt in (1, 2):
+            try:
+                _, stream = self._connection()
+                stream.write(payload)
+                stream.flush()
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError('engine broker closed the connection')
+                break
+            except ConnectionError:
+                # A stale connection (broker restarted) gets one retry
+                self._drop_connection()
+                if attempt == 2:
+                    raise
+            except BaseException:
+                # A timeout or other error may leave the reply unread on the
+                # socket, where the next call would take it for its own
+                self._drop_connection()
+                raise
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise BrokerError(reply['error'])
+        return reply
+
+    def play(self, board, limit, info=None):
+        """EnginePool.play over the broker; the basic search info always comes back."""
+        root = board.root()
+        reply = self.call({
+            'op': 'play',
+            'path': self.path,
+            'fen': root.fen(),
+            'moves': [move.uci() for move in board.move_stack],
+            'time': limit.time,
+            'depth': limit.depth,
+            'nodes': limit.nodes,
+        })
+        move = chess.Move.from_uci(reply['move']) if reply.get('move') else None
+        return chess.engine.PlayResult(move, None, info=reply.get('info') or {})
+
+    def stats(self):
+        return self.call({'op': 'stats'})
+
+    def close(self):
+        """Restart the broker's engines (e.g. after the binary was replaced in place)."""
+        try:
+            self.call({'op': 'reset'})
+        finally:
+            self._drop_connection()
+
+
+def start_broker(socket_path, engine_path=None, size=None, wait=10.0):
+    """Start the broker process and wait until its socket accepts connections."""
+    cmd = [sys.executable, '-m', 'analyze_chess.engine_broker', '--socket', socket_path]
+    if engine_path:
+        cmd += ['--engine', engine_path]
+    if size:
+        cmd += ['--size', str(size)]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(cmd, cwd=root)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise BrokerError(f"engine broker exited with status {process.returncode}")
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(socket_path)
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise BrokerError(f"engine broker did not start within {wait}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve a shared Stockfish pool over a Unix socket.')
+    parser.add_argument('--socket', required=True)
+    parser.add_argument('--engine')
+    parser.add_argument('--size', type=int)
+    args = parser.parse_args(argv)
+    server = BrokerServer(args.socket, args.engine, args.size)
+    metrics.share_from_environment()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(args.socket)
+        except OSError:
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
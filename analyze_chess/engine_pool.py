@@ -0,0 +1,127 @@
+"""A fixed-size pool of running UCI engine processes.
+
+Starting Stockfish costs a fork/exec plus the UCI handshake on every
+analysis; the pool keeps up to ``size`` engines alive and hands them out
+one request at a time. Engines are started lazily, an engine that fails
+mid-search is discarded (waking a waiting request, which starts its
+replacement), and a request that finds every engine busy waits up to
+``acquire_timeout`` seconds before giving up with ``PoolTimeout``.
+
+Size defaults to ANALYZE_CHESS_ENGINES, else half the CPUs (at least 1).
+The time each checkout waits for an engine (including starting one on a
+cold pool) is recorded in analyze_chess_engine_wait_seconds.
+"""
+import contextlib
+import os
+import threading
+import time
+
+import chess.engine
+
+from .metrics import REGISTRY
+
+WAIT_SECONDS = REGISTRY.histogram(
+    'analyze_chess_engine_wait_seconds', 'Time spent waiting to check out a pooled engine.', ['pool'],
+    buckets=(0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+
+def default_size():
+    configured = os.environ.get('ANALYZE_CHESS_ENGINES')
+    if configured:
+        return max(1, int(configured))
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+class PoolTimeout(Exception):
+    """No engine became free within the acquire timeout."""
+
+
+class EnginePool:
+    def __init__(self, path, size=None, acquire_timeout=30.0, options=None):
+        self.path = path
+        self.size = size or default_size()
+        self.acquire_timeout = acquire_timeout
+        self.options = dict(options or {})
+        # Most recently returned engine first; guarded by _available
+        self._idle = []
+        self._started = 0
+        self._available = threading.Condition()
+        self._closed = False
+
+    def _spawn(self):
+        engine = chess.engine.SimpleEngine.popen_uci(self.path)
+        if self.options:
+            engine.configure(self.options)
+        return engine
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._started < self.size:
+                    self._started += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"all {self.size} engines busy for {self.acquire_timeout}s")
+                self._available.wait(remaining)
+        try:
+            return self._spawn()
+        except Exception:
+            self._release_slot()
+            raise
+
+    def _release_slot(self):
+        # A slot freed up: a waiter may start an engine in it
+        with self._available:
+            self._started -= 1
+            self._available.notify()
+
+    def _discard(self, engine):
+        self._release_slot()
+        try:
+            engine.quit()
+        except Exception:
+            pass
+
+    @contextlib.contextmanager
+    def engine(self):
+        """Check out an engine for the duration of the with block."""
+        started = time.perf_counter()
+        engine = self._acquire()
+        WAIT_SECONDS.labels('sync').observe(time.perf_counter() - started)
+        try:
+            yield engine
+        except BaseException:
+            # The engine died or may still be mid-search; don't reuse it
+            self._discard(engine)
+            raise
+        else:
+            with self._available:
+                closed = self._closed
+                if not closed:
+                    self._idle.append(engine)
+                    self._available.notify()
+            if closed:
+                self._discard(engine)
+
+    def play(self, board, limit, **kwargs):
+        with self.engine() as engine:
+            return engine.play(board, limit, **kwargs)
+
+    def analyse(self, board, limit, **kwargs):
+        with self.engine() as engine:
+            return engine.analyse(board, limit, **kwargs)
+
+    def stats(self):
+        return {'size': self.size, 'started': self._started, 'idle': len(self._idle)}
+
+    def close(self):
+        """Quit idle engines; engines in use are quit when they are returned."""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for engine in idle:
+            self._discard(engine)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Deterministic fake UCI engine for load tests and benchmarks.
+
+It speaks enough UCI for python-chess and the app, but instead of searching
+it sleeps for a configurable time and answers from a seeded generator, so
+the web tier (engine pool, broker, caches, admission control) can be
+exercised reproducibly without CPU-bound Stockfish searches. Point the app
+at it like any other engine binary::
+
+    STOCKFISH_PATH=$(command -v analyze-chess-fake-uci) python app.py serve
+    STOCKFISH_PATH=/path/to/analyze_chess/fake_uci.py python app.py serve
+
+Like Stockfish, it prints its name and exits when given any command-line
+argument (``--version``), so version probes do not wait on stdin.
+
+Behaviour is read from the environment, which the engine inherits from the
+app:
+
+ANALYZE_CHESS_FAKE_LATENCY
+    search time: ``fixed:S`` (default ``fixed:0.05``), ``uniform:LO,HI``,
+    ``normal:MEAN,SD``, ``lognormal:MEDIAN,SIGMA``, ``exp:MEAN`` (seconds),
+    or ``movetime`` to use the time the go command allows.
+ANALYZE_CHESS_FAKE_SEED
+    seed (default 0). Every search draws from a generator seeded with the
+    seed and the position, so a position gets the same latency, move and
+    faults in every engine process and every run.
+ANALYZE_CHESS_FAKE_MOVE
+    ``first`` legal move in UCI order (default) or a seeded ``random`` one.
+ANALYZE_CHESS_FAKE_DEPTH, ANALYZE_CHESS_FAKE_NPS
+    depth and speed reported in info lines (default 20 and 1000000).
+ANALYZE_CHESS_FAKE_FAULTS
+    comma-separated ``kind:probability`` per search, kinds ``hang`` (never
+    answers and ignores stop; only quit ends it), ``crash`` (the process
+    exits mid-search) and ``garbage`` (malformed lines and an illegal
+    bestmove), e.g. ``hang:0.01,crash:0.005``.
+ANALYZE_CHESS_FAKE_SCRIPT
+    JSON file of scripted answers keyed by FEN (full, or without the move
+    counters) or ``"*"`` for every other position; each entry may set
+    ``bestmove``, ``info`` (raw lines sent in order across the search),
+    ``latency`` (seconds) and ``fault``.
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+import chess
+
+ENGINE_NAME = 'Analyze Chess Fake Engine'
+ENGINE_AUTHOR = 'AprilLorDrake'
+FAULTS = ('hang', 'crash', 'garbage')
+
+
+def parse_latency(spec):
+    """A function (rng, allowed seconds or None) -> seconds for a latency spec."""
+    kind, _, args = spec.strip().partition(':')
+    values = [float(v) for v in args.split(',') if v.strip()] if args else []
+    if kind == 'fixed':
+        return lambda rng, allowed: values[0]
+    if kind == 'uniform':
+        return lambda rng, allowed: rng.uniform(values[0], values[1])
+    if kind == 'normal':
+        return lambda rng, allowed: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == 'lognormal':
+        return lambda rng, allowed: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == 'exp':
+        return lambda rng, allowed: rng.expovariate(1.0 / values[0])
+    if kind == 'movetime':
+        return lambda rng, allowed: allowed if allowed is not None else 0.05
+    raise ValueError(f"unknown latency distribution {spec!r}")
+
+
+def parse_faults(spec):
+    faults = []
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        kind, _, probability = item.partition(':')
+        kind = kind.strip()
+        if kind not in FAULTS:
+            raise ValueError(f"unknown fault {kind!r} (expected one of {', '.join(FAULTS)})")
+        faults.append((kind, float(probability or 1.0)))
+    return faults
+
+
+def allowed_time(tokens, turn):
+    """Seconds a 'go' command allows, or None when it sets no time limit."""
+    args = {}
+    for key, value in zip(tokens, tokens[1:]):
+        try:
+            args[key] = int(value)
+        except ValueError:
+            pass
+    if 'movetime' in args:
+        return args['movetime'] / 1000.0
+    remaining = args.get('wtime' if turn == chess.WHITE else 'btime')
+    if remaining is not None:
+        return max(remaining / max(args.get('movestogo', 30), 1), 10) / 1000.0
+    return None
+
+
+class Config:
+    def __init__(self, environ=None):
+        environ = os.environ if environ is None else environ
+        self.latency = parse_latency(environ.get('ANALYZE_CHESS_FAKE_LATENCY', 'fixed:0.05'))
+        self.seed = environ.get('ANALYZE_CHESS_FAKE_SEED', '0')
+        self.move = environ.get('ANALYZE_CHESS_FAKE_MOVE', 'first')
+        self.depth = max(1, int(environ.get('ANALYZE_CHESS_FAKE_DEPTH', 20)))
+        self.nps = int(environ.get('ANALYZE_CHESS_FAKE_NPS', 1000000))
+        self.faults = parse_faults(environ.get('ANALYZE_CHESS_FAKE_FAULTS', ''))
+        self.script = {}
+        script = environ.get('ANALYZE_CHESS_FAKE_SCRIPT')
+        if script:
+            with open(script, encoding='utf-8') as f:
+                self.script = json.load(f)
+
+    def scripted(self, board):
+        fen = board.fen()
+        short = ' '.join(fen.split()[:4])
+        return self.script.get(fen) or self.script.get(short) or self.script.get('*') or {}
+
+    def rng(self, board):
+        digest = hashlib.sha256(f"{self.seed}|{board.fen()}".encode('utf-8')).digest()
+        return random.Random(int.from_bytes(digest[:8], 'big'))
+
+
+class FakeEngine:
+    def __init__(self, config=None, output=None):
+        self.config = config or Config()
+        self.output = output or sys.stdout
+        self.board = chess.Board()
+        self.hung = False
+        self._thread = None
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+
+    def send(self, line):
+        with self._write_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def handle(self, line):
+        """Process one command line. Returns False when the engine should exit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == 'quit':
+            self.stop()
+            return False
+        if self.hung:
+            # A wedged engine: nothing but quit (or being killed) gets through
+            return True
+        if command == 'uci':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send("option name Hash type spin default 16 min 1 max 1024")
+            self.send("option name Threads type spin default 1 min 1 max 512")
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'ucinewgame':
+            self.stop()
+            self.board = chess.Board()
+        elif command == 'position':
+            self.stop()
+            self._position(args)
+        elif command == 'go':
+            self.stop()
+            self._go(args)
+        elif command == 'stop':
+            self.stop()
+        return True
+
+    def _position(self, args):
+        try:
+            if args and args[0] == 'startpos':
+                board, rest = chess.Board(), args[1:]
+            elif args and args[0] == 'fen':
+                end = args.index('moves') if 'moves' in args else len(args)
+                board, rest = chess.Board(' '.join(args[1:end])), args[end:]
+            else:
+                return
+            for uci in rest[1:] if rest and rest[0] == 'moves' else ():
+                board.push_uci(uci)
+        except ValueError as e:
+            self.send(f"info string invalid position: {e}")
+            return
+        self.board = board
+
+    def _go(self, args):
+        board = self.board.copy()
+        config = self.config
+        rng = config.rng(board)
+        script = config.scripted(board)
+        infinite = 'infinite' in args
+        latency = script.get('latency')
+        if latency is None:
+            latency = config.latency(rng, allowed_time(args, board.turn))
+        fault = script.get('fault')
+        if fault is None:
+            for kind, probability in config.faults:
+                if rng.random() < probability:
+                    fault = kind
+                    break
+        moves = sorted(board.legal_moves, key=lambda move: move.uci())
+        if script.get('bestmove'):
+            best = script['bestmove']
+        elif not moves:
+            best = '0000'
+        elif config.move == 'random':
+            best = rng.choice(moves).uci()
+        else:
+            best = moves[0].uci()
+        score = rng.randint(-60, 60)
+        if fault == 'hang':
+            # Wedged from the start: no info, no bestmove, until quit
+            self.hung = True
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        args=(board, latency, infinite, fault, best, score, script.get('info')))
+        self._thread.start()
+
+    def _run(self, board, latency, infinite, fault, best, score, scripted_info):
+        lines = scripted_info
+        if lines is None:
+            lines = [self._info(board, depth, score, best, latency * depth / self.config.depth)
+                     for depth in range(1, self.config.depth + 1)] if best != '0000' else []
+        step = latency / max(len(lines), 1)
+        started = time.monotonic()
+        for index, line in enumerate(lines):
+            if fault == 'crash' and index >= len(lines) // 2:
+                os._exit(3)
+            if self._stop.wait(max(0.0, started + step * (index + 1) - time.monotonic())):
+                break
+            self.send(line)
+        if fault == 'crash':
+            os._exit(3)
+        self._stop.wait(max(0.0, started + latency - time.monotonic()))
+        if infinite:
+            # UCI: in infinite mode the best move is only reported after 'stop'
+            self._stop.wait()
+        if fault == 'garbage':
+            self.send("info depth banana score cp")
+            self.send("\x1b[2J%%%% segmentation fault (core dumped) %%%%")
+            self.send("bestmove a1a1")
+            return
+        self.send(f"bestmove {best}")
+
+    def _info(self, board, depth, score, best, elapsed):
+        pv = [best]
+        reply_board = board.copy(stack=False)
+        try:
+            reply_board.push_uci(best)
+        except ValueError:
+            # A scripted bestmove need not be legal
+            replies = []
+        else:
+            replies = sorted(reply_board.legal_moves, key=lambda move: move.uci())
+        if replies:
+            pv.append(replies[0].uci())
+        nodes = max(1, int(self.config.nps * elapsed))
+        return (f"info depth {depth} seldepth {depth + 2} score cp {score} nodes {nodes} "
+                f"nps {self.config.nps} time {int(elapsed * 1000)} pv {' '.join(pv)}")
+
+    def stop(self):
+        if self._thread is not None and not self.hung:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def wait(self):
+        if self._thread is not None and not self.hung:
+            self._thread.join()
+
+
+def main():
+    if len(sys.argv) > 1:
+        print(f"id name {ENGINE_NAME}")
+        return
+    engine = FakeEngine()
+    for line in sys.stdin:
+        if not engine.handle(line.strip()):
+            break
+    engine.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,552 @@
+"""Built-in fallback engine used when no Stockfish binary is available.
+
+The engine is a small iterative-deepening alpha-beta search over a
+material + piece-square + pawn-structure evaluation. Positions are cached in
+a shared transposition table and pawn-structure scores in a separate pawn
+hash table (see ``analyze_chess.tt``); both are sized in megabytes through
+environment variables:
+
+    ANALYZE_CHESS_TT_MB            transposition table size (default 16)
+    ANALYZE_CHESS_PAWN_HASH_MB     pawn hash table size (default 1)
+    ANALYZE_CHESS_FALLBACK_DEPTH   maximum search depth (default 3)
+    ANALYZE_CHESS_FALLBACK_TIME    time budget per search in seconds (default 1.5)
+    ANALYZE_CHESS_FALLBACK_WORKERS processes to split root moves over (default 1)
+    ANALYZE_CHESS_WEIGHTS          tuned weights file (default fallback_weights.json
+                                   in this package, written by analyze_chess.tune)
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+
+import chess
+import chess.polyglot
+
+from .see import see
+from .tt import TranspositionTable, PawnHashTable, EXACT, LOWER, UPPER
+
+MATE_SCORE = 100000
+MATE_THRESHOLD = MATE_SCORE - 1000
+INFINITY = MATE_SCORE + 1
+MAX_PLY = 32
+DELTA_MARGIN = 200
+
+# Centipawn piece values
+PIECE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 300,
+    chess.BISHOP: 300,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 0,
+}
+
+# Heuristic weights (centipawns). The move bonuses only order the root moves
+# for the first iteration (and break ties); reported scores are the plain
+# searched score, since the search already counts the material they reward.
+WEIGHTS = {
+    'check': 50,
+    'center': 20,
+    'hanging': 30,
+    'mate': 10000,
+    'doubled_pawn': 15,
+    'isolated_pawn': 12,
+    'passed_pawn': 10,
+    # Used by the vectorized evaluator (batch_eval) only
+    'mobility': 2,
+    'blocked_pawn': 10,
+}
+
+CENTER_SQUARES = (chess.E4, chess.E5, chess.D4, chess.D5)
+
+# Piece-square tables from White's point of view, written rank 8 first so
+# they read like a diagram. PST below re-indexes them by square (a1 = 0).
+_PST_DIAGRAMS = {
+    chess.PAWN: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ),
+    chess.KNIGHT: (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ),
+    chess.BISHOP: (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ),
+    chess.ROOK: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ),
+    chess.QUEEN: (
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ),
+    chess.KING: (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ),
+}
+
+PST = {
+    piece_type: [table[chess.square_mirror(square)] for square in chess.SQUARES]
+    for piece_type, table in _PST_DIAGRAMS.items()
+}
+
+_ADJACENT_FILES = [
+    (chess.BB_FILES[f - 1] if f > 0 else 0) | (chess.BB_FILES[f + 1] if f < 7 else 0)
+    for f in range(8)
+]
+
+
+def _passed_mask(color, square):
+    file, rank = chess.square_file(square), chess.square_rank(square)
+    files = chess.BB_FILES[file] | _ADJACENT_FILES[file]
+    ranks = chess.BB_EMPTY
+    ahead = range(rank + 1, 8) if color == chess.WHITE else range(rank)
+    for r in ahead:
+        ranks |= chess.BB_RANKS[r]
+    return files & ranks
+
+
+_PASSED_MASKS = {
+    color: [_passed_mask(color, square) for square in chess.SQUARES]
+    for color in chess.COLORS
+}
+
+
+def weights_path():
+    """Location of the tuned weights file (see analyze_chess.tune)."""
+    return os.environ.get('ANALYZE_CHESS_WEIGHTS') or os.path.join(os.path.dirname(__file__), 'fallback_weights.json')
+
+
+def load_weights(path=None):
+    """Replace the built-in weights with those from a tuned weights file.
+
+    The tables are updated in place so modules holding references to them
+    see the new values. Returns True when a file was loaded.
+    """
+    import json
+    path = path or weights_path()
+    if not os.path.isfile(path):
+        return False
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        piece_values = {chess.PIECE_SYMBOLS.index(k): int(v) for k, v in data.get('piece_values', {}).items()}
+        pst = {chess.PIECE_SYMBOLS.index(k): [int(x) for x in v] for k, v in data.get('pst', {}).items()}
+        if any(len(table) != 64 for table in pst.values()):
+            raise ValueError('piece-square tables must have 64 entries')
+        weights = {k: int(v) for k, v in data.get('weights', {}).items() if k in WEIGHTS}
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        print(f"Ignoring invalid fallback weights file {path}: {e}")
+        return False
+    PIECE_VALUES.update(piece_values)
+    for piece_type, table in pst.items():
+        PST[piece_type][:] = table
+    WEIGHTS.update(weights)
+    return True
+
+
+load_weights()
+
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'nodes', 'elapsed'])
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+_shared_tables = {}
+_shared_lock = threading.Lock()
+
+
+def shared_tables():
+    """Return the process-wide (transposition table, pawn hash) pair."""
+    with _shared_lock:
+        if not _shared_tables:
+            _shared_tables['tt'] = TranspositionTable(_env_float('ANALYZE_CHESS_TT_MB', 16))
+            _shared_tables['pawn_hash'] = PawnHashTable(_env_float('ANALYZE_CHESS_PAWN_HASH_MB', 1))
+        return _shared_tables['tt'], _shared_tables['pawn_hash']
+
+
+def table_stats():
+    tt, pawn_hash = shared_tables()
+    return {'tt': tt.stats(), 'pawn_hash': pawn_hash.stats()}
+
+
+def pawn_hash_key(board):
+    """Zobrist key over pawn placement only, using the polyglot random table."""
+    key = 0
+    randoms = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+    for pivot, color in enumerate(chess.COLORS):
+        for square in chess.scan_forward(board.pieces_mask(chess.PAWN, color)):
+            key ^= randoms[64 * pivot + square]
+    return key
+
+
+def pawn_structure(board, weights=WEIGHTS):
+    """Doubled/isolated/passed pawn score from White's point of view."""
+    score = 0
+    for color, sign in ((chess.WHITE, 1), (chess.BLACK, -1)):
+        own = board.pieces_mask(chess.PAWN, color)
+        enemy = board.pieces_mask(chess.PAWN, not color)
+        for file in range(8):
+            count = chess.popcount(own & chess.BB_FILES[file])
+            if count > 1:
+                score -= sign * weights['doubled_pawn'] * (count - 1)
+            if count and not own & _ADJACENT_FILES[file]:
+                score -= sign * weights['isolated_pawn'] * count
+        for square in chess.scan_forward(own):
+            if not enemy & _PASSED_MASKS[color][square]:
+                rank = chess.square_rank(square)
+                advance = rank if color == chess.WHITE else 7 - rank
+                score += sign * weights['passed_pawn'] * advance
+    return score
+
+
+def evaluate(board, pawn_hash=None, weights=WEIGHTS):
+    """Static evaluation in centipawns from the side to move's point of view."""
+    score = 0
+    for piece_type in chess.PIECE_TYPES:
+        value = PIECE_VALUES[piece_type]
+        table = PST[piece_type]
+        for square in chess.scan_forward(board.pieces_mask(piece_type, chess.WHITE)):
+            score += value + table[square]
+        for square in chess.scan_forward(board.pieces_mask(piece_type, chess.BLACK)):
+            score -= value + table[chess.square_mirror(square)]
+
+    if pawn_hash is None:
+        score += pawn_structure(board, weights)
+    else:
+        key = pawn_hash_key(board)
+        pawns = pawn_hash.get(key)
+        if pawns is None:
+            pawns = pawn_structure(board, weights)
+            pawn_hash.put(key, pawns)
+        score += pawns
+
+    return score if board.turn == chess.WHITE else -score
+
+
+def root_move_bonus(board, move, weights=WEIGHTS):
+    """Heuristic bonus for playing move from board (the original fallback rules)."""
+    score = 0
+    # Net material from the exchange this move starts on its target square
+    exchange = see(board, move)
+
+    # 1. Captures are good when they survive the recaptures
+    if board.is_capture(move) and exchange > 0:
+        score += exchange
+
+    # 5. Avoid putting pieces in danger (losing exchange on the target square)
+    if exchange < 0:
+        score -= weights['hanging']
+
+    board.push(move)
+    try:
+        # 2. Check is good
+        if board.is_check():
+            score += weights['check']
+
+        # 3. Checkmate is best
+        if board.is_checkmate():
+            score += weights['mate']
+
+        # 4. Center control (e4, e5, d4, d5)
+        if move.to_square in CENTER_SQUARES:
+            score += weights['center']
+    finally:
+        board.pop()
+    return score
+
+
+def score_children_static(board, moves=None):
+    """Static score of each child of board from the mover's point of view.
+
+    Uses the NumPy batch evaluator to score all children in one call when
+    available; otherwise returns an empty list.
+    """
+    from . import batch_eval
+    if not batch_eval.available():
+        return []
+    return batch_eval.score_children(board, moves)
+
+
+def _score_to_tt(score, ply):
+    if score > MATE_THRESHOLD:
+        return score + ply
+    if score < -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    if score > MATE_THRESHOLD:
+        return score - ply
+    if score < -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when a time, node or stop limit is hit."""
+
+
+class FallbackSearch:
+    """Iterative-deepening alpha-beta search backed by the shared hash tables."""
+
+    def __init__(self, max_depth=None, time_limit=None, max_nodes=None,
+                 tt=None, pawn_hash=None, weights=None):
+        if tt is None or pawn_hash is None:
+            shared_tt, shared_pawns = shared_tables()
+            tt = tt or shared_tt
+            pawn_hash = pawn_hash or shared_pawns
+        self.tt = tt
+        self.pawn_hash = pawn_hash
+        self.weights = weights or WEIGHTS
+        self.max_depth = int(max_depth or _env_float('ANALYZE_CHESS_FALLBACK_DEPTH', 3))
+        self.time_limit = time_limit if time_limit is not None else _env_float('ANALYZE_CHESS_FALLBACK_TIME', 1.5)
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self._check_at = 0
+        self._deadline = None
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+
+    def _check_limits(self):
+        if self._stopped:
+            raise SearchStopped()
+        if self.max_nodes and self.nodes >= self.max_nodes:
+            raise SearchStopped()
+        if self._deadline and time.monotonic() >= self._deadline:
+            raise SearchStopped()
+        self._check_at = self._next_check()
+
+    def _next_check(self):
+        """Node count at which to check the limits next: every 1024 nodes, and at max_nodes."""
+        interval = (self.nodes | 1023) + 1
+        return min(interval, self.max_nodes) if self.max_nodes else interval
+
+    def _start(self):
+        self._deadline = time.monotonic() + self.time_limit if self.time_limit else None
+        self.nodes = 0
+        self._check_at = self._next_check()
+
+    def order_root_moves(self, board):
+        """Legal root moves ordered for the first iteration by bonus and static score."""
+        moves = self._ordered_moves(board, None)
+        bonuses = {move: root_move_bonus(board, move, self.weights) for move in moves}
+        static = dict(score_children_static(board, moves))
+        moves.sort(key=lambda m: bonuses[m] + static.get(m, 0), reverse=True)
+        return moves
+
+    def search(self, board, info=None):
+        """Search board and return a SearchResult for the best move found.
+
+        info, if given, is called with an interim SearchResult after every
+        completed iteration.
+        """
+        start = time.monotonic()
+        self._start()
+        self.tt.new_search()
+        board = board.copy()
+
+        moves = self.order_root_moves(board)
+        if not moves:
+            return SearchResult(None, 0, 0, 0, 0.0)
+
+        best_move, best_score, completed = moves[0], -INFINITY, 0
+        for depth in range(1, self.max_depth + 1):
+            scores = {}
+            try:
+                self._search_root(board, depth, moves, scores)
+            except SearchStopped:
+                break
+            # Stable sort: equal scores keep the previous (bonus-led) order
+            moves.sort(key=lambda m: scores[m], reverse=True)
+            best_move, best_score, completed = moves[0], scores[moves[0]], depth
+            if info is not None:
+                info(SearchResult(best_move, best_score, completed, self.nodes, time.monotonic() - start))
+            if abs(best_score) > MATE_THRESHOLD:
+                break
+        return SearchResult(best_move, best_score, completed, self.nodes, time.monotonic() - start)
+
+    def principal_variation(self, board, first_move, max_length=16):
+        """Follow transposition table moves from first_move to build a PV."""
+        board = board.copy()
+        pv = []
+        move = first_move
+        while move is not None and len(pv) < max_length and board.is_legal(move):
+            pv.append(move)
+            board.push(move)
+            entry = self.tt.peek(chess.polyglot.zobrist_hash(board))
+            move = entry[3] if entry else None
+        return pv
+
+    def score_root_moves(self, board, moves, depth, scores):
+        """Search only the given root moves to a fixed depth, filling scores.
+
+        Used to split the root between worker processes. Raises SearchStopped
+        when a limit is hit; scores then holds the moves finished so far.
+        """
+        self._start()
+        self._search_root(board.copy(), depth, moves, scores)
+
+    def _search_root(self, board, depth, moves, scores):
+        alpha = -INFINITY
+        for move in moves:
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -INFINITY, -alpha, 1)
+            board.pop()
+            scores[move] = score
+            alpha = max(alpha, score)
+        return scores
+
+    def _ordered_moves(self, board, tt_move):
+        """Legal moves ordered TT move, winning captures by SEE, quiet, losing captures."""
+        def priority(move):
+            if move == tt_move:
+                return 1000000
+            score = PIECE_VALUES[move.promotion] if move.promotion else 0
+            if board.is_capture(move):
+                exchange = see(board, move)
+                score += exchange + (100000 if exchange >= 0 else -100000)
+            return score
+
+        moves = list(board.legal_moves)
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def _quiescence(self, board, alpha, beta, ply):
+        """Resolve captures at the horizon, skipping those that lose material."""
+        self.nodes += 1
+        if self.nodes >= self._check_at:
+            self._check_limits()
+        stand_pat = evaluate(board, self.pawn_hash, self.weights)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        captures = []
+        for move in board.generate_legal_captures():
+            exchange = see(board, move)
+            if exchange >= 0:
+                captures.append((exchange, move))
+        captures.sort(key=lambda item: item[0], reverse=True)
+
+        for exchange, move in captures:
+            # Delta pruning: even winning the exchange cannot raise alpha
+            if stand_pat + exchange + DELTA_MARGIN < alpha:
+                break
+            board.push(move)
+            score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            board.pop()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes >= self._check_at:
+            self._check_limits()
+        if board.halfmove_clock >= 100:
+            return 0
+        if depth <= 0:
+            return self._quiescence(board, alpha, beta, ply)
+
+        key = chess.polyglot.zobrist_hash(board)
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            entry_depth, entry_score, bound, tt_move = entry
+            if entry_depth >= depth:
+                score = _score_from_tt(entry_score, ply)
+                if bound == EXACT:
+                    return score
+                if bound == LOWER and score >= beta:
+                    return score
+                if bound == UPPER and score <= alpha:
+                    return score
+
+        moves = self._ordered_moves(board, tt_move)
+        if not moves:
+            return -MATE_SCORE + ply if board.is_check() else 0
+
+        alpha_orig = alpha
+        best_score, best_move = -INFINITY, None
+        for move in moves:
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= alpha_orig:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(key, depth, _score_to_tt(best_score, ply), bound, best_move)
+        return best_score
+
+
+def choose_move(board, max_depth=None, time_limit=None, workers=None):
+    """Convenience wrapper: search board with the shared tables.
+
+    With more than one worker (ANALYZE_CHESS_FALLBACK_WORKERS) the root moves
+    are split across a process pool, see ``analyze_chess.parallel``.
+    """
+    if workers is None:
+        workers = int(_env_float('ANALYZE_CHESS_FALLBACK_WORKERS', 1))
+    if workers > 1:
+        from .parallel import ParallelRootSearch
+        return ParallelRootSearch(workers, max_depth=max_depth, time_limit=time_limit).search(board)
+    return FallbackSearch(max_depth=max_depth, time_limit=time_limit).search(board)
@@ -0,0 +1,207 @@
+"""UCI front end for the built-in fallback engine.
+
+Run it like any other engine binary::
+
+    python -m analyze_chess.fallback_uci
+
+Supported commands: uci, isready, setoption (Hash), ucinewgame, position,
+go (movetime, depth, nodes, wtime/btime/winc/binc/movestogo, infinite),
+stop and quit. An ``info`` line is printed after every completed iteration.
+"""
+import sys
+import threading
+
+import chess
+
+from . import fallback
+from .tt import TranspositionTable
+
+ENGINE_NAME = 'Analyze Chess Fallback'
+ENGINE_AUTHOR = 'AprilLorDrake'
+MAX_DEPTH = 64
+
+
+def parse_go(tokens, turn):
+    """Turn the arguments of a 'go' command into search limits.
+
+    Returns (max_depth, time_limit, max_nodes, infinite); a time_limit of 0
+    means no time limit.
+    """
+    args = {}
+    infinite = False
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == 'infinite':
+            infinite = True
+            i += 1
+        elif i + 1 < len(tokens):
+            try:
+                args[token] = int(tokens[i + 1])
+            except ValueError:
+                pass
+            i += 2
+        else:
+            i += 1
+
+    depth = args.get('depth', MAX_DEPTH)
+    nodes = args.get('nodes')
+    time_limit = 0
+    if 'movetime' in args:
+        time_limit = args['movetime'] / 1000.0
+    else:
+        remaining = args.get('wtime' if turn == chess.WHITE else 'btime')
+        if remaining is not None:
+            increment = args.get('winc' if turn == chess.WHITE else 'binc', 0)
+            moves_to_go = args.get('movestogo', 30)
+            budget = remaining / max(moves_to_go, 1) + increment * 0.8
+            time_limit = max(min(budget, remaining * 0.5), 10) / 1000.0
+    if infinite:
+        time_limit = 0
+    return depth, time_limit, nodes, infinite
+
+
+def format_score(score):
+    if abs(score) > fallback.MATE_THRESHOLD:
+        # Mate scores count the plies to mate from the root
+        moves = (fallback.MATE_SCORE - abs(score) + 1) // 2
+        return f"mate {moves if score > 0 else -moves}"
+    return f"cp {score}"
+
+
+class UciEngine:
+    def __init__(self, output=None):
+        self.output = output or sys.stdout
+        self.board = chess.Board()
+        self.tt = None
+        self._search = None
+        self._thread = None
+        self._stop_requested = threading.Event()
+        self._write_lock = threading.Lock()
+
+    def send(self, line):
+        with self._write_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def handle(self, line):
+        """Process one command line. Returns False when the engine should exit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == 'uci':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send("option name Hash type spin default 16 min 1 max 1024")
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'setoption':
+            self._setoption(args)
+        elif command == 'ucinewgame':
+            self.stop()
+            self.board = chess.Board()
+            self._tt().clear()
+        elif command == 'position':
+            self.stop()
+            self._position(args)
+        elif command == 'go':
+            self.stop()
+            self._go(args)
+        elif command == 'stop':
+            self.stop()
+        elif command == 'quit':
+            self.stop()
+            return False
+        return True
+
+    def _tt(self):
+        if self.tt is None:
+            self.tt, _ = fallback.shared_tables()
+        return self.tt
+
+    def _setoption(self, args):
+        lowered = [a.lower() for a in args]
+        if 'name' in lowered and 'value' in lowered:
+            name = ' '.join(args[lowered.index('name') + 1:lowered.index('value')]).lower()
+            value = ' '.join(args[lowered.index('value') + 1:])
+            if name == 'hash':
+                try:
+                    self.tt = TranspositionTable(max(1, int(value)))
+                except ValueError:
+                    pass
+
+    def _position(self, args):
+        if not args:
+            return
+        try:
+            if args[0] == 'startpos':
+                board = chess.Board()
+                rest = args[1:]
+            elif args[0] == 'fen':
+                end = args.index('moves') if 'moves' in args else len(args)
+                board = chess.Board(' '.join(args[1:end]))
+                rest = args[end:]
+            else:
+                return
+            if rest and rest[0] == 'moves':
+                for uci in rest[1:]:
+                    board.push_uci(uci)
+        except ValueError as e:
+            self.send(f"info string invalid position: {e}")
+            return
+        self.board = board
+
+    def _go(self, args):
+        depth, time_limit, nodes, infinite = parse_go(args, self.board.turn)
+        _, pawn_hash = fallback.shared_tables()
+        search = fallback.FallbackSearch(max_depth=depth, time_limit=time_limit, max_nodes=nodes,
+                                         tt=self._tt(), pawn_hash=pawn_hash)
+        board = self.board.copy()
+        self._search = search
+        self._stop_requested.clear()
+        self._thread = threading.Thread(target=self._run, args=(search, board, infinite), daemon=True)
+        self._thread.start()
+
+    def _run(self, search, board, infinite):
+        def info(result):
+            pv = search.principal_variation(board, result.move)
+            nps = int(result.nodes / result.elapsed) if result.elapsed > 0 else 0
+            self.send(
+                f"info depth {result.depth} score {format_score(result.score)} "
+                f"nodes {result.nodes} nps {nps} time {int(result.elapsed * 1000)} "
+                f"pv {' '.join(move.uci() for move in pv)}"
+            )
+
+        result = search.search(board, info=info)
+        if infinite:
+            # UCI: in infinite mode the best move is only reported after 'stop'
+            self._stop_requested.wait()
+        self.send(f"bestmove {result.move.uci() if result.move else '0000'}")
+
+    def stop(self):
+        if self._thread is not None:
+            if self._search is not None:
+                self._search.stop()
+            self._stop_requested.set()
+            self._thread.join()
+            self._thread = None
+            self._search = None
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main():
+    engine = UciEngine()
+    for line in sys.stdin:
+        if not engine.handle(line.strip()):
+            break
+    engine.wait()
+
+
+if __name__ == '__main__':
+    main()
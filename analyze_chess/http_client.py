@@ -0,0 +1,197 @@
+"""Shared outbound HTTP client for the update checks.
+
+One pooled ``requests.Session`` serves every outbound call, so the GitHub
+and PyPI checks reuse keep-alive connections. JSON responses that carry an
+ETag are remembered and revalidated with ``If-None-Match``, which turns a
+repeat check into an empty 304 (and does not count against GitHub's rate
+limit).
+
+When a connection or DNS lookup fails the host is treated as offline for
+ANALYZE_CHESS_OFFLINE_RETRY seconds (default 300): requests to it fail
+immediately with ``OfflineError`` instead of waiting for their timeout.
+ANALYZE_CHESS_OFFLINE=1 keeps every host offline.
+
+Every check is timed into analyze_chess_http_check_seconds, labelled with
+the host and the outcome (ok, not_modified, status, offline, error).
+
+All checks made for one page share a deadline (ANALYZE_CHESS_CHECK_BUDGET,
+default 5 seconds); request timeouts are cut to the time that is left.
+
+``requests`` (and urllib3 under it) is imported on first use rather than
+with this module, which keeps it off the app's cold-start path.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from urllib.parse import urlsplit
+
+from .metrics import REGISTRY
+
+USER_AGENT = 'analyze-chess-app'
+CONNECT_TIMEOUT = 1.5
+CHECK_BUDGET = float(os.environ.get('ANALYZE_CHESS_CHECK_BUDGET', 5.0))
+OFFLINE_RETRY = float(os.environ.get('ANALYZE_CHESS_OFFLINE_RETRY', 300))
+
+CHECK_SECONDS = REGISTRY.histogram(
+    'analyze_chess_http_check_seconds', 'Latency of outbound metadata checks (GitHub, PyPI).', ['host', 'outcome'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0))
+
+
+def _requests():
+    """The requests module, or None when it is not installed."""
+    try:
+        import requests
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return requests
+
+
+class OfflineError(Exception):
+    """The host is (or was just found to be) unreachable."""
+
+
+class HttpClient:
+    def __init__(self, offline_retry=OFFLINE_RETRY, max_workers=8):
+        self.offline_retry = offline_retry
+        self.forced_offline = os.environ.get('ANALYZE_CHESS_OFFLINE', '').lower() in ('1', 'true', 'yes')
+        self._max_workers = max_workers
+        self._session = None
+        self._requests_pool = None
+        self._tasks_pool = None
+        self._etags = {}
+        self._offline_until = {}
+        self._lock = threading.Lock()
+
+    def available(self):
+        return _requests() is not None
+
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    requests = _requests()
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self._max_workers)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers['User-Agent'] = USER_AGENT
+                    self._session = session
+        return self._session
+
+    def _pool(self, name):
+        pool = getattr(self, name)
+        if pool is None:
+            with self._lock:
+                pool = getattr(self, name)
+                if pool is None:
+                    pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='http')
+                    setattr(self, name, pool)
+        return pool
+
+    def is_offline(self, url=None):
+        """True when url's host (or, without url, any host) was recently unreachable."""
+        if self.forced_offline:
+            return True
+        now = time.monotonic()
+        if url is None:
+            return any(now < until for until in self._offline_until.values())
+        return now < self._offline_until.get(urlsplit(url).netloc, 0.0)
+
+    def deadline(self, budget=None):
+        return time.monotonic() + (CHECK_BUDGET if budget is None else budget)
+
+    def _timeout(self, timeout, deadline):
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                raise TimeoutError('check budget exhausted')
+        return (min(CONNECT_TIMEOUT, timeout), timeout)
+
+    def get_json(self, url, timeout=5.0, deadline=None, headers=None):
+        """Decoded JSON for url, or None for a non-2xx response.
+
+        Raises OfflineError when the network is unreachable, TimeoutError when
+        the deadline has passed, and requests exceptions for other failures.
+        """
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            data, outcome = self._get_json(url, timeout, deadline, headers)
+            return data
+        except OfflineError:
+            outcome = 'offline'
+            raise
+        finally:
+            CHECK_SECONDS.labels(urlsplit(url).netloc, outcome).observe(time.perf_counter() - started)
+
+    def _get_json(self, url, timeout, deadline, headers):
+        if self.is_offline(url):
+            raise OfflineError(f"{urlsplit(url).netloc} is offline")
+        timeout = self._timeout(timeout, deadline)
+        request_headers = {'Accept': 'application/json'}
+        request_headers.update(headers or {})
+        cached = self._etags.get(url)
+        if cached:
+            request_headers['If-None-Match'] = cached[0]
+        try:
+            response = self.session().get(url, headers=request_headers, timeout=timeout)
+        except _requests().ConnectionError as e:
+            self._offline_until[urlsplit(url).netloc] = time.monotonic() + self.offline_retry
+            raise OfflineError(str(e)) from e
+        self._offline_until.pop(urlsplit(url).netloc, None)
+        if response.status_code == 304:
+            if cached:
+                return cached[1], 'not_modified'
+            # Nothing to fall back on (e.g. the caller sent its own validator)
+            return None, 'status'
+        if not response.ok:
+            return None, 'status'
+        data = response.json()
+        etag = response.headers.get('ETag')
+        if etag:
+            self._etags[url] = (etag, data)
+        return data, 'ok'
+
+    def get_json_many(self, urls, timeout=5.0, deadline=None, headers=None):
+        """Fetch urls concurrently; returns {url: data, None or the exception raised}."""
+        futures = {url: self._pool('_requests_pool').submit(self.get_json, url, timeout, deadline, headers)
+                   for url in urls}
+        return self._collect(futures, deadline)
+
+    def gather(self, calls, deadline=None):
+        """Run zero-argument callables concurrently, waiting no longer than deadline.
+
+        Returns {name: result or the exception raised}; calls still running at
+        the deadline get a TimeoutError.
+        """
+        futures = {name: self._pool('_tasks_pool').submit(call) for name, call in calls.items()}
+        return self._collect(futures, deadline)
+
+    def _collect(self, futures, deadline):
+        results = {}
+        for key, future in futures.items():
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0) + 0.25
+            try:
+                results[key] = future.result(timeout=remaining)
+            except FutureTimeout:
+                results[key] = TimeoutError('check budget exhausted')
+            except Exception as e:
+                results[key] = e
+        return results
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def client():
+    """The process-wide HttpClient."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
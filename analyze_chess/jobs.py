@@ -0,0 +1,267 @@
+"""Background runner for long maintenance commands (pip installs).
+
+``JobRunner.submit`` returns at once with a ``Job``; the command runs on a
+daemon thread with stdout and stderr captured line by line into the job's
+log, where ``Job.follow`` can stream it. Jobs submitted to the same runner
+share a lock, so two pip runs never touch the environment at the same time;
+later jobs wait in ``queued`` state. Submitting a command that is already
+queued or running returns the existing job instead of starting another.
+
+With a ``state_dir`` (pre-fork mode, where each request may land on a
+different worker process) every job is also written there, as
+``<id>.json`` plus its log in ``<id>.log``, so any process can report and
+follow it, and the lock is additionally an ``flock`` on ``jobs.lock`` so
+pip runs stay one at a time across processes.
+"""
+import collections
+import contextlib
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+import uuid
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+_JOB_ID = re.compile(r'[0-9a-f]{12}')
+
+
+class Job:
+    def __init__(self, title, cmd, timeout, success_msg, failure_msg):
+        self.id = uuid.uuid4().hex[:12]
+        self.title = title
+        self.cmd = list(cmd)
+        self.timeout = timeout
+        self.success_msg = success_msg
+        self.failure_msg = failure_msg
+        self.status = QUEUED
+        self.returncode = None
+        self.message = f"{title}: queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.log = []
+        self._changed = threading.Condition()
+        self._state_dir = None
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED)
+
+    def _append(self, line):
+        with self._changed:
+            self.log.append(line)
+            self._changed.notify_all()
+        if self._state_dir:
+            with open(os.path.join(self._state_dir, f"{self.id}.log"), 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def _start(self):
+        self.status = RUNNING
+        self.started = time.time()
+        self.message = f"{self.title}: running"
+        self._save()
+
+    def _finish(self, status, message, returncode=None):
+        with self._changed:
+            self.status = status
+            self.message = message
+            self.returncode = returncode
+            self.finished = time.time()
+            self._changed.notify_all()
+        self._save()
+
+    def _save(self):
+        if not self._state_dir:
+            return
+        state = {key: value for key, value in self.to_dict().items() if key not in ('log', 'next')}
+        state['cmd'] = self.cmd
+        path = os.path.join(self._state_dir, f"{self.id}.json")
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(path + '.tmp', path)
+
+    def follow(self, start=0):
+        """Yield log lines from index start as they arrive, until the job is done."""
+        position = start
+        while True:
+            with self._changed:
+                while position >= len(self.log) and not self.done:
+                    self._changed.wait()
+                lines = self.log[position:]
+                done = self.done
+            position += len(lines)
+            yield from lines
+            if done and position >= len(self.log):
+                return
+
+    def to_dict(self, since=0):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'status': self.status,
+            'message': self.message,
+            'returncode': self.returncode,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'log': self.log[since:],
+            'next': len(self.log),
+        }
+
+
+class StoredJob:
+    """Read-only view of a job another process wrote to the state directory."""
+
+    def __init__(self, state_dir, state):
+        self._state_dir = state_dir
+        self.__dict__.update(state)
+
+    @classmethod
+    def load(cls, state_dir, job_id):
+        if not _JOB_ID.fullmatch(job_id or ''):
+            return None
+        try:
+            with open(os.path.join(state_dir, f"{job_id}.json"), encoding='utf-8') as f:
+                return cls(state_dir, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED)
+
+    @property
+    def log(self):
+        try:
+            with open(os.path.join(self._state_dir, f"{self.id}.log"), encoding='utf-8') as f:
+                return f.read().splitlines()
+        except OSError:
+            return []
+
+    def follow(self, start=0, interval=0.25):
+        """Yield log lines from index start, polling the files until the job is done."""
+        position = start
+        while True:
+            current = StoredJob.load(self._state_dir, self.id) or self
+            lines = self.log[position:]
+            position += len(lines)
+            yield from lines
+            if current.done and not self.log[position:]:
+                return
+            time.sleep(interval)
+
+    def to_dict(self, since=0):
+        log = self.log
+        return {
+            'id': self.id,
+            'title': self.title,
+            'status': self.status,
+            'message': self.message,
+            'returncode': self.returncode,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'log': log[since:],
+            'next': len(log),
+        }
+
+
+class JobRunner:
+    def __init__(self, keep=50, state_dir=None):
+        self.keep = keep
+        self.state_dir = state_dir
+        self._jobs = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._exclusive = threading.Lock()
+
+    def share(self, state_dir):
+        """Keep job state in state_dir from now on, for other processes to read."""
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_dir = state_dir
+
+    def submit(self, title, cmd, timeout=None, success_msg=None, failure_msg=None):
+        """Queue cmd and return its Job (or the unfinished Job already running cmd)."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.cmd == list(cmd) and not job.done:
+                    return job
+            job = Job(title, cmd, timeout, success_msg or f"{title}: done", failure_msg or f"{title}: failed")
+            job._state_dir = self.state_dir
+            job._save()
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep:
+                oldest = next(iter(self._jobs.values()))
+                if not oldest.done:
+                    break
+                self._jobs.popitem(last=False)
+                self._remove_files(oldest.id)
+        threading.Thread(target=self._run, args=(job,), name=f"job-{job.id}", daemon=True).start()
+        return job
+
+    def _remove_files(self, job_id):
+        if not self.state_dir:
+            return
+        for suffix in ('.json', '.log'):
+            try:
+                os.unlink(os.path.join(self.state_dir, job_id + suffix))
+            except OSError:
+                pass
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None and self.state_dir:
+            job = StoredJob.load(self.state_dir, job_id)
+        return job
+
+    def jobs(self):
+        return list(self._jobs.values())
+
+    @contextlib.contextmanager
+    def _process_lock(self):
+        """Exclusive across processes sharing state_dir (no-op without one)."""
+        if not self.state_dir:
+            yield
+            return
+        import fcntl
+        with open(os.path.join(self.state_dir, 'jobs.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _run(self, job):
+        with self._exclusive, self._process_lock():
+            job._start()
+            try:
+                process = subprocess.Popen(job.cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                           stdin=subprocess.DEVNULL, text=True, bufsize=1)
+            except Exception as e:
+                job._finish(FAILED, f"{job.failure_msg}: {e}")
+                return
+            timed_out = threading.Event()
+
+            def kill():
+                timed_out.set()
+                process.kill()
+
+            timer = None
+            if job.timeout:
+                timer = threading.Timer(job.timeout, kill)
+                timer.start()
+            try:
+                for line in process.stdout:
+                    job._append(line.rstrip('\n'))
+                returncode = process.wait()
+            finally:
+                if timer:
+                    timer.cancel()
+            if timed_out.is_set():
+                job._finish(FAILED, f"{job.title} timed out after {job.timeout}s", returncode)
+            elif returncode == 0:
+                job._finish(SUCCEEDED, job.success_msg, returncode)
+            else:
+                tail = '\n'.join(job.log[-5:])
+                job._finish(FAILED, f"{job.failure_msg}: {tail}" if tail else job.failure_msg, returncode)
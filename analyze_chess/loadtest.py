@@ -0,0 +1,461 @@
+"""HTTP load test and latency benchmark for a running (or spawned) deployment.
+
+``analyze-chess loadtest`` (or ``python -m analyze_chess.loadtest``) runs
+``--concurrency`` closed-loop clients for ``--duration`` seconds against
+``--url``, each on its own keep-alive connection, and reports throughput,
+p50/p95/p99 latency and error rates per request kind::
+
+    analyze-chess loadtest --url http://127.0.0.1:5000 --concurrency 16 --duration 30 \\
+        --mix api=6,page=2,submit=1,api_post=1 --hit-ratio 0.8 --output run.json
+    analyze-chess loadtest --spawn serve --compare baseline.json
+
+Request kinds: ``page`` (GET /analyze_chess_move?fen=), ``submit`` (POST
+/submit, redirect not followed), ``api`` (GET /api/v1/analyze), ``api_post``
+(POST JSON to /api/v1/analyze) and ``stream`` (the SSE endpoint of the
+asgi mode, read to the end).
+
+FENs come from ``--fens`` (one per line) or are generated from seeded
+random playouts. A ``--hit-ratio`` fraction of requests reuse the ``--hot``
+positions, which are analyzed once before the run; the rest use positions
+not requested before, so they miss the analysis cache. With ``--spawn`` the
+app is started on a free port (offline, so update checks don't reach the
+network) and stopped afterwards. Point STOCKFISH_PATH at the fake engine
+(analyze_chess.fake_uci) for reproducible numbers.
+
+``--output`` saves the configuration, the server's health info and the
+results as JSON; ``--compare`` prints the change against such a file.
+``--max-error-rate`` makes the command exit non-zero, for CI.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import math
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote, urlencode, urlsplit
+
+import chess
+
+KINDS = ('page', 'submit', 'api', 'api_post', 'stream')
+DEFAULT_MIX = 'api=6,page=2,submit=1,api_post=1'
+
+
+def parse_mix(spec):
+    """'api=6,page=2' -> [('api', 6.0), ('page', 2.0)]."""
+    mix = []
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        kind, _, weight = item.partition('=')
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f"unknown request kind {kind!r} (expected {', '.join(KINDS)})")
+        weight = float(weight or 1)
+        if weight > 0:
+            mix.append((kind, weight))
+    if not mix:
+        raise argparse.ArgumentTypeError('the request mix is empty')
+    return mix
+
+
+def random_positions(seed):
+    """Endless distinct FENs from seeded random playouts of 4-60 plies."""
+    rng = random.Random(seed)
+    seen = set()
+    while True:
+        board = chess.Board()
+        for _ in range(rng.randint(4, 60)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        fen = board.fen()
+        if fen not in seen:
+            seen.add(fen)
+            yield fen
+
+
+class Corpus:
+    """Hot positions (expected cache hits) and a stream of fresh ones (misses)."""
+
+    def __init__(self, fens=None, hot=20, seed=0):
+        if fens:
+            self.hot = fens[:hot]
+            self._cold = iter(fens[hot:])
+        else:
+            generated = random_positions(seed)
+            self.hot = [next(generated) for _ in range(hot)]
+            self._cold = generated
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def cold(self, rng):
+        with self._lock:
+            fen = next(self._cold, None)
+        if fen is None:
+            # A finite --fens file ran out; fall back to (now cached) hot positions
+            self.exhausted += 1
+            return rng.choice(self.hot)
+        return fen
+
+
+class Client:
+    """One keep-alive connection; reconnects after errors."""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.https = parts.scheme == 'https'
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or (443 if self.https else 80)
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._conn = cls(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        """(status, body bytes) for one request; raises on network errors."""
+        conn = self._connection()
+        try:
+            conn.request(method, self.prefix + path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            data = response.read()
+        except Exception:
+            self.close()
+            raise
+        if response.getheader('Connection', '').lower() == 'close':
+            self.close()
+        return response.status, data
+
+
+def _request_for(kind, fen):
+    if kind == 'page':
+        return 'GET', '/analyze_chess_move?' + urlencode({'fen': fen}), None, {}
+    if kind == 'submit':
+        return ('POST', '/submit', urlencode({'fen': fen}).encode('ascii'),
+                {'Content-Type': 'application/x-www-form-urlencoded'})
+    if kind == 'api':
+        return 'GET', '/api/v1/analyze?fen=' + quote(fen), None, {}
+    if kind == 'api_post':
+        return ('POST', '/api/v1/analyze', json.dumps({'fen': fen}).encode('utf-8'),
+                {'Content-Type': 'application/json'})
+    return 'GET', '/api/v1/analyze/stream?fen=' + quote(fen), None, {'Accept': 'text/event-stream'}
+
+
+def _ok(kind, status, body):
+    if kind == 'submit':
+        return status in (302, 303)
+    if kind == 'stream':
+        return status == 200 and b'event: done' in body
+    return 200 <= status < 300
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {kind: [] for kind in KINDS}
+        self.errors = {kind: 0 for kind in KINDS}
+        self.statuses = {}
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def add(self, kind, seconds, status, ok, hit):
+        with self._lock:
+            self.samples[kind].append(seconds)
+            if not ok:
+                self.errors[kind] += 1
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            self.hits += hit
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, errors, elapsed):
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        'requests': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'throughput': round(count / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': ms(sum(ordered) / count) if count else None,
+        'p50_ms': ms(percentile(ordered, 0.50)),
+        'p95_ms': ms(percentile(ordered, 0.95)),
+        'p99_ms': ms(percentile(ordered, 0.99)),
+        'max_ms': ms(ordered[-1]) if ordered else None,
+    }
+
+
+def run(url, mix, corpus, concurrency=8, duration=30.0, requests=None, hit_ratio=0.8, seed=0,
+        timeout=60.0, prime=True):
+    """Drive url until duration passes (or requests have been sent); returns the results dict."""
+    if prime:
+        client = Client(url, timeout)
+        for fen in corpus.hot:
+            try:
+                client.request(*_request_for('api', fen))
+            except Exception:
+                pass
+        client.close()
+
+    kinds = [kind for kind, _ in mix]
+    weights = [weight for _, weight in mix]
+    recorder = Recorder()
+    remaining = [requests]
+    remaining_lock = threading.Lock()
+    deadline = time.perf_counter() + duration if requests is None else None
+
+    def take():
+        if deadline is not None:
+            return time.perf_counter() < deadline
+        with remaining_lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(index):
+        rng = random.Random(f"{seed}:{index}")
+        client = Client(url, timeout)
+        try:
+            while take():
+                kind = rng.choices(kinds, weights)[0]
+                hit = rng.random() < hit_ratio
+                fen = rng.choice(corpus.hot) if hit else corpus.cold(rng)
+                method, path, body, headers = _request_for(kind, fen)
+                started = time.perf_counter()
+                try:
+                    status, data = client.request(method, path, body, headers)
+                    ok = _ok(kind, status, data)
+                except Exception as e:
+                    status, ok = type(e).__name__, False
+                recorder.add(kind, time.perf_counter() - started, status, ok, hit)
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"loadtest-{i}", daemon=True)
+               for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_samples = [s for kind in KINDS for s in recorder.samples[kind]]
+    overall = summarize(all_samples, sum(recorder.errors.values()), elapsed)
+    overall['statuses'] = recorder.statuses
+    overall['hit_ratio'] = round(recorder.hits / len(all_samples), 4) if all_samples else 0.0
+    overall['cold_exhausted'] = corpus.exhausted
+    return {
+        'elapsed': round(elapsed, 3),
+        'overall': overall,
+        'by_kind': {kind: summarize(recorder.samples[kind], recorder.errors[kind], elapsed)
+                    for kind in KINDS if recorder.samples[kind]},
+    }
+
+
+def format_report(results):
+    columns = ('requests', 'throughput', 'error_rate', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+    lines = [f"{'kind':<10}" + ''.join(f"{name:>12}" for name in columns)]
+    rows = list(results['by_kind'].items()) + [('overall', results['overall'])]
+    for kind, stats in rows:
+        lines.append(f"{kind:<10}" + ''.join(f"{_cell(stats.get(name)):>12}" for name in columns))
+    overall = results['overall']
+    lines.append(f"{results['elapsed']}s, hit ratio {overall['hit_ratio']}, statuses {overall['statuses']}")
+    if overall['cold_exhausted']:
+        lines.append(f"warning: the FEN file ran out of fresh positions {overall['cold_exhausted']} times")
+    return '\n'.join(lines)
+
+
+def _cell(value):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:.4g}" if value < 1 else f"{value:.1f}"
+    return str(value)
+
+
+def compare(baseline, results):
+    """Table of the change in throughput, latency and errors against a saved run."""
+    metrics = ('throughput', 'p50_ms', 'p95_ms', 'p99_ms', 'error_rate')
+    lines = [f"{'kind':<10}{'metric':<12}{'baseline':>12}{'this run':>12}{'change':>10}"]
+    rows = [('overall', baseline['results']['overall'], results['overall'])]
+    for kind, stats in results['by_kind'].items():
+        if kind in baseline['results']['by_kind']:
+            rows.append((kind, baseline['results']['by_kind'][kind], stats))
+    for kind, old, new in rows:
+        for metric in metrics:
+            before, after = old.get(metric), new.get(metric)
+            if before is None or after is None:
+                continue
+            change = f"{(after - before) / before * 100:+.1f}%" if before else '-'
+            lines.append(f"{kind:<10}{metric:<12}{_cell(before):>12}{_cell(after):>12}{change:>10}")
+    return '\n'.join(lines)
+
+
+def _server_info(url, timeout=5.0):
+    client = Client(url, timeout)
+    try:
+        status, body = client.request('GET', '/__ac_health?verbose=1')
+        return json.loads(body) if status == 200 else {'status': status}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+    finally:
+        client.close()
+
+
+class SpawnedServer:
+    """`python app.py <mode>` on a free local port, for the duration of a with block."""
+
+    def __init__(self, mode, online=False, wait=60.0):
+        self.mode = mode
+        self.online = online
+        self.wait = wait
+        self.process = None
+        self.url = None
+
+    def __enter__(self):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        if not self.online:
+            env.setdefault('ANALYZE_CHESS_OFFLINE', '1')
+        env.setdefault('ANALYZE_CHESS_TIMING_SAMPLE', '0')
+        restore_sigint = None
+        if os.name == 'posix':
+            # Background shells start children with SIGINT ignored; the app
+            # needs it to shut its engines down cleanly
+            restore_sigint = lambda: signal.signal(signal.SIGINT, signal.SIG_DFL)
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(root, 'app.py'), self.mode, '--host', '127.0.0.1', '--port', str(port)],
+            cwd=root, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, preexec_fn=restore_sigint)
+        self.url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + self.wait
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"'{self.mode}' server exited with status {self.process.returncode}")
+            if 'status' in _server_info(self.url, timeout=1.0):
+                return self
+            time.sleep(0.05)
+        self.__exit__(None, None, None)
+        raise TimeoutError(f"'{self.mode}' server not healthy after {self.wait}s")
+
+    def __exit__(self, *exc):
+        if self.process.poll() is None:
+            if os.name == 'posix':
+                self.process.send_signal(signal.SIGINT)
+            else:
+                self.process.terminate()
+            try:
+                self.process.wait(15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+def add_arguments(parser):
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='deployment to test')
+    parser.add_argument('--spawn', choices=['serve', 'prefork', 'asgi'],
+                        help='start the app in this mode on a free port instead of using --url')
+    parser.add_argument('--online', action='store_true', help='let a spawned app make its update checks')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients (default: 8)')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to run (default: 30)')
+    parser.add_argument('--requests', type=int, help='stop after this many requests instead')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"request kinds and weights (default: {DEFAULT_MIX})")
+    parser.add_argument('--fens', help='file with one FEN per line (default: seeded random positions)')
+    parser.add_argument('--hot', type=int, default=20, help='positions reused for cache hits (default: 20)')
+    parser.add_argument('--hit-ratio', type=float, default=0.8, help='share of requests for hot positions')
+    parser.add_argument('--no-prime', action='store_true', help="don't analyze the hot positions first")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60.0, help='per-request timeout in seconds')
+    parser.add_argument('--output', help='save the run as JSON')
+    parser.add_argument('--compare', help='JSON from an earlier --output to compare with')
+    parser.add_argument('--max-error-rate', type=float, help='exit with status 1 above this error rate')
+    return parser
+
+
+def run_from_args(args):
+    """Run the load test described by parsed add_arguments() options; returns an exit status."""
+    fens = None
+    if args.fens:
+        with open(args.fens, encoding='utf-8') as f:
+            fens = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    corpus = Corpus(fens, hot=args.hot, seed=args.seed)
+    config = {key: value for key, value in vars(args).items()
+              if key in ('url', 'spawn', 'concurrency', 'duration', 'requests', 'fens', 'hot',
+                         'hit_ratio', 'seed', 'timeout')}
+    config['mix'] = dict(args.mix)
+    config['no_prime'] = args.no_prime
+
+    def go(url):
+        print(f"Load testing {url}: {args.concurrency} clients, "
+              f"{f'{args.requests} requests' if args.requests else f'{args.duration}s'}, "
+              f"mix {config['mix']}, hit ratio {args.hit_ratio}")
+        results = run(url, args.mix, corpus, args.concurrency, args.duration, args.requests,
+                      args.hit_ratio, args.seed, args.timeout, prime=not args.no_prime)
+        return results, _server_info(url)
+
+    if args.spawn:
+        with SpawnedServer(args.spawn, online=args.online) as server:
+            config['url'] = server.url
+            results, server_info = go(server.url)
+    else:
+        results, server_info = go(args.url)
+
+    print(format_report(results))
+    record = {
+        'version': 1,
+        'started': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'config': config,
+        'server': server_info,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=2)
+        print(f"Saved to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(json.load(f), results))
+    if args.max_error_rate is not None and results['overall']['error_rate'] > args.max_error_rate:
+        print(f"Error rate {results['overall']['error_rate']} is above {args.max_error_rate}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = add_arguments(argparse.ArgumentParser(description='Load test an Analyze Chess deployment.'))
+    return run_from_args(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
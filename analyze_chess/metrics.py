@@ -0,0 +1,405 @@
+"""Counters, gauges and histograms in the Prometheus text format.
+
+A small dependency-free stand-in for prometheus_client. Metrics are
+created on a ``Registry`` (``REGISTRY`` is the process-wide default) and
+``Registry.render()`` produces the exposition text served at /metrics::
+
+    REQUESTS = REGISTRY.counter('app_requests_total', 'Requests.', ['route'])
+    REQUESTS.labels('/').inc()
+
+Recording is a dict lookup, a lock and an add (plus a bisect for
+histograms); all formatting happens at scrape time. ``Registry.callback``
+registers a function that is read at scrape time instead, for values that
+already live elsewhere (pool sizes, lru_cache statistics).
+
+Each process has its own registry. In pre-fork mode the workers and the
+engine broker share theirs through a directory (``Registry.share``, set up
+from ANALYZE_CHESS_METRICS_DIR): every process writes its samples to
+``<pid>.json`` there once a second and when it is scraped, and ``render()``
+merges all the files. Counters and histograms are summed, and those of
+exited processes are folded into one ``retired.json``, so totals never go
+backwards when a worker is replaced; gauges are summed (or, with
+``aggregate='max'``, the largest value taken) over the processes still
+running. Callbacks registered with ``shared=False`` (values every process
+would report alike, read from the engine broker) are left out of the
+files and read only by the process answering the scrape.
+"""
+import bisect
+import json
+import math
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=''):
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class _HistogramChild:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric:
+    type = None
+    _child = None
+    # How the values of several processes combine: 'sum' or 'max'
+    aggregate = 'sum'
+    # False: not written to the shared directory, read only at scrape time
+    shared = True
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        return self._child()
+
+    def labels(self, *values):
+        """The child for these label values (in labelnames order)."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield '', key, '', child.value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type = 'counter'
+    _child = _CounterChild
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+    _child = _GaugeChild
+
+    def __init__(self, name, help, labelnames=(), aggregate='sum'):
+        super().__init__(name, help, labelnames)
+        self.aggregate = aggregate
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                yield '_bucket', key, f'le="{_format_value(bound)}"', cumulative
+            yield '_sum', key, '', total
+            yield '_count', key, '', cumulative
+
+
+class Callback(_Metric):
+    """A metric read from fn() at scrape time.
+
+    fn returns a number, or an iterable of (label values tuple, number).
+    """
+
+    def __init__(self, name, help, type, fn, labelnames=(), aggregate='sum', shared=True):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.fn = fn
+        self.aggregate = aggregate
+        self.shared = shared
+
+    def samples(self):
+        result = self.fn()
+        if result is None:
+            return
+        if isinstance(result, (int, float)):
+            yield '', (), '', result
+            return
+        for key, value in result:
+            yield '', tuple(str(v) for v in key), '', value
+
+
+class _Merged(_Metric):
+    """One metric's samples combined from the snapshots of several processes."""
+
+    def __init__(self, data):
+        super().__init__(data['name'], data['help'], data['labelnames'])
+        self.type = data['type']
+        self.aggregate = data['aggregate']
+        self._values = {}
+
+    def add(self, samples):
+        for suffix, key, extra, value in samples:
+            series = (suffix, tuple(key), extra)
+            if series in self._values and self.aggregate == 'max':
+                self._values[series] = max(self._values[series], value)
+            else:
+                self._values[series] = self._values.get(series, 0) + value
+
+    def samples(self):
+        for (suffix, key, extra), value in self._values.items():
+            yield suffix, key, extra, value
+
+    def to_data(self):
+        return {'name': self.name, 'help': self.help, 'type': self.type, 'labelnames': list(self.labelnames),
+                'aggregate': self.aggregate,
+                'samples': [[suffix, list(key), extra, value] for suffix, key, extra, value in self.samples()]}
+
+
+RETIRED = 'retired.json'
+
+
+def _read_snapshot(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._directory = None
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=(), aggregate='sum'):
+        return self._register(Gauge(name, help, labelnames, aggregate))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, fn, type='gauge', labelnames=(), aggregate='sum', shared=True):
+        return self._register(Callback(name, help, type, fn, labelnames, aggregate, shared))
+
+    def snapshot(self):
+        """This process's shared samples as JSON-serialisable data."""
+        metrics = []
+        for metric in list(self._metrics.values()):
+            if not metric.shared:
+                continue
+            try:
+                samples = [[suffix, list(key), extra, value] for suffix, key, extra, value in metric.samples()]
+            except Exception:
+                continue
+            metrics.append({'name': metric.name, 'help': metric.help, 'type': metric.type,
+                            'labelnames': list(metric.labelnames), 'aggregate': metric.aggregate,
+                            'samples': samples})
+        return {'pid': os.getpid(), 'metrics': metrics}
+
+    def share(self, directory, interval=1.0):
+        """Publish this process's samples in directory and render the merge of all of them."""
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._write_snapshot()
+        threading.Thread(target=self._share_loop, args=(interval,), name='metrics-share', daemon=True).start()
+
+    def _write_snapshot(self):
+        _write_json(os.path.join(self._directory, f"{os.getpid()}.json"), self.snapshot())
+
+    def _retire_exited(self):
+        """Fold the counters and histograms of exited processes into RETIRED and drop their files."""
+        exited = [entry for entry in os.listdir(self._directory)
+                  if entry.endswith('.json') and entry[:-5].isdigit() and not _alive(int(entry[:-5]))]
+        if not exited:
+            return
+        import fcntl
+        with open(os.path.join(self._directory, 'retire.lock'), 'a') as lock:
+            # Several workers may scrape at once; each file must be folded in once
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            retired_path = os.path.join(self._directory, RETIRED)
+            folded, snapshots = [], []
+            for entry in exited:
+                try:
+                    snapshots.append(_read_snapshot(os.path.join(self._directory, entry)))
+                except FileNotFoundError:
+                    # Retired by another process while this one waited for the lock
+                    continue
+                except ValueError:
+                    pass
+                folded.append(entry)
+            if not folded:
+                return
+            try:
+                snapshots.insert(0, _read_snapshot(retired_path))
+            except FileNotFoundError:
+                pass
+            metrics = {}
+            for snapshot in snapshots:
+                for data in snapshot['metrics']:
+                    if data['type'] in ('counter', 'histogram'):
+                        metric = metrics.get(data['name'])
+                        if metric is None:
+                            metric = metrics[data['name']] = _Merged(data)
+                        metric.add(data['samples'])
+            _write_json(retired_path, {'pid': None, 'metrics': [metric.to_data() for metric in metrics.values()]})
+            for entry in folded:
+                os.unlink(os.path.join(self._directory, entry))
+
+    def _share_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self._write_snapshot()
+            except OSError:
+                # The directory goes away when the server shuts down
+                pass
+
+    def _merged(self):
+        """Every sharing process's metrics combined per series, plus this process's unshared ones."""
+        self._write_snapshot()
+        self._retire_exited()
+        merged = {}
+        for entry in sorted(os.listdir(self._directory)):
+            if not entry.endswith('.json'):
+                continue
+            try:
+                snapshot = _read_snapshot(os.path.join(self._directory, entry))
+            except (OSError, ValueError):
+                continue
+            live = snapshot['pid'] is not None and _alive(snapshot['pid'])
+            for data in snapshot['metrics']:
+                if not live and data['type'] not in ('counter', 'histogram'):
+                    # The gauges of an exited process no longer describe anything
+                    continue
+                metric = merged.get(data['name'])
+                if metric is None:
+                    metric = merged[data['name']] = _Merged(data)
+                metric.add(data['samples'])
+        # Read here, from this process only
+        local = [metric for metric in list(self._metrics.values()) if not metric.shared]
+        return list(merged.values()) + local
+
+    def render(self):
+        """The registry in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        metrics = self._merged() if self._directory else list(self._metrics.values())
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # A failing callback must not take the whole scrape down
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def share_from_environment(registry=REGISTRY):
+    """Share registry through ANALYZE_CHESS_METRICS_DIR when it is set (pre-fork mode)."""
+    directory = os.environ.get('ANALYZE_CHESS_METRICS_DIR')
+    if directory:
+        registry.share(directory)
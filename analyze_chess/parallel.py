@@ -0,0 +1,157 @@
+"""Root-splitting parallel search for the fallback engine.
+
+Each iteration of the iterative deepening loop splits the root moves
+round-robin (in the previous iteration's order) across a process pool.
+Boards are shipped as FEN strings, moves as UCI, and every worker searches
+its share against the same wall-clock deadline using its own per-process
+transposition table, which stays warm between requests (and is aged once
+per search, as in the serial engine). The parent merges the per-move
+scores and sums the node counts.
+
+The pool is started with the ``forkserver`` method where there is one
+(``spawn`` elsewhere): it is created lazily from a threaded server, and
+forking a process with other threads running can copy held locks.
+"""
+import atexit
+import itertools
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+import chess
+
+from . import fallback
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_search_ids = itertools.count(1)
+# In a worker process: the search its transposition table was last aged for
+_worker_search = None
+
+
+def _shutdown(pool):
+    # cancel_futures is new in Python 3.9; on 3.8 queued chunks still run
+    if sys.version_info >= (3, 9):
+        pool.shutdown(wait=False, cancel_futures=True)
+    else:
+        pool.shutdown(wait=False)
+
+
+def get_pool(workers):
+    """Return the shared process pool, (re)creating it with workers processes."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _shutdown(_pool)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_context())
+            _pool_workers = workers
+        return _pool
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    if context.get_start_method() == 'forkserver':
+        # Workers fork from a server that has the search code imported already
+        context.set_forkserver_preload(['analyze_chess.fallback'])
+    return context
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _shutdown(_pool)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def _search_chunk(search_id, fen, ucis, depth, deadline):
+    """Worker entry point: score the given root moves of fen to depth.
+
+    search_id identifies the parent's search; the first chunk of a new one
+    starts a new transposition table generation in this worker.
+    Returns (scores by UCI, nodes searched, whether every move finished).
+    """
+    global _worker_search
+    board = chess.Board(fen)
+    moves = [chess.Move.from_uci(uci) for uci in ucis]
+    search = fallback.FallbackSearch(max_depth=depth, time_limit=max(deadline - time.time(), 0.001))
+    if search_id != _worker_search:
+        search.tt.new_search()
+        _worker_search = search_id
+    scores = {}
+    finished = True
+    try:
+        search.score_root_moves(board, moves, depth, scores)
+    except fallback.SearchStopped:
+        finished = False
+    return {move.uci(): score for move, score in scores.items()}, search.nodes, finished
+
+
+class ParallelRootSearch:
+    """Iterative deepening with the root moves of each iteration split across processes."""
+
+    def __init__(self, workers, max_depth=None, time_limit=None):
+        self.workers = workers
+        self.serial = fallback.FallbackSearch(max_depth=max_depth, time_limit=time_limit)
+        self.nodes = 0
+
+    def search_board(self, board):
+        start = time.monotonic()
+        deadline = time.time() + self.serial.time_limit if self.serial.time_limit else float('inf')
+        self.serial.tt.new_search()
+        moves = self.serial.order_root_moves(board.copy())
+        if not moves:
+            return fallback.SearchResult(None, 0, 0, 0, 0.0)
+
+        pool = get_pool(self.workers)
+        search_id = next(_search_ids)
+        fen = board.fen()
+        best_move, best_score, completed = moves[0], -fallback.INFINITY, 0
+        self.nodes = 0
+        for depth in range(1, self.serial.max_depth + 1):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            chunks = [moves[i::self.workers] for i in range(self.workers)]
+            futures = [
+                pool.submit(_search_chunk, search_id, fen, [move.uci() for move in chunk], depth, deadline)
+                for chunk in chunks if chunk
+            ]
+            scores = {}
+            finished = True
+            for future in futures:
+                try:
+                    chunk_scores, nodes, chunk_finished = future.result(
+                        timeout=None if remaining == float('inf') else max(deadline - time.time(), 0) + 1.0)
+                except FutureTimeout:
+                    finished = False
+                    continue
+                self.nodes += nodes
+                finished = finished and chunk_finished
+                scores.update(chunk_scores)
+            if not finished:
+                break
+            moves.sort(key=lambda m: scores[m.uci()], reverse=True)
+            best_move, best_score, completed = moves[0], scores[moves[0].uci()], depth
+            if abs(best_score) > fallback.MATE_THRESHOLD:
+                break
+        return fallback.SearchResult(best_move, best_score, completed, self.nodes, time.monotonic() - start)
+
+    def search(self, board):
+        """Search board in parallel, falling back to one process if the pool fails."""
+        try:
+            return self.search_board(board)
+        except (OSError, RuntimeError) as e:
+            # BrokenProcessPool is a RuntimeError; platforms without working
+            # multiprocessing raise OSError when spawning.
+            print(f"Parallel fallback search unavailable, searching in-process: {e}")
+            shutdown_pool()
+            return self.serial.search(board)
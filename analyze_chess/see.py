@@ -0,0 +1,88 @@
+"""Static exchange evaluation (SEE) over python-chess bitboards."""
+import chess
+
+# Exchange values in centipawns. The king is priced so that it is only ever
+# used as the last attacker in an exchange.
+SEE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 300,
+    chess.BISHOP: 300,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 20000,
+}
+
+
+def attackers(board, square, occupied):
+    """Bitboard of pieces of both colors attacking square given occupancy.
+
+    Sliding attacks are computed against ``occupied`` rather than the board's
+    real occupancy, so removing a piece from ``occupied`` reveals any x-ray
+    attacker standing behind it.
+    """
+    queens_and_rooks = board.queens | board.rooks
+    queens_and_bishops = board.queens | board.bishops
+    return occupied & (
+        (chess.BB_KING_ATTACKS[square] & board.kings)
+        | (chess.BB_KNIGHT_ATTACKS[square] & board.knights)
+        | (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] & queens_and_rooks)
+        | (chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied] & queens_and_rooks)
+        | (chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied] & queens_and_bishops)
+        | (chess.BB_PAWN_ATTACKS[chess.BLACK][square] & board.pawns & board.occupied_co[chess.WHITE])
+        | (chess.BB_PAWN_ATTACKS[chess.WHITE][square] & board.pawns & board.occupied_co[chess.BLACK])
+    )
+
+
+def _least_valuable(board, candidates, color):
+    for piece_type in chess.PIECE_TYPES:
+        bb = candidates & board.pieces_mask(piece_type, color)
+        if bb:
+            return piece_type, bb & -bb
+    return None, 0
+
+
+def see(board, move, values=SEE_VALUES):
+    """Material balance of the exchange started by move, from the mover's side.
+
+    Works for quiet moves too: a non-capture onto a square the opponent can
+    win returns a negative value. Pins and checks are ignored, as usual for
+    SEE.
+    """
+    to_square = move.to_square
+    from_bb = chess.BB_SQUARES[move.from_square]
+    occupied = board.occupied ^ from_bb
+
+    if board.is_en_passant(move):
+        captured_value = values[chess.PAWN]
+        occupied ^= chess.BB_SQUARES[board.ep_square - 8 if board.turn == chess.WHITE else board.ep_square + 8]
+    else:
+        captured_type = board.piece_type_at(to_square)
+        captured_value = values[captured_type] if captured_type else 0
+
+    moving_type = board.piece_type_at(move.from_square)
+    if moving_type is None:
+        return 0
+    on_square = values[moving_type]
+    gain = [captured_value]
+    if move.promotion:
+        gain[0] += values[move.promotion] - values[chess.PAWN]
+        on_square = values[move.promotion]
+
+    color = not board.turn
+    while True:
+        attacking = attackers(board, to_square, occupied)
+        piece_type, bb = _least_valuable(board, attacking & board.occupied_co[color], color)
+        if not bb:
+            break
+        if piece_type == chess.KING and attacking & board.occupied_co[not color]:
+            # The king may not capture into a defended square
+            break
+        gain.append(on_square - gain[-1])
+        on_square = values[piece_type]
+        occupied ^= bb
+        color = not color
+
+    while len(gain) > 1:
+        last = gain.pop()
+        gain[-1] = -max(-gain[-1], last)
+    return gain[0]
@@ -0,0 +1,116 @@
+"""Cold-start measurements: milestones, import-time breakdown, time to healthy.
+
+app.py calls ``mark()`` as it reaches each startup milestone (modules
+imported, engine prepared, server listening, first request served). Times
+are seconds since the process was started, read from /proc on Linux (so
+interpreter start-up and site imports count) and since this module was
+imported elsewhere. ``timeline()`` feeds the verbose health output.
+
+``python app.py profile-startup`` runs two outside-in measurements in fresh
+processes: ``import_profile`` (``python -X importtime``, grouped by
+top-level package) and ``time_to_healthy`` (start the server and poll the
+health URL until it answers).
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+
+_IMPORTED_AT = time.monotonic()
+
+
+def _process_age():
+    """Seconds since this process was started, from /proc when available."""
+    try:
+        with open('/proc/self/stat') as f:
+            # Field 22 (starttime, in clock ticks since boot) follows the ')' closing the command name
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+_AGE_AT_IMPORT = _process_age() or 0.0
+_marks = {}
+
+
+def elapsed():
+    """Seconds since process start (or since this module was imported)."""
+    return _AGE_AT_IMPORT + (time.monotonic() - _IMPORTED_AT)
+
+
+def mark(name):
+    """Record milestone name at the current time; the first call for a name wins."""
+    if name not in _marks:
+        _marks[name] = round(elapsed(), 4)
+    return _marks[name]
+
+
+def timeline():
+    data = dict(_marks)
+    data['uptime'] = round(elapsed(), 3)
+    return data
+
+
+_IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_profile(module='app', top=15, cwd=None):
+    """Import module in a fresh interpreter under -X importtime.
+
+    Returns (total_seconds, rows) where rows are (package, seconds) for the
+    top-level packages with the largest self time summed over their
+    submodules, largest first.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=cwd, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import failed')
+    by_package = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        package = name.split('.')[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+        if len(indent) == 1 and name == module:
+            total = cumulative_us
+    rows = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return total / 1e6, [(package, us / 1e6) for package, us in rows]
+
+
+def time_to_healthy(cmd, url, timeout=60.0, cwd=None, env=None):
+    """Start cmd and poll url until it answers 200.
+
+    Returns (seconds from spawn, response body). The server is terminated
+    afterwards. Raises TimeoutError if it never becomes healthy and
+    RuntimeError if it exits first.
+    """
+    from urllib.error import URLError
+    from urllib.request import urlopen
+    started = time.monotonic()
+    process = subprocess.Popen(cmd, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.monotonic() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with status {process.returncode}")
+            try:
+                with urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.monotonic() - started, response.read()
+            except (URLError, OSError):
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"{url} not healthy after {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
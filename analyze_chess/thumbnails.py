@@ -0,0 +1,199 @@
+"""PNG board thumbnails rendered with Pillow.
+
+Piece glyphs are drawn once per tile size into a sprite atlas, and an empty
+board background is cached per board size; rendering a position is then a
+copy of the background plus one alpha paste per piece. Bulk rendering of
+FEN lists runs across a process pool::
+
+    python -m analyze_chess.thumbnails fens.txt out_dir [--size 400] [--workers 4]
+
+Pillow is optional; ``available()`` reports whether PNG rendering works.
+"""
+import argparse
+import functools
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # pragma: no cover - optional dependency
+    Image = ImageDraw = ImageFont = None
+
+LIGHT = (255, 206, 158)
+DARK = (209, 139, 71)
+HIGHLIGHT = (205, 210, 106, 170)
+
+# Solid glyphs are used for both colors; the fill and outline tell them apart
+GLYPHS = {
+    chess.PAWN: '\u265f', chess.KNIGHT: '\u265e', chess.BISHOP: '\u265d',
+    chess.ROOK: '\u265c', chess.QUEEN: '\u265b', chess.KING: '\u265a',
+}
+
+FONT_CANDIDATES = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans.ttf',
+    'C:\\Windows\\Fonts\\seguisym.ttf',
+    '/Library/Fonts/Arial Unicode.ttf',
+    '/System/Library/Fonts/Supplemental/Arial Unicode.ttf',
+    'DejaVuSans.ttf',
+]
+
+
+def available():
+    return Image is not None
+
+
+def _load_font(size):
+    """A font with the chess glyphs, or (font, False) when only letters can be drawn."""
+    candidates = [os.environ.get('ANALYZE_CHESS_PIECE_FONT')] + FONT_CANDIDATES
+    for path in candidates:
+        if not path:
+            continue
+        try:
+            return ImageFont.truetype(path, size), True
+        except OSError:
+            continue
+    return ImageFont.load_default(), False
+
+
+@functools.lru_cache(maxsize=8)
+def sprite_atlas(tile):
+    """RGBA atlas of the 12 pieces: row 0 white, row 1 black, columns pawn..king."""
+    atlas = Image.new('RGBA', (tile * 6, tile * 2), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(atlas)
+    font, has_glyphs = _load_font(int(tile * 0.85))
+    stroke = max(1, tile // 24)
+    for row, color in enumerate((chess.WHITE, chess.BLACK)):
+        fill = (255, 255, 255, 255) if color == chess.WHITE else (0, 0, 0, 255)
+        outline = (0, 0, 0, 255) if color == chess.WHITE else (255, 255, 255, 255)
+        for column, piece_type in enumerate(chess.PIECE_TYPES):
+            text = GLYPHS[piece_type] if has_glyphs else chess.piece_symbol(piece_type).upper()
+            center = (column * tile + tile // 2, row * tile + tile // 2)
+            draw.text(center, text, font=font, fill=fill, anchor='mm',
+                      stroke_width=stroke, stroke_fill=outline)
+    return atlas
+
+
+def _sprite(tile, piece):
+    row = 0 if piece.color == chess.WHITE else 1
+    column = piece.piece_type - 1
+    return sprite_atlas(tile).crop((column * tile, row * tile, (column + 1) * tile, (row + 1) * tile))
+
+
+@functools.lru_cache(maxsize=8)
+def _sprites(tile):
+    return {(color, piece_type): _sprite(tile, chess.Piece(piece_type, color))
+            for color in chess.COLORS for piece_type in chess.PIECE_TYPES}
+
+
+@functools.lru_cache(maxsize=8)
+def background(size):
+    """Empty board of size x size pixels (size is rounded down to a multiple of 8)."""
+    tile = size // 8
+    image = Image.new('RGB', (tile * 8, tile * 8), LIGHT)
+    draw = ImageDraw.Draw(image)
+    for rank in range(8):
+        for file in range(8):
+            if (file + rank) % 2 == 0:
+                # a1 is a dark square; rows are drawn from rank 8 down
+                x, y = file * tile, (7 - rank) * tile
+                draw.rectangle((x, y, x + tile - 1, y + tile - 1), fill=DARK)
+    return image
+
+
+def _square_origin(square, tile, flip_board):
+    file, rank = chess.square_file(square), chess.square_rank(square)
+    if flip_board:
+        return (7 - file) * tile, rank * tile
+    return file * tile, (7 - rank) * tile
+
+
+def render_board(board, size=400, highlight_move=None, flip_board=False):
+    """Render a chess.BaseBoard (or Board) to a Pillow image."""
+    tile = size // 8
+    image = background(size).copy()
+    if highlight_move:
+        overlay = Image.new('RGBA', (tile, tile), HIGHLIGHT)
+        for square in (highlight_move.from_square, highlight_move.to_square):
+            image.paste(overlay, _square_origin(square, tile, flip_board), overlay)
+    sprites = _sprites(tile)
+    for square, piece in board.piece_map().items():
+        sprite = sprites[(piece.color, piece.piece_type)]
+        image.paste(sprite, _square_origin(square, tile, flip_board), sprite)
+    return image
+
+
+def render_png(board, size=400, highlight_move=None, flip_board=False):
+    """PNG bytes for board."""
+    buffer = io.BytesIO()
+    render_board(board, size, highlight_move, flip_board).save(buffer, format='PNG', optimize=False)
+    return buffer.getvalue()
+
+
+def _parse_line(line):
+    """FEN line, optionally followed by ';' and a UCI move to highlight."""
+    fen, _, move = line.partition(';')
+    board = chess.Board(fen.strip()) if len(fen.split()) > 1 else chess.BaseBoard(fen.strip())
+    move = chess.Move.from_uci(move.strip()) if move.strip() else None
+    return board, move
+
+
+def _render_file(args):
+    index, line, out_dir, size = args
+    try:
+        board, move = _parse_line(line)
+    except ValueError as e:
+        return index, None, str(e)
+    flip_board = isinstance(board, chess.Board) and board.turn == chess.BLACK
+    path = os.path.join(out_dir, f"board_{index:06d}.png")
+    with open(path, 'wb') as f:
+        f.write(render_png(board, size, move, flip_board))
+    return index, path, None
+
+
+def render_many(lines, out_dir, size=400, workers=None, chunksize=64):
+    """Render each FEN line to out_dir/board_NNNNNN.png across a process pool.
+
+    Returns a list of (index, path or None, error or None).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(i, line, out_dir, size) for i, line in enumerate(lines) if line.strip()]
+    if workers == 1:
+        return [_render_file(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_file, jobs, chunksize=chunksize))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render FEN positions to PNG images.')
+    parser.add_argument('fens', help="file with one FEN per line (optionally 'FEN; move'), or - for stdin")
+    parser.add_argument('out_dir')
+    parser.add_argument('--size', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if not available():
+        print('Pillow is not installed; cannot render PNG boards.')
+        return 1
+    if args.fens == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(args.fens, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    started = time.monotonic()
+    results = render_many(lines, args.out_dir, args.size, args.workers)
+    errors = [(i, error) for i, _, error in results if error]
+    for i, error in errors:
+        print(f"line {i + 1}: {error}")
+    elapsed = time.monotonic() - started
+    print(f"Rendered {len(results) - len(errors)} boards in {elapsed:.1f}s")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Per-request stage timings, reported as Server-Timing and JSON log lines.
+
+The app starts a ``RequestTimer`` for every request; code on the request's
+thread wraps its expensive steps in ``stage(name)``, and work handed to
+other threads is wrapped with ``wrap(name, fn)`` so it still reports to
+the request that started it. Outside a request both are no-ops.
+
+When the response is ready the stage totals go out as a ``Server-Timing``
+header (browser dev tools show them next to the request) unless
+ANALYZE_CHESS_SERVER_TIMING=0, and as one JSON line on stdout for a
+sample of requests: every request slower than ANALYZE_CHESS_SLOW_MS
+(default 1000) plus a random ANALYZE_CHESS_TIMING_SAMPLE fraction of the
+rest (default 0.01; 1 logs everything, 0 only slow requests).
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import random
+import time
+
+SERVER_TIMING = os.environ.get('ANALYZE_CHESS_SERVER_TIMING', '1').lower() not in ('0', 'false', 'no')
+SAMPLE_RATE = float(os.environ.get('ANALYZE_CHESS_TIMING_SAMPLE', 0.01))
+SLOW_SECONDS = float(os.environ.get('ANALYZE_CHESS_SLOW_MS', 1000)) / 1000
+
+_current = contextvars.ContextVar('analyze_chess_request_timer', default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        # (name, seconds) pairs; list.append is safe from the helper threads
+        self.stages = []
+        self.fields = {}
+
+    def add(self, name, seconds):
+        self.stages.append((name, seconds))
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def totals(self):
+        """{stage: (seconds, count)} in the order the stages first ran."""
+        totals = {}
+        for name, seconds in list(self.stages):
+            total, count = totals.get(name, (0.0, 0))
+            totals[name] = (total + seconds, count + 1)
+        return totals
+
+    def server_timing(self, total):
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, (seconds, _) in self.totals().items()]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ', '.join(parts)
+
+    def should_log(self, total):
+        return total >= SLOW_SECONDS or (SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE)
+
+    def record(self, total, **fields):
+        record = {'ts': round(time.time(), 3), 'event': 'request_timing'}
+        record.update(fields)
+        record.update(self.fields)
+        record['total_ms'] = round(total * 1000, 1)
+        record['stages'] = {name: {'ms': round(seconds * 1000, 1), 'count': count}
+                            for name, (seconds, count) in self.totals().items()}
+        return record
+
+
+def start():
+    """Start timing the current request; returns (timer, token for finish)."""
+    timer = RequestTimer()
+    return timer, _current.set(timer)
+
+
+def finish(token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Torn down from a different context (e.g. a streamed response); just clear it
+        _current.set(None)
+
+
+def current():
+    return _current.get()
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time the with block as stage name of the current request, if any."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def wrap(name, fn):
+    """fn, timed as stage name of the request that called wrap() (for thread pools)."""
+    timer = _current.get()
+    if timer is None:
+        return fn
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        with timer.stage(name):
+            return fn(*args, **kwargs)
+    return timed
+
+
+def annotate(key, value):
+    """Attach key=value to the current request's log line."""
+    timer = _current.get()
+    if timer is not None:
+        timer.fields[key] = value
+
+
+def emit(record):
+    print(json.dumps(record, separators=(',', ':')), flush=True)
@@ -0,0 +1,163 @@
+from array import array
+
+import chess
+
+# Bound types stored alongside a transposition table score
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+_SCORE_OFFSET = 1 << 31
+_MASK64 = (1 << 64) - 1
+
+
+def _table_size(size_mb, entry_bytes):
+    """Largest power-of-two entry count that fits in size_mb megabytes."""
+    entries = max(1, int(size_mb * 1024 * 1024) // entry_bytes)
+    return 1 << (entries.bit_length() - 1)
+
+
+def encode_move(move):
+    """Pack a chess.Move into 16 bits (0 means 'no move')."""
+    if move is None:
+        return 0
+    return 0x8000 | ((move.promotion or 0) << 12) | (move.from_square << 6) | move.to_square
+
+
+def decode_move(code):
+    if not code:
+        return None
+    promotion = (code >> 12) & 0x7
+    return chess.Move((code >> 6) & 0x3F, code & 0x3F, promotion or None)
+
+
+class TranspositionTable:
+    """Fixed-size transposition table keyed by 64-bit Zobrist hashes.
+
+    Entries live in two flat ``array('Q')`` buffers (16 bytes per slot), so
+    the memory footprint is fixed up front by ``size_mb``. Each slot packs
+    score, depth, bound type, search generation and best move into a single
+    word, and the key is stored XOR-ed with that word so a slot torn by two
+    threads writing at once simply fails verification instead of returning
+    garbage.
+
+    Replacement is depth-preferred: a slot holding a different position is
+    only overwritten by an equal or deeper search, unless the stored entry is
+    left over from an older search generation.
+    """
+
+    ENTRY_BYTES = 16
+
+    def __init__(self, size_mb=16):
+        self.size = _table_size(size_mb, self.ENTRY_BYTES)
+        self.mask = self.size - 1
+        self._keys = array('Q', [0]) * self.size
+        self._data = array('Q', [0]) * self.size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def new_search(self):
+        """Age existing entries so they can be replaced regardless of depth."""
+        self.generation = (self.generation + 1) & 0x3F
+
+    def clear(self):
+        self._keys = array('Q', [0]) * self.size
+        self._data = array('Q', [0]) * self.size
+        self.probes = self.hits = self.stores = self.replacements = 0
+
+    def probe(self, key):
+        """Return (depth, score, bound, move) for key, or None on a miss."""
+        self.probes += 1
+        index = key & self.mask
+        data = self._data[index]
+        if not data or self._keys[index] ^ data != key:
+            return None
+        self.hits += 1
+        score = (data & 0xFFFFFFFF) - _SCORE_OFFSET
+        depth = (data >> 32) & 0xFF
+        bound = (data >> 40) & 0x3
+        return depth, score, bound, decode_move((data >> 48) & 0xFFFF)
+
+    def peek(self, key):
+        """probe() without counting it, for reading the table outside the search."""
+        index = key & self.mask
+        data = self._data[index]
+        if not data or self._keys[index] ^ data != key:
+            return None
+        return ((data >> 32) & 0xFF, (data & 0xFFFFFFFF) - _SCORE_OFFSET,
+                (data >> 40) & 0x3, decode_move((data >> 48) & 0xFFFF))
+
+    def store(self, key, depth, score, bound, move=None):
+        index = key & self.mask
+        old = self._data[index]
+        if old and self._keys[index] ^ old != key:
+            old_depth = (old >> 32) & 0xFF
+            old_generation = (old >> 42) & 0x3F
+            if old_generation == self.generation and depth < old_depth:
+                return
+            self.replacements += 1
+        data = ((score + _SCORE_OFFSET) & 0xFFFFFFFF) \
+            | (min(max(depth, 0), 0xFF) << 32) \
+            | (bound << 40) \
+            | (self.generation << 42) \
+            | (encode_move(move) << 48)
+        self._data[index] = data
+        self._keys[index] = (key ^ data) & _MASK64
+        self.stores += 1
+
+    def stats(self):
+        return {
+            'entries': self.size,
+            'memory_mb': round(self.size * self.ENTRY_BYTES / (1024 * 1024), 2),
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.probes, 4) if self.probes else 0.0,
+            'stores': self.stores,
+            'replacements': self.replacements,
+        }
+
+
+class PawnHashTable:
+    """Fixed-size cache of pawn-structure scores keyed by a pawn-only hash."""
+
+    ENTRY_BYTES = 16
+
+    def __init__(self, size_mb=1):
+        self.size = _table_size(size_mb, self.ENTRY_BYTES)
+        self.mask = self.size - 1
+        self._keys = array('Q', [0]) * self.size
+        self._data = array('Q', [0]) * self.size
+        self.probes = 0
+        self.hits = 0
+
+    def get(self, key):
+        self.probes += 1
+        index = key & self.mask
+        data = self._data[index]
+        if not data or self._keys[index] ^ data != key:
+            return None
+        self.hits += 1
+        return data - _SCORE_OFFSET
+
+    def put(self, key, score):
+        index = key & self.mask
+        data = score + _SCORE_OFFSET
+        self._data[index] = data
+        self._keys[index] = (key ^ data) & _MASK64
+
+    def clear(self):
+        self._keys = array('Q', [0]) * self.size
+        self._data = array('Q', [0]) * self.size
+        self.probes = self.hits = 0
+
+    def stats(self):
+        return {
+            'entries': self.size,
+            'memory_mb': round(self.size * self.ENTRY_BYTES / (1024 * 1024), 2),
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.probes, 4) if self.probes else 0.0,
+        }
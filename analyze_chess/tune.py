@@ -0,0 +1,300 @@
+"""Texel-style tuning of the fallback engine's evaluation weights.
+
+Usage::
+
+    python -m analyze_chess.tune positions.epd [--pgn games.pgn ...] [--out weights.json]
+
+Training positions come from EPD lines labelled with the game result
+(``c9 "1-0";``, ``[0.5]`` or a trailing ``1/2-1/2``) and/or from PGN games,
+where every quiet position after the opening is labelled with the game
+result. Positions are stored as packed bitboards (96 bytes each) and
+unpacked into the batch evaluator's (N, 12, 64) planes one chunk at a time,
+so a million positions fit comfortably in memory.
+
+The evaluation being tuned is ``fallback.evaluate``, which is linear in its
+weights (piece values, piece-square tables and the doubled, isolated and
+passed pawn terms), so the loss
+``mean((result - sigmoid(K * eval))**2)`` and its gradient are computed with
+a couple of matrix products per chunk. K is fitted first with the starting
+weights, then the weights are optimised with mini-batch Adam. A piece value
+and the mean of its piece-square table are interchangeable, so the table
+means are held at their starting values (``pin_pst_means``).
+
+The result is written as JSON and picked up by ``analyze_chess.fallback`` at
+startup (ANALYZE_CHESS_WEIGHTS, defaulting to fallback_weights.json next to
+the package). The root move bonuses (check, center, hanging, mate) and the
+batch evaluator's mobility and blocked-pawn weights are not part of
+``evaluate`` and are not fitted; they are copied into the file unchanged so
+they can be edited by hand.
+"""
+import argparse
+import json
+import re
+import sys
+import time
+
+import chess
+import chess.pgn
+import numpy as np
+
+from . import batch_eval, fallback
+
+RESULTS = {'1-0': 1.0, '0-1': 0.0, '1/2-1/2': 0.5}
+_RESULT_PATTERN = re.compile(r'(1-0|0-1|1/2-1/2)|\[(0(?:\.0)?|0\.5|1(?:\.0)?)\]')
+
+MIRROR = np.array([chess.square_mirror(square) for square in chess.SQUARES])
+N_PIECES = len(chess.PIECE_TYPES)
+PAWN_TERMS = ('doubled_pawn', 'isolated_pawn', 'passed_pawn')
+N_PARAMS = N_PIECES + N_PIECES * 64 + len(PAWN_TERMS)
+
+
+def parse_epd_line(line):
+    """Return (board, result) for a labelled EPD/FEN line, or None."""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    match = _RESULT_PATTERN.search(line)
+    if not match:
+        return None
+    result = RESULTS[match.group(1)] if match.group(1) else float(match.group(2))
+    fields = line.split()
+    try:
+        board = chess.Board(' '.join(fields[:4]) + ' 0 1')
+    except ValueError:
+        return None
+    return board, result
+
+
+def iter_epd(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            parsed = parse_epd_line(line)
+            if parsed:
+                yield parsed
+
+
+def iter_pgn(path, skip_plies=8):
+    """Quiet positions from every finished game in a PGN file."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+            result = RESULTS.get(game.headers.get('Result', '*'))
+            if result is None:
+                continue
+            board = game.board()
+            for ply, move in enumerate(game.mainline_moves()):
+                capture = board.is_capture(move)
+                board.push(move)
+                if ply + 1 >= skip_plies and not capture and not board.is_check():
+                    yield board.copy(stack=False), result
+
+
+def load_dataset(epd_paths=(), pgn_paths=(), limit=None):
+    """Packed (N, 12) uint64 bitboards and (N,) float32 results."""
+    # Filled in place as positions are parsed; grown by doubling
+    capacity = limit or 65536
+    masks = np.empty((capacity, 12), dtype='<u8')
+    results = np.empty(capacity, dtype=np.float32)
+    count = 0
+    sources = [iter_epd(path) for path in epd_paths] + [iter_pgn(path) for path in pgn_paths]
+    for source in sources:
+        for board, result in source:
+            if count == len(results):
+                masks = np.concatenate([masks, np.empty_like(masks)])
+                results = np.concatenate([results, np.empty_like(results)])
+            masks[count] = batch_eval.piece_masks(board)
+            results[count] = result
+            count += 1
+            if limit and count >= limit:
+                break
+        if limit and count >= limit:
+            break
+    return masks[:count].copy(), results[:count].copy()
+
+
+def _pawn_terms(own, enemy, white):
+    """Doubled count, isolated count and passed-pawn advance for one side.
+
+    own and enemy are (N, 8 ranks, 8 files) pawn planes; mirrors
+    fallback.pawn_structure.
+    """
+    per_file = own.sum(axis=1, dtype=np.int32)
+    present = per_file > 0
+    padded = np.pad(present, ((0, 0), (1, 1)))
+    neighbours = padded[:, :-2] | padded[:, 2:]
+    doubled = np.maximum(per_file - 1, 0).sum(axis=1)
+    isolated = (per_file * ~neighbours).sum(axis=1)
+
+    ranks = np.arange(8)
+    # Most advanced enemy pawn (from own point of view) on each file, or -1
+    enemy_ranks = enemy * (ranks if white else 7 - ranks)[None, :, None]
+    enemy_front = np.where(enemy.any(axis=1), enemy_ranks.max(axis=1), -1)
+    padded = np.pad(enemy_front, ((0, 0), (1, 1)), constant_values=-1)
+    blockers = np.maximum(np.maximum(padded[:, :-2], padded[:, 1:-1]), padded[:, 2:])
+    advance = (ranks if white else 7 - ranks)[None, :, None]
+    # Passed: every enemy pawn on this or an adjacent file is level or behind
+    passed = own.astype(bool) & (blockers[:, None, :] <= advance)
+    passed_advance = (passed * advance).sum(axis=(1, 2))
+    return doubled, isolated, passed_advance
+
+
+def features(planes):
+    """Feature matrix for which the white-POV fallback.evaluate is features @ params."""
+    white = planes[:, :N_PIECES, :].astype(np.int8)
+    black = planes[:, N_PIECES:, :][:, :, MIRROR].astype(np.int8)
+    pst = white - black
+    counts = pst.sum(axis=2, dtype=np.int32)
+    white_pawns = planes[:, 0, :].reshape(-1, 8, 8).astype(np.int32)
+    black_pawns = planes[:, N_PIECES, :].reshape(-1, 8, 8).astype(np.int32)
+    w_doubled, w_isolated, w_passed = _pawn_terms(white_pawns, black_pawns, True)
+    b_doubled, b_isolated, b_passed = _pawn_terms(black_pawns, white_pawns, False)
+    return np.concatenate([
+        counts,
+        pst.reshape(len(planes), -1),
+        -(w_doubled - b_doubled)[:, None],
+        -(w_isolated - b_isolated)[:, None],
+        (w_passed - b_passed)[:, None],
+    ], axis=1).astype(np.float32)
+
+
+def initial_params():
+    params = np.zeros(N_PARAMS, dtype=np.float64)
+    for i, piece_type in enumerate(chess.PIECE_TYPES):
+        params[i] = fallback.PIECE_VALUES[piece_type]
+        params[N_PIECES + 64 * i:N_PIECES + 64 * (i + 1)] = fallback.PST[piece_type]
+    for i, name in enumerate(PAWN_TERMS):
+        params[N_PARAMS - len(PAWN_TERMS) + i] = fallback.WEIGHTS[name]
+    return params
+
+
+def pin_pst_means(params, means):
+    """Shift each piece-square table back to its mean, moving the difference into the piece value.
+
+    A piece's value and the average of its table contribute identically to
+    every evaluation, so only their sum can be fitted; holding the table
+    mean fixed makes the fit unique without changing any evaluation. The
+    king's value is not used (both sides always have one) and stays as is.
+    """
+    for i, piece_type in enumerate(chess.PIECE_TYPES):
+        table = params[N_PIECES + 64 * i:N_PIECES + 64 * (i + 1)]
+        shift = table.mean() - means[i]
+        table -= shift
+        if piece_type != chess.KING:
+            params[i] += shift
+
+
+def _sigmoid(evals, k):
+    return 1.0 / (1.0 + np.power(10.0, -k * evals / 400.0))
+
+
+def _chunks(masks, results, batch_size):
+    for start in range(0, len(results), batch_size):
+        planes = batch_eval.encode_masks(masks[start:start + batch_size])
+        yield features(planes), results[start:start + batch_size]
+
+
+def evaluate_all(masks, results, params, batch_size):
+    return np.concatenate([x @ params for x, _ in _chunks(masks, results, batch_size)])
+
+
+def fit_k(evals, results, low=0.1, high=5.0, iterations=40):
+    """Golden-section search for the K that minimises the loss at fixed weights."""
+    ratio = (5 ** 0.5 - 1) / 2
+
+    def loss(k):
+        return float(np.mean((results - _sigmoid(evals, k)) ** 2))
+
+    a, b = low, high
+    for _ in range(iterations):
+        c = b - ratio * (b - a)
+        d = a + ratio * (b - a)
+        if loss(c) < loss(d):
+            b = d
+        else:
+            a = c
+    k = (a + b) / 2
+    return k, loss(k)
+
+
+def tune(masks, results, epochs=20, batch_size=16384, learning_rate=1.0, seed=0, log=print):
+    """Optimise the linear evaluation weights; returns (params, k, loss)."""
+    params = initial_params()
+    pst_means = [params[N_PIECES + 64 * i:N_PIECES + 64 * (i + 1)].mean() for i in range(N_PIECES)]
+    k, loss = fit_k(evaluate_all(masks, results, params, batch_size), results)
+    log(f"{len(results)} positions, K={k:.4f}, initial loss={loss:.6f}")
+
+    rng = np.random.default_rng(seed)
+    m = np.zeros_like(params)
+    v = np.zeros_like(params)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    step = 0
+    scale = k * np.log(10.0) / 400.0
+    for epoch in range(epochs):
+        started = time.monotonic()
+        order = rng.permutation(len(results))
+        shuffled_masks, shuffled_results = masks[order], results[order]
+        for x, y in _chunks(shuffled_masks, shuffled_results, batch_size):
+            predicted = _sigmoid(x @ params, k)
+            error = (predicted - y) * predicted * (1.0 - predicted) * scale
+            gradient = 2.0 * (x.T @ error) / len(y)
+            gradient[N_PIECES - 1] = 0.0  # the king's material value is meaningless
+            step += 1
+            m = beta1 * m + (1 - beta1) * gradient
+            v = beta2 * v + (1 - beta2) * gradient ** 2
+            m_hat = m / (1 - beta1 ** step)
+            v_hat = v / (1 - beta2 ** step)
+            params -= learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+            pin_pst_means(params, pst_means)
+        evals = evaluate_all(masks, results, params, batch_size)
+        loss = float(np.mean((results - _sigmoid(evals, k)) ** 2))
+        log(f"epoch {epoch + 1}/{epochs}: loss={loss:.6f} ({time.monotonic() - started:.1f}s)")
+    return params, k, loss
+
+
+def params_to_weights(params):
+    """Convert a parameter vector into the JSON structure fallback.load_weights reads."""
+    piece_values = {}
+    pst = {}
+    for i, piece_type in enumerate(chess.PIECE_TYPES):
+        symbol = chess.piece_symbol(piece_type)
+        piece_values[symbol] = int(round(params[i]))
+        pst[symbol] = [int(round(x)) for x in params[N_PIECES + 64 * i:N_PIECES + 64 * (i + 1)]]
+    weights = dict(fallback.WEIGHTS)
+    for i, name in enumerate(PAWN_TERMS):
+        weights[name] = int(round(params[N_PARAMS - len(PAWN_TERMS) + i]))
+    return {'piece_values': piece_values, 'pst': pst, 'weights': weights}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tune the fallback engine evaluation weights.')
+    parser.add_argument('epd', nargs='*', help='EPD/FEN files with game results')
+    parser.add_argument('--pgn', action='append', default=[], help='PGN file to sample positions from')
+    parser.add_argument('--out', default=fallback.weights_path(), help='weights file to write')
+    parser.add_argument('--limit', type=int, help='maximum number of positions to load')
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=16384)
+    parser.add_argument('--learning-rate', type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    if not args.epd and not args.pgn:
+        parser.error('no training data given')
+    started = time.monotonic()
+    masks, results = load_dataset(args.epd, args.pgn, args.limit)
+    if not len(results):
+        print('No labelled positions found.')
+        return 1
+    print(f"Loaded {len(results)} positions in {time.monotonic() - started:.1f}s")
+
+    params, k, loss = tune(masks, results, args.epochs, args.batch_size, args.learning_rate)
+    data = params_to_weights(params)
+    data['tuning'] = {'positions': int(len(results)), 'k': round(k, 6), 'loss': round(loss, 8)}
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    print(f"Wrote {args.out} in {time.monotonic() - started:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,9 @@
-import ctypes
+import collections
+import contextlib
+import functools
+import os
+import threading
+import time
 def is_file_locked(filepath):
     try:
         fh = open(filepath, 'a')
@@ -7,12 +12,37 @@ def is_file_locked(filepath):
     except Exception:
         return True
 
-from flask import Flask, request, render_template_string, redirect, url_for
+from flask import Flask, request, render_template, redirect, url_for
+from jinja2 import FileSystemBytecodeCache
 import chess
-import chess.engine
+
+# requests, pip metadata, Pillow, chess.engine and the serving back ends are
+# imported where they are first used, so they stay off the cold-start path
+# (see `python app.py profile-startup`).
+from analyze_chess import admission, assets, fallback, http_client, startup, timing
+from analyze_chess.build_info import BuildInfo
+from analyze_chess.jobs import JobRunner
+from analyze_chess.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, share_from_environment
 
 app = Flask(__name__)
 
+# Templates live in ./templates. Compiled template bytecode is cached on disk
+# so a fresh process skips the Jinja compile step, and templates are only
+# re-checked for changes when FLASK_DEBUG / TEMPLATES_AUTO_RELOAD asks for it.
+def _template_cache_dir():
+    import tempfile
+    path = os.environ.get('ANALYZE_CHESS_TEMPLATE_CACHE') or os.path.join(tempfile.gettempdir(), 'analyze_chess_jinja')
+    try:
+        os.makedirs(path, exist_ok=True)
+        return path
+    except OSError:
+        return None
+
+_bytecode_dir = _template_cache_dir()
+if _bytecode_dir:
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(_bytecode_dir)}
+app.config['TEMPLATES_AUTO_RELOAD'] = os.environ.get('TEMPLATES_AUTO_RELOAD', os.environ.get('FLASK_DEBUG', '')) in ('1', 'true', 'True')
+
 # Path to the Stockfish engine (will be auto-discovered at runtime)
 engine_path = None
 
@@ -41,110 +71,160 @@ def _write_text(path, text):
     except Exception:
         return False
 
-def board_to_html(board, highlight_move=None):
-    """Convert chess board to beautiful HTML/CSS representation."""
-    piece_unicode = {
-        'r': '♜', 'n': '♞', 'b': '♝', 'q': '♛', 'k': '♚', 'p': '♟',
-        'R': '♖', 'N': '♘', 'B': '♗', 'Q': '♕', 'K': '♔', 'P': '♙'
-    }
+PIECE_UNICODE = {
+    'r': '♜', 'n': '♞', 'b': '♝', 'q': '♛', 'k': '♚', 'p': '♟',
+    'R': '♖', 'N': '♘', 'B': '♗', 'Q': '♕', 'K': '♔', 'P': '♙'
+}
+
+# Fragment index per highlight state; pieces are indexed 0 = empty square,
+# 1-6 = white pawn..king, 7-12 = black pawn..king
+_HIGHLIGHT_NONE, _HIGHLIGHT_FROM, _HIGHLIGHT_TO = 0, 1, 2
+
+def _build_square_fragments():
+    """Precompute the HTML of every square: [square][piece][highlight]."""
+    symbols = [None] + list('PNBRQKpnbrqk')
+    highlights = ('', ' from-square', ' to-square')
+    table = []
+    for square in chess.SQUARES:
+        file, rank = chess.square_file(square), chess.square_rank(square)
+        square_color = 'light' if (file + rank) % 2 == 0 else 'dark'
+        per_piece = []
+        for symbol in symbols:
+            per_highlight = []
+            for highlight_class in highlights:
+                html = f'<div class="chess-square {square_color}{highlight_class}">'
+                if symbol:
+                    piece_color = 'white' if symbol.isupper() else 'black'
+                    html += f'<span class="chess-piece {piece_color}">{PIECE_UNICODE[symbol]}</span>'
+                html += '</div>'
+                per_highlight.append(html)
+            per_piece.append(per_highlight)
+        table.append(per_piece)
+    return table
+
+_SQUARE_FRAGMENTS = _build_square_fragments()
+_RANK_OPEN = [f'<div class="board-row"><div class="rank-label">{rank + 1}</div>' for rank in range(8)]
+# Bottom label row, keyed by flip_board
+_FILE_LABELS = {
+    flip: '<div class="board-row file-labels"><div class="rank-label"></div>'
+          + ''.join(f'<div class="file-label">{c}</div>' for c in (reversed('abcdefgh') if flip else 'abcdefgh'))
+          + '</div>'
+    for flip in (False, True)
+}
+
+def _placement_key(board):
+    """Cheap stand-in for board.board_fen(): the eight piece bitboards."""
+    return (board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK],
+            board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings)
+
+@functools.lru_cache(maxsize=int(os.environ.get('ANALYZE_CHESS_BOARD_CACHE', 1024)))
+def _render_board(placement, highlight_uci, flip_board):
+    """Render a board from its placement key; memoized on all three inputs."""
+    white, _, pawns, knights, bishops, rooks, queens, kings = placement
+    from_square = to_square = None
+    if highlight_uci:
+        move = chess.Move.from_uci(highlight_uci)
+        from_square, to_square = move.from_square, move.to_square
     
     html = ['<div class="chess-board">']
-    
-    # Add rank labels on the side
-    for rank in range(7, -1, -1):  # 8 to 1
-        html.append('<div class="board-row">')
-        html.append(f'<div class="rank-label">{rank + 1}</div>')
-        
-        for file in range(8):  # a to h
+    ranks = range(8) if flip_board else range(7, -1, -1)
+    files = range(7, -1, -1) if flip_board else range(8)
+    for rank in ranks:
+        html.append(_RANK_OPEN[rank])
+        for file in files:
             square = chess.square(file, rank)
-            piece = board.piece_at(square)
-            
-            # Determine square color
-            square_color = 'light' if (file + rank) % 2 == 0 else 'dark'
-            
-            # Check if this square should be highlighted
-            highlight_class = ''
-            if highlight_move:
-                if square == highlight_move.from_square:
-                    highlight_class = ' from-square'
-                elif square == highlight_move.to_square:
-                    highlight_class = ' to-square'
-            
-            piece_symbol = piece_unicode.get(piece.symbol(), '') if piece else ''
-            piece_color = 'white' if piece and piece.color else 'black'
-            
-            html.append(f'<div class="chess-square {square_color}{highlight_class}">')
-            if piece_symbol:
-                html.append(f'<span class="chess-piece {piece_color}">{piece_symbol}</span>')
-            html.append('</div>')
-        
+            mask = chess.BB_SQUARES[square]
+            piece_index = 0
+            for offset, pieces in enumerate((pawns, knights, bishops, rooks, queens, kings)):
+                if pieces & mask:
+                    piece_index = offset + 1 if white & mask else offset + 7
+                    break
+            if square == from_square:
+                highlight = _HIGHLIGHT_FROM
+            elif square == to_square:
+                highlight = _HIGHLIGHT_TO
+            else:
+                highlight = _HIGHLIGHT_NONE
+            html.append(_SQUARE_FRAGMENTS[square][piece_index][highlight])
         html.append('</div>')
-    
-    # Add file labels at bottom
-    html.append('<div class="board-row file-labels">')
-    html.append('<div class="rank-label"></div>')  # Empty corner
-    for file_char in 'abcdefgh':
-        html.append(f'<div class="file-label">{file_char}</div>')
-    html.append('</div>')
-    
+    html.append(_FILE_LABELS[flip_board])
     html.append('</div>')
     return ''.join(html)
 
-def generate_fallback_recommendation(board):
-    """Generate a simple AI recommendation based on chess principles."""
+def board_to_html(board, highlight_move=None, flip_board=False):
+    """Convert chess board to beautiful HTML/CSS representation.
+
+    Square fragments are precomputed and whole boards are cached by
+    (placement, highlighted move, orientation), so repeat positions are a
+    dictionary hit.
+    """
+    with timing.stage('board_html'):
+        return _render_board(_placement_key(board), highlight_move.uci() if highlight_move else None, flip_board)
+
+# Result boards are served as cacheable SVG images unless disabled, in which
+# case the inline HTML boards are embedded in the page as before.
+SVG_BOARDS = os.environ.get('ANALYZE_CHESS_SVG_BOARDS', '1').lower() not in ('0', 'false', 'no')
+BOARD_SVG_SIZE = 320
+# Bump when the SVG or PNG board drawing changes without a release
+BOARD_IMAGE_REVISION = 1
+
+def board_image_version():
+    """Token for the board image renderers; part of image URLs and ETags."""
+    # Keyed on the app version, which is a placeholder until BUILD_INFO is warm
+    return _board_image_version(BUILD_INFO.app_version())
+
+@functools.lru_cache(maxsize=4)
+def _board_image_version(app_version):
+    import hashlib
+    key = f"{BOARD_IMAGE_REVISION}|{app_version}|{chess.__version__}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]
+
+@functools.lru_cache(maxsize=int(os.environ.get('ANALYZE_CHESS_BOARD_CACHE', 1024)))
+def _render_board_svg(placement, move_uci, flip_board, size):
+    import chess.svg
+    move = chess.Move.from_uci(move_uci) if move_uci else None
+    return chess.svg.board(chess.BaseBoard(placement), lastmove=move, flipped=flip_board, size=size)
+
+def board_svg_url(board, highlight_move=None, flip_board=False):
+    """URL of the cacheable /board.svg image for board."""
+    return url_for('board_svg', fen=board.board_fen(),
+                   move=highlight_move.uci() if highlight_move else None,
+                   flip=1 if flip_board else None, v=board_image_version())
+
+FALLBACK_SEARCH_SECONDS = REGISTRY.histogram(
+    'analyze_chess_fallback_search_seconds', 'Time spent in built-in fallback engine searches.')
+
+def fallback_move(board):
+    """Best move of the built-in fallback engine as (text, move or None)."""
     try:
-        legal_moves = list(board.legal_moves)
-        if not legal_moves:
-            return "No legal moves available", ""
+        if not any(board.legal_moves):
+            return "No legal moves available", None
         
-        # Simple scoring system for moves
-        scored_moves = []
-        
-        for move in legal_moves:
-            score = 0
-            
-            # Make the move temporarily to evaluate
-            board.push(move)
-            
-            # Basic evaluation criteria:
-            # 1. Captures are good
-            captured_piece = board.piece_at(move.to_square)
-            if captured_piece:
-                piece_values = {'p': 1, 'n': 3, 'b': 3, 'r': 5, 'q': 9, 'k': 0}
-                score += piece_values.get(captured_piece.symbol().lower(), 0) * 10
-            
-            # 2. Check is good
-            if board.is_check():
-                score += 5
-            
-            # 3. Checkmate is best
-            if board.is_checkmate():
-                score += 1000
-                
-            # 4. Center control (e4, e5, d4, d5)
-            center_squares = [chess.E4, chess.E5, chess.D4, chess.D5]
-            if move.to_square in center_squares:
-                score += 2
-                
-            # 5. Avoid putting pieces in danger (simple check)
-            if board.is_attacked_by(not board.turn, move.to_square):
-                score -= 3
-            
-            board.pop()  # Undo the move
-            scored_moves.append((move, score))
-        
-        # Sort by score and pick the best
-        scored_moves.sort(key=lambda x: x[1], reverse=True)
-        best_move = scored_moves[0][0]
-        
-        return f"{best_move}", board_to_html(board, best_move)
+        # Iterative-deepening search backed by the shared transposition table
+        with timing.stage('fallback'):
+            result = fallback.choose_move(board)
+        FALLBACK_SEARCH_SECONDS.observe(result.elapsed)
+        return f"{result.move}", result.move
         
     except Exception as e:
-        return f"Analysis failed: {e}", ""
+        return f"Analysis failed: {e}", None
+
+def generate_fallback_recommendation(board):
+    """Generate an AI recommendation from the built-in fallback engine."""
+    text, best_move = fallback_move(board)
+    return text, board_to_html(board, best_move) if best_move else ""
 
-def get_python_dependencies_info():
-    """Get version information for all Python dependencies."""
-    import subprocess
+def _latest_version_label(result):
+    """Display text for a failed update check result from http_client."""
+    if isinstance(result, http_client.OfflineError):
+        return "Offline"
+    return "Check failed"
+
+def get_python_dependencies_info(deadline=None):
+    """Get version information for all Python dependencies.
+
+    The PyPI lookups run concurrently on the shared HTTP client.
+    """
     try:
         import importlib.metadata as metadata
     except ImportError:
@@ -154,17 +234,13 @@ def get_python_dependencies_info():
             import pkg_resources
             metadata = None
     
-    # Try to import requests, but handle if it's missing
-    try:
-        import requests
-        requests_available = True
-    except ImportError:
-        requests_available = False
-    
+    client = http_client.client()
     dependencies = {}
     
     # Key dependencies to check
     key_packages = ['flask', 'chess', 'requests']
+    pypi_urls = {package: f'https://pypi.org/pypi/{package}/json' for package in key_packages}
+    responses = client.get_json_many(pypi_urls.values(), timeout=3, deadline=deadline) if client.available() else {}
     
     for package in key_packages:
         try:
@@ -174,19 +250,17 @@ def get_python_dependencies_info():
             else:
                 current_version = pkg_resources.get_distribution(package).version
             
-            # Check PyPI for latest version
-            if requests_available:
-                try:
-                    response = requests.get(f'https://pypi.org/pypi/{package}/json', timeout=3)
-                    if response.status_code == 200:
-                        data = response.json()
-                        latest_version = data['info']['version']
-                        update_available = current_version != latest_version
-                    else:
-                        latest_version = "Unknown"
-                        update_available = False
-                except:
-                    latest_version = "Check failed"
+            # Latest version from PyPI
+            if client.available():
+                data = responses.get(pypi_urls[package])
+                if isinstance(data, Exception):
+                    latest_version = _latest_version_label(data)
+                    update_available = False
+                elif data:
+                    latest_version = data['info']['version']
+                    update_available = current_version != latest_version
+                else:
+                    latest_version = "Unknown"
                     update_available = False
             else:
                 latest_version = "requests not available"
@@ -226,50 +300,31 @@ def version_greater(v1, v2):
     except:
         return False
 
-def get_application_version_info():
+def get_application_version_info(deadline=None):
     """Get current application version and check for updates from GitHub releases."""
-    try:
-        import requests
-        requests_available = True
-    except ImportError:
-        requests_available = False
+    client = http_client.client()
     
-    # Current version - read from version.py
-    try:
-        from version import __version__
-        current_version = __version__
-    except ImportError:
-        current_version = "Unknown"
-    
-    # Try to get current version from git tag if possible
-    try:
-        import subprocess
-        result = subprocess.run(['git', 'describe', '--tags', '--exact-match'], 
-                              capture_output=True, text=True, cwd=os.path.dirname(__file__))
-        if result.returncode == 0:
-            current_version = result.stdout.strip()
-    except:
-        pass  # Fall back to version.py or Unknown
+    # Current version - git tag or version.py, resolved once per process
+    current_version = BUILD_INFO.app_version()
     
     latest_version = "Unknown"
     update_available = False
     
-    if requests_available:
+    if client.available():
         try:
             # Check GitHub releases for latest version
             url = "https://api.github.com/repos/AprilLorDrake/Analyze_Chess/releases/latest"
-            headers = {"Accept": "application/vnd.github+json", "User-Agent": "analyze-chess-app"}
-            response = requests.get(url, headers=headers, timeout=10)
+            data = client.get_json(url, timeout=10, deadline=deadline,
+                                   headers={"Accept": "application/vnd.github+json"})
             
-            if response.status_code == 200:
-                data = response.json()
+            if data:
                 latest_version = data['tag_name']
                 # Compare versions: only update if latest > current
                 update_available = version_greater(latest_version, current_version)
             else:
                 latest_version = "Check failed"
-        except Exception:
-            latest_version = "Check failed"
+        except Exception as e:
+            latest_version = _latest_version_label(e)
     else:
         latest_version = "requests not available"
     
@@ -277,7 +332,7 @@ def get_application_version_info():
         'current': current_version,
         'latest': latest_version,
         'update_available': update_available,
-        'release_url': f"https://github.com/AprilLorDrake/Analyze_Chess/releases/tag/{latest_version}" if latest_version not in ["Unknown", "Check failed", "requests not available"] else None
+        'release_url': f"https://github.com/AprilLorDrake/Analyze_Chess/releases/tag/{latest_version}" if latest_version not in ["Unknown", "Check failed", "Offline", "requests not available"] else None
     }
 
 def find_stockfish():
@@ -343,15 +398,14 @@ def install_stockfish_to_dir(target_dir: str):
     the installed executable on success, else None.
     """
     import os
-    try:
-        import requests, zipfile, io, tempfile
-    except ImportError:
+    import zipfile, io, tempfile
+    if not http_client.client().available():
         print("requests package not available; cannot auto-install Stockfish.")
         return None
     os.makedirs(target_dir, exist_ok=True)
     url = "https://github.com/official-stockfish/Stockfish/releases/latest/download/stockfish-windows-x86-64-avx2.zip"
     try:
-        resp = requests.get(url, timeout=30)
+        resp = http_client.client().session().get(url, timeout=30)
         resp.raise_for_status()
         with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
             exe_candidates = [f for f in z.namelist() if f.lower().endswith('.exe')]
@@ -402,30 +456,23 @@ def install_stockfish_to_dir(target_dir: str):
         print(f"Stockfish install failed: {e}")
         return None
 
-def get_engine_version(exec_path: str) -> str:
-    import subprocess
-    try:
-        cp = subprocess.run([exec_path, '--version'], capture_output=True, text=True, timeout=5)
-        out = (cp.stdout or cp.stderr or '').strip()
-        return out.splitlines()[0] if out else 'unknown'
-    except Exception:
-        return 'unknown'
+# App version and engine path/version/size/mtime, computed once instead of
+# per request; the engine entry is refreshed when the binary changes.
+BUILD_INFO = BuildInfo(os.path.dirname(__file__), find_stockfish)
 
-def get_latest_stockfish_tag(timeout: float = 5.0) -> str | None:
+def get_latest_stockfish_tag(timeout: float = 5.0, deadline: float | None = None) -> str | None:
     """Return latest Stockfish release tag from GitHub, or None on error.
 
     This is a lightweight check used only to display an 'update available' hint.
     """
     try:
-        import requests
-        headers = {"Accept": "application/vnd.github+json", "User-Agent": "analyze-chess-app"}
-        r = requests.get(
+        data = http_client.client().get_json(
             "https://api.github.com/repos/official-stockfish/Stockfish/releases/latest",
-            headers=headers,
             timeout=timeout,
+            deadline=deadline,
+            headers={"Accept": "application/vnd.github+json"},
         )
-        if r.ok:
-            data = r.json()
+        if data:
             tag = data.get("tag_name")
             return str(tag) if tag else None
     except Exception:
@@ -440,6 +487,300 @@ def _extract_numeric_version(s: str) -> str | None:
     return m.group(1) if m else None
 
 
+# Running Stockfish processes shared by all requests, replaced when the
+# selected engine binary changes. Pre-fork workers get a client for the
+# engine broker process (ANALYZE_CHESS_ENGINE_BROKER = its socket) instead.
+ENGINE_THINK_TIME = 2.0
+ENGINE_SEARCH_SECONDS = REGISTRY.histogram(
+    'analyze_chess_engine_search_seconds', 'Stockfish search time as reported by the engine.', ['mode'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 5.0, 10.0))
+ENGINE_SEARCH_DEPTH = REGISTRY.histogram(
+    'analyze_chess_engine_search_depth', 'Depth reached by Stockfish searches.', ['mode'],
+    buckets=(1, 2, 4, 6, 8, 10, 12, 15, 18, 21, 25, 30, 40, 60))
+ENGINE_NPS = REGISTRY.histogram(
+    'analyze_chess_engine_nps', 'Stockfish nodes per second over a search.', ['mode'],
+    buckets=(1e3, 1e4, 1e5, 3e5, 1e6, 2e6, 5e6, 1e7, 3e7, 1e8))
+ENGINE_UNAVAILABLE = REGISTRY.counter(
+    'analyze_chess_engine_unavailable_total', 'Analyses answered without Stockfish.', ['reason'])
+_engine_pool = None
+_async_engine_pool = None
+_engine_pool_lock = threading.Lock()
+_admission = None
+_admission_configured = False
+# The event loop serving the asgi mode; engine_move searches on its async pool
+_serving_loop = None
+
+def get_engine_pool():
+    """The EnginePool for engine_path, or None when there is no engine binary."""
+    global _engine_pool
+    if not engine_path or not os.path.isfile(engine_path):
+        return None
+    with _engine_pool_lock:
+        if _engine_pool is None or _engine_pool.path != engine_path:
+            broker_socket = os.environ.get('ANALYZE_CHESS_ENGINE_BROKER')
+            if broker_socket and _engine_pool is not None:
+                # The broker switches its pool when asked for another binary;
+                # closing would restart its engines once per worker
+                _engine_pool.path = engine_path
+                return _engine_pool
+            if _engine_pool is not None:
+                _engine_pool.close()
+            if broker_socket:
+                from analyze_chess.engine_broker import BrokerClient
+                _engine_pool = BrokerClient(broker_socket, engine_path)
+            else:
+                from analyze_chess.engine_pool import EnginePool
+                _engine_pool = EnginePool(engine_path)
+        return _engine_pool
+
+def get_async_engine_pool():
+    """The AsyncEnginePool for engine_path on the running event loop, or None."""
+    import asyncio
+    from analyze_chess.aio import AsyncEnginePool
+    global _async_engine_pool
+    if not engine_path or not os.path.isfile(engine_path):
+        return None
+    loop = asyncio.get_running_loop()
+    with _engine_pool_lock:
+        pool = _async_engine_pool
+        if pool is None or pool.path != engine_path or pool.loop is not loop:
+            if pool is not None:
+                pool.close_threadsafe()
+            pool = _async_engine_pool = AsyncEnginePool(engine_path)
+        return pool
+
+def reset_engine_pool():
+    """Quit the pooled engines, e.g. after the binary was replaced in place."""
+    global _engine_pool, _async_engine_pool
+    with _engine_pool_lock:
+        if _engine_pool is not None:
+            try:
+                _engine_pool.close()
+            except Exception as e:
+                print(f"Engine pool reset failed: {e}")
+            _engine_pool = None
+        if _async_engine_pool is not None:
+            _async_engine_pool.close_threadsafe()
+            _async_engine_pool = None
+
+def get_admission():
+    """The AdmissionControl in front of engine searches, or None when it is turned off."""
+    global _admission, _admission_configured
+    with _engine_pool_lock:
+        if not _admission_configured:
+            from analyze_chess.engine_pool import default_size
+            _admission = admission.from_environment(default_size(), ENGINE_THINK_TIME)
+            _admission_configured = True
+        return _admission
+
+@contextlib.contextmanager
+def _admission_slot(priority):
+    """Hold an admission turn for an analysis; raises admission.Overloaded."""
+    control = get_admission()
+    if control is None:
+        yield
+        return
+    with timing.stage('admission'):
+        ticket = control.acquire(priority)
+    try:
+        yield
+    finally:
+        control.release(ticket)
+
+@contextlib.asynccontextmanager
+async def _admission_slot_async(priority):
+    control = get_admission()
+    if control is None:
+        yield
+        return
+    ticket = await control.acquire_async(priority)
+    try:
+        yield
+    finally:
+        control.release(ticket)
+
+def _busy_json(err):
+    """(body, headers) of the 429 answer to an analysis that was not admitted."""
+    body = {'error': f"Server busy, please retry in {err.retry_after} seconds", 'retry_after': err.retry_after}
+    return body, {'Retry-After': str(err.retry_after), 'Cache-Control': 'no-store'}
+
+def _record_search(mode, info, wall_seconds):
+    ENGINE_SEARCH_SECONDS.labels(mode).observe(info.get('time', wall_seconds))
+    if 'depth' in info:
+        ENGINE_SEARCH_DEPTH.labels(mode).observe(info['depth'])
+    if 'nps' in info:
+        ENGINE_NPS.labels(mode).observe(info['nps'])
+
+def engine_move(board):
+    """Stockfish's move for board as (text, move or None).
+
+    Without an engine binary the first legal move is returned, as before.
+    """
+    from chess.engine import INFO_BASIC, Limit
+    loop = _serving_loop
+    if loop is not None:
+        import asyncio
+        with timing.stage('engine'):
+            return asyncio.run_coroutine_threadsafe(engine_move_async(board), loop).result()
+    pool = get_engine_pool()
+    if pool is None:
+        ENGINE_UNAVAILABLE.labels('no_engine').inc()
+        return _first_legal_move(board)
+    try:
+        started = time.perf_counter()
+        with timing.stage('engine'):
+            result = pool.play(board, Limit(time=ENGINE_THINK_TIME), info=INFO_BASIC)
+        _record_search('sync', result.info, time.perf_counter() - started)
+        return str(result.move), result.move
+    except Exception as e:
+        ENGINE_UNAVAILABLE.labels('error').inc()
+        return f"Engine error: {e}", None
+
+async def engine_move_async(board):
+    """engine_move for the event loop: awaits a search on the async engine pool."""
+    from chess.engine import INFO_BASIC, Limit
+    pool = get_async_engine_pool()
+    if pool is None:
+        ENGINE_UNAVAILABLE.labels('no_engine').inc()
+        return _first_legal_move(board)
+    try:
+        started = time.perf_counter()
+        result = await pool.play(board, Limit(time=ENGINE_THINK_TIME), info=INFO_BASIC)
+        _record_search('async', result.info, time.perf_counter() - started)
+        return str(result.move), result.move
+    except Exception as e:
+        ENGINE_UNAVAILABLE.labels('error').inc()
+        return f"Engine error: {e}", None
+
+def _first_legal_move(board):
+    first_move = next(iter(board.legal_moves)) if board.legal_moves else None
+    return (str(first_move) if first_move else "No legal moves available"), first_move
+
+# Recent analyses keyed by (FEN, engine). Failed analyses are not cached.
+ANALYSIS_CACHE_SIZE = int(os.environ.get('ANALYZE_CHESS_ANALYSIS_CACHE', 256))
+_analysis_cache = collections.OrderedDict()
+_analysis_lock = threading.Lock()
+ANALYSIS_CACHE_LOOKUPS = REGISTRY.counter(
+    'analyze_chess_analysis_cache_lookups_total', 'Analysis cache lookups by result.', ['result'])
+
+def analyze_fen(fen, priority='normal'):
+    """Analyze a FEN with Stockfish and the fallback AI.
+
+    Returns plain data (UCI strings, no HTML) shared by the HTML page and the
+    JSON API. Raises ValueError for an invalid FEN and admission.Overloaded
+    when the engines are saturated; cached positions skip admission.
+    """
+    board = chess.Board(fen)
+    cached = _cached_analysis(board)
+    if cached is not None:
+        return cached
+    with _admission_slot(priority):
+        # The fallback search runs alongside Stockfish rather than after it
+        ai = _fallback_executor().submit(timing.wrap('fallback', fallback_move), board.copy())
+        stockfish_text, stockfish_best = engine_move(board)
+        ai_text, ai_best = ai.result()
+    return _store_analysis(board, stockfish_text, stockfish_best, ai_text, ai_best)
+
+_fallback_pool = None
+_fallback_pool_lock = threading.Lock()
+
+def _fallback_executor():
+    """Threads for fallback searches run next to the Stockfish search, created on first use."""
+    global _fallback_pool
+    with _fallback_pool_lock:
+        if _fallback_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _fallback_pool = ThreadPoolExecutor(
+                max_workers=int(os.environ.get('ANALYZE_CHESS_THREADS', 0)) or 4, thread_name_prefix='fallback')
+        return _fallback_pool
+
+async def analyze_fen_async(fen, priority='normal'):
+    """analyze_fen for the event loop.
+
+    The Stockfish search is awaited; the fallback search is CPU-bound Python
+    and runs on the loop's default executor alongside it.
+    """
+    import asyncio
+    board = chess.Board(fen)
+    cached = _cached_analysis(board)
+    if cached is not None:
+        return cached
+    async with _admission_slot_async(priority):
+        ai = asyncio.get_running_loop().run_in_executor(None, fallback_move, board.copy())
+        stockfish_text, stockfish_best = await engine_move_async(board)
+        ai_text, ai_best = await ai
+    return _store_analysis(board, stockfish_text, stockfish_best, ai_text, ai_best)
+
+def _cached_analysis(board):
+    key = (board.fen(), engine_path)
+    with _analysis_lock:
+        cached = _analysis_cache.get(key)
+        if cached is not None:
+            _analysis_cache.move_to_end(key)
+            ANALYSIS_CACHE_LOOKUPS.labels('hit').inc()
+            timing.annotate('analysis_cache', 'hit')
+            return dict(cached)
+    ANALYSIS_CACHE_LOOKUPS.labels('miss').inc()
+    timing.annotate('analysis_cache', 'miss')
+    return None
+
+def _store_analysis(board, stockfish_text, stockfish_best, ai_text, ai_best):
+    analysis = {
+        'fen': board.fen(),
+        'stockfish': stockfish_text,
+        'stockfish_move': stockfish_best.uci() if stockfish_best else None,
+        'ai': ai_text,
+        'ai_move': ai_best.uci() if ai_best else None,
+    }
+    if ANALYSIS_CACHE_SIZE > 0 and ((stockfish_best and ai_best) or not any(board.legal_moves)):
+        with _analysis_lock:
+            _analysis_cache[(board.fen(), engine_path)] = dict(analysis)
+            while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+                _analysis_cache.popitem(last=False)
+    return analysis
+
+# Sample positions offered on the start page, as (name, FEN). They are the
+# positions most users try first, so their analyses are warmed at startup.
+SAMPLE_POSITIONS = [
+    ('Starting Position', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'),
+    ("Scholar's Mate Setup", 'r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/3P1N2/PPP2PPP/RNBQK2R w KQkq - 4 4'),
+    ("Queen's Gambit", 'rnbqkbnr/ppp1pppp/8/3p4/2PP4/8/PP2PPPP/RNBQKBNR b KQkq c3 0 2'),
+    ('Endgame Position', '6k1/5ppp/8/8/8/2K5/5PPP/8 w - - 0 1'),
+    ('Tactical Position', 'r3k2r/ppp2ppp/2n1bn2/2bpp3/2P5/2N1PN2/PPBP1PPP/R1BQKR2 w Qkq - 0 8'),
+]
+
+def _sample_positions():
+    """Template data for the sample buttons, built once at import."""
+    return [{'name': name, 'fen': chess.Board(fen).fen()} for name, fen in SAMPLE_POSITIONS]
+
+app.add_template_global(_sample_positions(), 'sample_positions')
+
+def warm_sample_analyses():
+    """Analyze the sample positions on a background thread.
+
+    Fills the analysis cache and the result board image cache, so the first
+    click on a sample is answered without running an engine. Disabled with
+    ANALYZE_CHESS_WARM_SAMPLES=0.
+    """
+    if os.environ.get('ANALYZE_CHESS_WARM_SAMPLES', '1').lower() in ('0', 'false', 'no'):
+        return None
+
+    def run():
+        for name, fen in SAMPLE_POSITIONS:
+            try:
+                analysis = analyze_fen(fen, priority='low')
+            except Exception as e:
+                print(f"Warming sample '{name}' failed: {e}")
+                continue
+            placement = chess.Board(analysis['fen']).board_fen()
+            for move_key in ('stockfish_move', 'ai_move'):
+                if analysis[move_key]:
+                    _render_board_svg(placement, analysis[move_key], False, BOARD_SVG_SIZE)
+
+    thread = threading.Thread(target=run, name='warm-samples', daemon=True)
+    thread.start()
+    return thread
+
 def has_previous_engine():
     """Check if there's a previous engine version to rollback to"""
     import os
@@ -460,52 +801,62 @@ def analyze_chess_move():
     import os
     global engine_path
     # Determine current engine status and ensure variables are defined
-    current = engine_path or find_stockfish()
-    version = get_engine_version(current) if current else 'not installed'
-    latest_tag = get_latest_stockfish_tag()
+    engine = BUILD_INFO.engine(engine_path)
+    current = engine.path if engine else None
+    version = engine.version if engine else 'not installed'
+    # Outbound update checks run concurrently within one time budget
+    client = http_client.client()
+    deadline = client.deadline()
+    with timing.stage('checks'):
+        checks = client.gather({
+            'latest_tag': timing.wrap('check_stockfish', lambda: get_latest_stockfish_tag(deadline=deadline)),
+            'python_deps': timing.wrap('check_deps', lambda: get_python_dependencies_info(deadline=deadline)),
+            'app_version_info': timing.wrap('check_app', lambda: get_application_version_info(deadline=deadline)),
+        }, deadline)
+    latest_tag = checks['latest_tag'] if not isinstance(checks['latest_tag'], Exception) else None
     latest_num = _extract_numeric_version(latest_tag or '')
     curr_num = _extract_numeric_version(version)
     stockfish_update_available = bool(latest_num and curr_num and latest_num != curr_num)
     
     # Get Python dependencies information
-    python_deps = get_python_dependencies_info()
+    python_deps = checks['python_deps'] if not isinstance(checks['python_deps'], Exception) else []
     
     # Get application version information
-    app_version_info = get_application_version_info()
+    app_version_info = checks['app_version_info']
+    if isinstance(app_version_info, Exception):
+        app_version_info = {'current': 'Unknown', 'latest': 'Check failed', 'update_available': False, 'release_url': None}
     
     msg = request.args.get('msg', '')
+    job = PIP_JOBS.get(request.args.get('job', ''))
     current_fen = request.args.get('current_fen', '')
     
     # Handle FEN analysis
     fen = request.args.get('fen', '').strip()
     fen_result = None
+    busy = None
     if fen:
         try:
-            board = chess.Board(fen)
-            if not engine_path or not os.path.isfile(engine_path):
-                first_move = next(iter(board.legal_moves)) if board.legal_moves else None
-                stockfish_move = str(first_move) if first_move else "No legal moves available"
-                stockfish_board = board_to_html(board, first_move) if first_move else board_to_html(board)
+            analysis = analyze_fen(fen, priority='high')
+            board = chess.Board(analysis['fen'])
+            stockfish_best = chess.Move.from_uci(analysis['stockfish_move']) if analysis['stockfish_move'] else None
+            ai_best = chess.Move.from_uci(analysis['ai_move']) if analysis['ai_move'] else None
+            fen_result = {'stockfish': analysis['stockfish'], 'ai': analysis['ai']}
+            # The template shows the SVG image when there is a URL, else the inline board
+            if SVG_BOARDS:
+                with timing.stage('board_urls'):
+                    fen_result['stockfish_board_url'] = board_svg_url(board, stockfish_best)
+                    if ai_best:
+                        fen_result['ai_board_url'] = board_svg_url(board, ai_best)
             else:
-                try:
-                    engine = chess.engine.SimpleEngine.popen_uci(engine_path)
-                    result = engine.play(board, chess.engine.Limit(time=2.0))
-                    try:
-                        engine.quit()
-                    except Exception:
-                        pass
-                    stockfish_move = str(result.move)
-                    stockfish_board = board_to_html(board, result.move)
-                except Exception as e:
-                    stockfish_move = f"Engine error: {e}"
-                    stockfish_board = board_to_html(board)
-            # Fallback AI recommendation - simple chess logic
-            fallback_ai, ai_board = generate_fallback_recommendation(board)
+                fen_result['stockfish_board'] = board_to_html(board, stockfish_best)
+                fen_result['ai_board'] = board_to_html(board, ai_best) if ai_best else ""
+        except admission.Overloaded as e:
+            busy = e
             fen_result = {
-                'stockfish': stockfish_move, 
-                'stockfish_board': stockfish_board,
-                'ai': fallback_ai,
-                'ai_board': ai_board
+                'stockfish': f"The engines are busy, please try again in {e.retry_after} seconds",
+                'stockfish_board': "",
+                'ai': "-",
+                'ai_board': ""
             }
         except Exception as e:
             fen_result = {
@@ -515,524 +866,177 @@ def analyze_chess_move():
                 'ai_board': ""
             }
     
-    return render_template_string('''
-            <html>
-            <head>
-                <title>Analyze Next Best Chess Move!</title>
-                <link rel="icon" type="image/x-icon" href="/favicon.ico">
-                <style>
-                    body { 
-                        font-family: Arial, sans-serif; 
-                        max-width: 800px; 
-                        margin: 0 auto; 
-                        padding: 20px; 
-                        background: linear-gradient(135deg, #f3e7ff 0%, #e6d3ff 100%);
-                        min-height: 100vh;
-                    }
-                    .header { text-align: center; margin-bottom: 30px; color: #4a2c7a; }
-                    .main-form { 
-                        text-align: center; 
-                        margin-bottom: 30px; 
-                        padding: 20px; 
-                        background: rgba(255, 255, 255, 0.8); 
-                        border-radius: 12px; 
-                        box-shadow: 0 4px 15px rgba(116, 77, 169, 0.15);
-                        border: 1px solid #d4b3ff;
-                    }
-                    .fen-input { 
-                        padding: 10px; 
-                        font-size: 16px; 
-                        width: 400px; 
-                        border: 2px solid #c299ff; 
-                        border-radius: 6px; 
-                        background: rgba(255, 255, 255, 0.9);
-                    }
-                    .fen-input:focus { border-color: #9966ff; outline: none; box-shadow: 0 0 5px rgba(153, 102, 255, 0.3); }
-                    .submit-btn { 
-                        padding: 12px 30px; 
-                        font-size: 16px; 
-                        background: linear-gradient(135deg, #28a745 0%, #20c997 100%); 
-                        color: white; 
-                        border: none; 
-                        border-radius: 6px; 
-                        cursor: pointer; 
-                        margin-top: 10px;
-                        box-shadow: 0 2px 8px rgba(40, 167, 69, 0.3);
-                    }
-                    .fen-input.analyzed { background-color: #f0f8ff; color: #666; }
-                    .reset-btn { 
-                        padding: 12px 30px; 
-                        font-size: 16px; 
-                        background: linear-gradient(135deg, #6c757d 0%, #5a6268 100%); 
-                        color: white; 
-                        border: none; 
-                        border-radius: 6px; 
-                        cursor: pointer; 
-                        margin-top: 10px;
-                        margin-left: 10px;
-                        box-shadow: 0 2px 8px rgba(108, 117, 125, 0.3);
-                    }
-                    .reset-btn:hover { 
-                        background: linear-gradient(135deg, #5a6268 0%, #495057 100%); 
-                        transform: translateY(-1px);
-                        box-shadow: 0 4px 12px rgba(108, 117, 125, 0.4);
-                    }
-                    .sample-fens {
-                        margin: 15px 0;
-                        text-align: left;
-                    }
-                    .sample-fen-btn {
-                        display: inline-block;
-                        margin: 3px;
-                        padding: 5px 10px;
-                        background: linear-gradient(135deg, #8b5fbf 0%, #7048a3 100%);
-                        color: white;
-                        border: none;
-                        border-radius: 4px;
-                        cursor: pointer;
-                        font-size: 12px;
-                        text-decoration: none;
-                    }
-                    .sample-fen-btn:hover {
-                        background: linear-gradient(135deg, #7048a3 0%, #5d3d87 100%);
-                        transform: translateY(-1px);
-                    }
-
-                    .submit-btn:hover { 
-                        background: linear-gradient(135deg, #218838 0%, #1ea085 100%); 
-                        transform: translateY(-1px);
-                        box-shadow: 0 4px 12px rgba(40, 167, 69, 0.4);
-                    }
-                    .submit-btn:disabled {
-                        background: linear-gradient(135deg, #cccccc 0%, #999999 100%);
-                        cursor: not-allowed;
-                        opacity: 0.6;
-                        transform: none;
-                        box-shadow: none;
-                    }
-                    .submit-btn:disabled:hover {
-                        background: linear-gradient(135deg, #cccccc 0%, #999999 100%);
-                        transform: none;
-                        box-shadow: none;
-                    }
-                    .submit-btn.analyzed {
-                        background: linear-gradient(135deg, #6c757d 0%, #5a6268 100%);
-                        cursor: not-allowed;
-                        opacity: 0.6;
-                        transform: none;
-                        box-shadow: none;
-                    }
-                    .submit-btn.analyzed:hover {
-                        background: linear-gradient(135deg, #6c757d 0%, #5a6268 100%);
-                        transform: none;
-                        box-shadow: none;
-                    }
-                    .reset-btn.active { 
-                        background: linear-gradient(135deg, #28a745 0%, #20c997 100%); 
-                        box-shadow: 0 2px 8px rgba(40, 167, 69, 0.3);
-                    }
-                    .reset-btn.active:hover { 
-                        background: linear-gradient(135deg, #218838 0%, #1ea085 100%); 
-                        transform: translateY(-1px);
-                        box-shadow: 0 4px 12px rgba(40, 167, 69, 0.4);
-                    }
-                    .engine-buttons { 
-                        display: flex; 
-                        gap: 10px; 
-                        justify-content: center; 
-                        flex-wrap: wrap;
-                        margin-top: 10px;
-                    }
-                    .engine-btn { 
-                        padding: 8px 16px; 
-                        background: linear-gradient(135deg, #8b5fbf 0%, #7048a3 100%); 
-                        color: white; 
-                        border: none; 
-                        border-radius: 6px; 
-                        cursor: pointer;
-                        box-shadow: 0 2px 6px rgba(139, 95, 191, 0.3);
-                    }
-                    .engine-btn:hover { 
-                        background: linear-gradient(135deg, #7048a3 0%, #5d3d87 100%); 
-                        transform: translateY(-1px);
-                        box-shadow: 0 3px 8px rgba(139, 95, 191, 0.4);
-                    }
-                    .about-section { 
-                        background: rgba(255, 255, 255, 0.7); 
-                        padding: 15px; 
-                        border-radius: 12px; 
-                        margin-top: 20px; 
-                        border: 1px solid #d4b3ff;
-                        color: #4a2c7a;
-                    }
-                    .msg { 
-                        padding: 8px; 
-                        margin-bottom: 10px; 
-                        background: rgba(255, 255, 255, 0.8); 
-                        border: 1px solid #c299ff; 
-                        border-radius: 6px; 
-                        color: #4a2c7a;
-                    }
-                    h3 { color: #4a2c7a; margin-bottom: 15px; }
-                    .result-section {
-                        text-align: center;
-                        margin-bottom: 30px;
-                        padding: 20px;
-                        background: rgba(255, 255, 255, 0.8);
-                        border-radius: 12px;
-                        box-shadow: 0 4px 15px rgba(116, 77, 169, 0.15);
-                        border: 1px solid #d4b3ff;
-                    }
-                    .recommendations-wrapper {
-                        background: linear-gradient(135deg, #2c5530 0%, #1e3a22 100%);
-                        border: 3px solid #4a7c59;
-                        border-radius: 15px;
-                        padding: 25px;
-                        margin: 25px 0;
-                        box-shadow: 0 8px 25px rgba(44, 85, 48, 0.4);
-                    }
-                    .recommendations-header {
-                        color: #87ceeb !important;
-                        text-align: center;
-                        font-size: 1.5em;
-                        font-weight: bold;
-                        margin-bottom: 25px !important;
-                        text-shadow: 2px 2px 4px rgba(0,0,0,0.5);
-                        border-bottom: 2px solid #87ceeb;
-                        padding-bottom: 10px;
-                    }
-                    .recommendation-section {
-                        background: rgba(255, 255, 255, 0.1);
-                        border: 2px solid rgba(135, 206, 235, 0.3);
-                        border-radius: 12px;
-                        padding: 20px;
-                        margin-bottom: 20px;
-                    }
-                    .recommend-label {
-                        font-size: 1.3em;
-                        font-weight: bold;
-                        color: #87ceeb !important;
-                        margin-bottom: 12px !important;
-                        text-shadow: 1px 1px 2px rgba(0,0,0,0.7);
-                    }
-                    .recommend-value {
-                        font-size: 1.4em;
-                        color: #90EE90 !important;
-                        margin-bottom: 18px !important;
-                        font-weight: bold;
-                        text-shadow: 1px 1px 2px rgba(0,0,0,0.7);
-                        font-family: 'Courier New', monospace;
-                    }
-                 .board-container {
-                     display: flex;
-                     justify-content: center;
-                     margin: 15px auto;
-                 }
-                 .chess-board {
-                     border: 3px solid #8B4513;
-                     border-radius: 8px;
-                     padding: 5px;
-                     background: #DEB887;
-                     box-shadow: 0 4px 12px rgba(0,0,0,0.3);
-                 }
-                 .board-row {
-                     display: flex;
-                     margin: 0;
-                 }
-                 .chess-square {
-                     width: 35px;
-                     height: 35px;
-                     display: flex;
-                     align-items: center;
-                     justify-content: center;
-                     position: relative;
-                 }
-                 .chess-square.light {
-                     background-color: #F0D9B5;
-                 }
-                 .chess-square.dark {
-                     background-color: #B58863;
-                 }
-                 .chess-square.from-square {
-                     background-color: #FFE135 !important;
-                     box-shadow: inset 0 0 0 2px #FF6B35;
-                 }
-                 .chess-square.to-square {
-                     background-color: #90EE90 !important;
-                     box-shadow: inset 0 0 0 2px #228B22;
-                 }
-                 .chess-piece {
-                     font-size: 24px;
-                     font-weight: bold;
-                     text-shadow: 1px 1px 1px rgba(0,0,0,0.3);
-                 }
-                 .chess-piece.white {
-                     color: #FFFFFF;
-                     filter: drop-shadow(1px 1px 1px #000);
-                 }
-                 .chess-piece.black {
-                     color: #000000;
-                     filter: drop-shadow(1px 1px 1px #FFF);
-                 }
-                 .rank-label, .file-label {
-                     width: 35px;
-                     height: 35px;
-                     display: flex;
-                     align-items: center;
-                     justify-content: center;
-                     font-weight: bold;
-                     color: #8B4513;
-                     font-size: 12px;
-                 }
-                 .file-labels {
-                     margin-top: 2px;
-                 }
-                </style>
-                <script>
-                    function loadSampleFEN(fen) {
-                        document.getElementById('fen').value = fen;
-                        validateFENInput(); // Check if button should be enabled
-                    }
-                    
-                    function resetForm() {
-                        window.location.href = '/';
-                    }
-                    
-                    function validateFENInput() {
-                        const fenInput = document.getElementById('fen');
-                        const submitBtn = document.getElementById('submit-btn');
-                        
-                        if (fenInput.value.trim() === '') {
-                            submitBtn.disabled = true;
-                            submitBtn.title = 'Please enter a FEN position to analyze';
-                        } else {
-                            submitBtn.disabled = false;
-                            submitBtn.title = 'Click to analyze the chess position';
-                        }
-                    }
-                    
-                    function setAnalyzedState() {
-                        const submitBtn = document.getElementById('submit-btn');
-                        const resetBtn = document.querySelector('.reset-btn');
-                        
-                        // Make analyze button grey and disabled
-                        submitBtn.classList.add('analyzed');
-                        submitBtn.disabled = true;
-                        submitBtn.title = 'Analysis completed';
-                        
-                        // Make reset button green and active
-                        resetBtn.classList.add('active');
-                    }
-                    
-                    // Initialize button state and add event listener when page loads
-                    document.addEventListener('DOMContentLoaded', function() {
-                        const fenInput = document.getElementById('fen');
-                        validateFENInput(); // Check initial state
-                        
-                        // Add event listener for real-time validation
-                        fenInput.addEventListener('input', validateFENInput);
-                        fenInput.addEventListener('keyup', validateFENInput);
-                        fenInput.addEventListener('paste', function() {
-                            // Small delay to allow paste to complete
-                            setTimeout(validateFENInput, 10);
-                        });
-                        
-                        // Check if we're showing analysis results and set button states accordingly
-                        {% if fen_result %}
-                        setAnalyzedState();
-                        {% endif %}
-                    });
-                </script>
-
-            </head>
-            <body>
-                <div class="header">
-                    <img src="/assets/chess_icon.png" alt="Chess Icon" style="height:64px;vertical-align:middle;margin-right:12px;">
-                    <span style="font-size:2em;font-weight:bold;vertical-align:middle;">Analyze Next Best Chess Move!</span>
-                    <div style="margin-top: 10px; font-size: 14px; color: #6a5d7a;">
-                        Version {{ app_version_info.current }}
-                        {% if app_version_info.update_available %}
-                        <span style="margin-left: 10px; padding: 4px 8px; background: #ff9800; color: white; border-radius: 12px; font-size: 11px; font-weight: bold;">
-                            📋 Update Available: {{ app_version_info.latest }}
-                        </span>
-                        {% endif %}
-                    </div>
-                </div>
-                
-                {% if msg %}<div class="msg">{{msg}}</div>{% endif %}
-                
-                <div class="main-form">
-                    <!-- Helpful Links Section -->
-                    <div style="margin-bottom: 20px; padding: 15px; background: rgba(255, 255, 255, 0.1); border-radius: 8px; border: 1px solid #c299ff; text-align: center;">
-                        <div style="font-weight: bold; margin-bottom: 12px; color: #4a2c7a; font-size: 16px;">🔗 Helpful Resources</div>
-                        <div style="display: flex; flex-wrap: wrap; gap: 10px; justify-content: center;">
-                            <a href="https://lichess.org/editor" target="_blank" style="text-decoration: none; padding: 8px 15px; background: linear-gradient(135deg, #007bff 0%, #0056b3 100%); color: white; border-radius: 5px; font-size: 12px; font-weight: bold; box-shadow: 0 2px 5px rgba(0, 123, 255, 0.3);">
-                                ⚙️ Create FEN Position
-                            </a>
-                            <a href="https://www.chess.com" target="_blank" style="text-decoration: none; padding: 8px 15px; background: linear-gradient(135deg, #28a745 0%, #20c997 100%); color: white; border-radius: 5px; font-size: 12px; font-weight: bold; box-shadow: 0 2px 5px rgba(40, 167, 69, 0.3);">
-                                🏆 Play on Chess.com
-                            </a>
-                            <a href="https://www.chess.com/analysis" target="_blank" style="text-decoration: none; padding: 8px 15px; background: linear-gradient(135deg, #6f42c1 0%, #563d7c 100%); color: white; border-radius: 5px; font-size: 12px; font-weight: bold; box-shadow: 0 2px 5px rgba(111, 66, 193, 0.3);">
-                                📊 Chess.com Analysis
-                            </a>
-                            <a href="https://lichess.org/analysis" target="_blank" style="text-decoration: none; padding: 8px 15px; background: linear-gradient(135deg, #fd7e14 0%, #e55a00 100%); color: white; border-radius: 5px; font-size: 12px; font-weight: bold; box-shadow: 0 2px 5px rgba(253, 126, 20, 0.3);">
-                                🔍 Lichess Analysis
-                            </a>
-                        </div>
-                        <div style="font-size: 11px; color: #6a5d7a; margin-top: 8px; font-style: italic;">
-                            💡 Tip: Use "Create FEN Position" to set up any chess position, then copy the FEN notation back here
-                        </div>
-                    </div>
-                    
-                    <form action="/submit" method="post">
-                        <div style="margin-bottom: 15px;">
-                            <label for="fen" style="display: block; margin-bottom: 8px; font-weight: bold; font-size: 18px;">Enter FEN Position:</label>
-                            <input type="text" name="fen" id="fen" class="fen-input{% if fen_result %} analyzed{% endif %}" placeholder="Enter FEN notation here..." value="{{current_fen}}">
-                            <div style="font-size: 11px; color: #6a5d7a; margin-top: 5px; font-style: italic;">
-                                FEN (Forsyth-Edwards Notation) describes a chess position: piece placement, turn, castling rights, en passant, and move counts
-                            </div>
-                        </div>
-                                                <div class="sample-fens">
-                            <div style="font-weight: bold; margin-bottom: 8px; color: #4a2c7a;">Sample Positions:</div>
-                            <button type="button" class="sample-fen-btn" onclick="loadSampleFEN('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')">Starting Position</button>
-                            <button type="button" class="sample-fen-btn" onclick="loadSampleFEN('r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/3P1N2/PPP2PPP/RNBQK2R w KQkq - 4 4')">Scholar's Mate Setup</button>
-                            <button type="button" class="sample-fen-btn" onclick="loadSampleFEN('rnbqkbnr/ppp1pppp/8/3p4/2PP4/8/PP2PPPP/RNBQKBNR b KQkq c3 0 2')">Queen's Gambit</button>
-                            <button type="button" class="sample-fen-btn" onclick="loadSampleFEN('6k1/5ppp/8/8/8/2K5/5PPP/8 w - - 0 1')">Endgame Position</button>
-                            <button type="button" class="sample-fen-btn" onclick="loadSampleFEN('r3k2r/ppp2ppp/2n1bn2/2bpp3/2P5/2N1PN2/PPBP1PPP/R1BQKR2 w Qkq - 0 8')">Tactical Position</button>
-                        </div>
-                        
-                        <button type="submit" id="submit-btn" class="submit-btn" disabled title="Please enter a FEN position to analyze">Analyze Position</button>
-                        <button type="button" class="reset-btn" onclick="resetForm()">Reset</button>
-                    </form>
-                </div>
-
-                {% if fen_result %}
-                <div class="recommendations-wrapper">
-                    <h3 class="recommendations-header">Move Recommendations</h3>
-                    
-                    <div class="recommendation-section">
-                        <div class="recommend-label">Stockfish Recommendation:</div>
-                        <div class="recommend-value">{{fen_result['stockfish']}}</div>
-                        {% if fen_result['stockfish_board'] %}
-                        <div class="board-container">
-                            {{fen_result['stockfish_board']|safe}}
-                        </div>
-                        {% endif %}
-                    </div>
-                    
-                    <div class="recommendation-section">
-                        <div class="recommend-label">AI Recommendation (Built-in Chess Logic Engine):</div>
-                        <div class="recommend-value">{{fen_result['ai']}}</div>
-                        {% if fen_result['ai_board'] %}
-                        <div class="board-container">
-                            {{fen_result['ai_board']|safe}}
-                        </div>
-                        {% endif %}
-                        <div style="font-size: 12px; color: #b8e6b8; margin-top: 8px; font-style: italic; text-shadow: 1px 1px 2px rgba(0,0,0,0.8);">
-                            Generated using custom chess principles AI (evaluation-based move scoring)
-                        </div>
-                    </div>
-                </div>
-                {% endif %}
-
-                <div class="about-section">
-                    <h3>About</h3>
-                    <h4 style="color: #4a2c7a; margin-bottom: 20px; text-align: center; border-bottom: 2px solid #8e44ad; padding-bottom: 10px;">Component Management</h4>
-                    
-                    <!-- Application Version Section -->
-                    <div style="margin-bottom: 25px; padding: 15px; background-color: {% if app_version_info.update_available %}rgba(255, 152, 0, 0.1){% else %}rgba(142, 68, 173, 0.05){% endif %}; border: 1px solid {% if app_version_info.update_available %}#ff9800{% else %}#d4b3ff{% endif %}; border-radius: 8px;">
-                        <h4 style="color: #4a2c7a; margin-bottom: 15px; display: flex; align-items: center;">
-                            <span style="font-size: 20px; margin-right: 10px;">🚀</span>Chess Analysis Application 
-                            <span style="margin-left: 10px; font-size: 12px; color: #666; font-weight: normal;">← This App</span>
-                            {% if app_version_info.update_available %}
-                            <span style="margin-left: auto; padding: 4px 8px; background: #ff9800; color: white; border-radius: 12px; font-size: 11px; font-weight: bold;">
-                                📋 UPDATE AVAILABLE
-                            </span>
-                            {% endif %}
-                        </h4>
-                        <div style="margin-bottom: 10px;"><strong>Current Version:</strong> {{ app_version_info.current }}</div>
-                        <div style="margin-bottom: 10px;"><strong>Latest Available:</strong> {{ app_version_info.latest }}</div>
-                        <div style="margin-bottom: 15px;"><strong>Status:</strong> 
-                            <span style="color:{% if app_version_info.update_available %}orange{% else %}green{% endif %};font-weight:bold;">
-                                {% if app_version_info.update_available %}Update Available ({{ app_version_info.latest }}){% else %}Up to Date{% endif %}
-                            </span>
-                        </div>
-                        {% if app_version_info.update_available and app_version_info.release_url %}
-                        <div class="engine-buttons">
-                            <a href="{{ app_version_info.release_url }}" target="_blank" class="engine-btn" style="text-decoration: none; display: inline-block; color: white;">View Update</a>
-                        </div>
-                        {% endif %}
-                    </div>
-                    
-                    <!-- Stockfish Engine Section -->
-                    <div style="margin-bottom: 25px; padding: 15px; background-color: rgba(142, 68, 173, 0.05); border: 1px solid #d4b3ff; border-radius: 8px;">
-                        <h4 style="color: #4a2c7a; margin-bottom: 15px; display: flex; align-items: center;">
-                            <span style="font-size: 20px; margin-right: 10px;">♚</span>Stockfish Chess Engine
-                        </h4>
-                        {% if current %}
-                            <div style="margin-bottom: 10px;"><strong>Path:</strong> {{current}}</div>
-                            <div style="margin-bottom: 10px;"><strong>Current Version:</strong> {{version}}</div>
-                            {% if latest_tag %}<div style="margin-bottom: 10px;"><strong>Latest Available:</strong> {{latest_tag}}</div>{% endif %}
-                            <div style="margin-bottom: 15px;"><strong>Status:</strong> 
-                                <span style="color:{% if stockfish_update_available %}orange{% else %}green{% endif %};font-weight:bold;">
-                                    {% if stockfish_update_available %}Update Available ({{latest_tag}}){% else %}Up to Date{% endif %}
-                                </span>
-                            </div>
-                            <div class="engine-buttons">
-                                <form action="/update_engine_now" method="post" style="display: inline;">
-                                    <button type="submit" class="engine-btn" {% if not stockfish_update_available %}style="opacity: 0.5;" disabled{% endif %}>Update Now</button>
-                                </form>
-                                <form action="/rollback_engine_now" method="post" style="display: inline;">
-                                      <button type="submit" class="engine-btn" {% if not has_previous_engine() %}style="opacity: 0.5;" disabled{% endif %}>Rollback</button>
-                                </form>
-                            </div>
-                        {% else %}
-                            <div style="color:#b00; margin-bottom: 15px;">Engine not installed</div>
-                            <div class="engine-buttons">
-                                <form action="/update_engine_now" method="post" style="display: inline;">
-                                    <button type="submit" class="engine-btn">Install Engine</button>
-                                </form>
-                            </div>
-                        {% endif %}
-                    </div>
-                    
-                    <!-- Python Dependencies Sections -->
-                    {% for dep in python_deps %}
-                    <div style="margin-bottom: 25px; padding: 15px; background-color: rgba(142, 68, 173, 0.05); border: 1px solid #d4b3ff; border-radius: 8px;">
-                        <h4 style="color: #4a2c7a; margin-bottom: 15px; display: flex; align-items: center;">
-                            <span style="font-size: 20px; margin-right: 10px;">🐍</span>{{ dep.name }} Package
-                        </h4>
-                        <div style="margin-bottom: 10px;"><strong>Current Version:</strong> {{ dep.current_version }}</div>
-                        <div style="margin-bottom: 10px;"><strong>Latest Available:</strong> {{ dep.latest_version }}</div>
-                        <div style="margin-bottom: 15px;"><strong>Status:</strong> 
-                            <span style="color:{% if dep.update_available %}orange{% else %}green{% endif %};font-weight:bold;">
-                                {% if dep.update_available %}Update Available ({{ dep.latest_version }}){% else %}Up to Date{% endif %}
-                            </span>
-                        </div>
-                        <div class="engine-buttons">
-                            <form action="/update_package" method="post" style="display: inline;">
-                                <input type="hidden" name="package" value="{{ dep.name }}" />
-                                <input type="hidden" name="version" value="{{ dep.latest_version }}" />
-                                <button type="submit" class="engine-btn" {% if not dep.update_available %}style="opacity: 0.5;" disabled{% endif %}>Update Now</button>
-                            </form>
-                            <form action="/rollback_package" method="post" style="display: inline;">
-                                  <input type="hidden" name="package" value="{{ dep.name }}" />
-                                  <button type="submit" class="engine-btn" {% if not has_previous_package(dep.name) %}style="opacity: 0.5;" disabled{% endif %}>Rollback</button>
-                            </form>
-                        </div>
-                    </div>
-                    {% endfor %}
-                    
-                    <div style="text-align: center; margin-top: 20px; padding-top: 15px; border-top: 1px solid #d4b3ff; font-size: 12px; color: #7a6b93;">
-                        © 2025 Drake Svc LLC. All rights reserved.<br>
-                        <a href="https://github.com/AprilLorDrake" target="_blank" style="color: #8b5fbf; text-decoration: none; margin-top: 5px; display: inline-block;">
-                            GitHub: AprilLorDrake
-                        </a>
-                    </div>
-                  </div>
-              </body>
-              </html>
-        ''', current=current, version=version, latest_tag=latest_tag, stockfish_update_available=stockfish_update_available, python_deps=python_deps, app_version_info=app_version_info, msg=msg, fen_result=fen_result, current_fen=current_fen, has_previous_engine=has_previous_engine, has_previous_package=has_previous_package)
+    with timing.stage('template'):
+        page = render_template('index.html', current=current, version=version, latest_tag=latest_tag, stockfish_update_available=stockfish_update_available, python_deps=python_deps, app_version_info=app_version_info, msg=msg, job=job, fen_result=fen_result, current_fen=current_fen, has_previous_engine=has_previous_engine, has_previous_package=has_previous_package)
+    if busy is not None:
+        return page, 429, {'Retry-After': str(busy.retry_after)}
+    return page
+
+# --- JSON API + STATIC SHELL ---
+def _analysis_json(analysis):
+    board = chess.Board(analysis['fen'])
+    result = {'fen': analysis['fen']}
+    for key in ('stockfish', 'ai'):
+        move = chess.Move.from_uci(analysis[f'{key}_move']) if analysis[f'{key}_move'] else None
+        result[key] = {
+            'text': analysis[key],
+            'move': analysis[f'{key}_move'],
+            'board_url': board_svg_url(board, move),
+        }
+    return result
+
+@app.route('/api/v1/analyze', methods=['GET', 'POST'])
+def api_analyze():
+    """Analyze a FEN and return only the result as JSON.
+
+    Accepts ?fen=... or a POSTed form / JSON body with a "fen" field.
+    """
+    from flask import jsonify
+    fen = request.values.get('fen', '')
+    if not fen and request.is_json:
+        body = request.get_json(silent=True)
+        if body is not None and not isinstance(body, dict):
+            return jsonify(error='Expected a JSON object with a "fen" field'), 400
+        fen = (body or {}).get('fen', '')
+    fen = str(fen).strip()
+    if not fen:
+        return jsonify(error='Please enter a FEN position'), 400
+    try:
+        analysis = analyze_fen(fen)
+    except ValueError as e:
+        return jsonify(error=f"Invalid FEN: {e}"), 400
+    except admission.Overloaded as e:
+        body, headers = _busy_json(e)
+        return jsonify(body), 429, headers
+    return jsonify(_analysis_json(analysis))
+
+# --- ASYNC (ASGI) SERVING ---
+# `python app.py asgi` (or any ASGI server with app:asgi_application as a
+# factory) answers the analysis API from one event loop: handlers await
+# engine searches on an AsyncEnginePool, so a slow client or a queued search
+# costs a coroutine rather than a thread. Every other route runs through
+# Flask on a small thread pool.
+def _analysis_json_outside_request(analysis):
+    with app.test_request_context():
+        return _analysis_json(analysis)
+
+async def api_analyze_async(req):
+    """GET /api/v1/analyze?fen=... on the event loop; same JSON as api_analyze."""
+    from analyze_chess.aio import JSONResponse
+    fen = req.args.get('fen', '').strip()
+    if not fen:
+        return JSONResponse({'error': 'Please enter a FEN position'}, 400)
+    try:
+        analysis = await analyze_fen_async(fen)
+    except ValueError as e:
+        return JSONResponse({'error': f"Invalid FEN: {e}"}, 400)
+    except admission.Overloaded as e:
+        body, headers = _busy_json(e)
+        return JSONResponse(body, 429, headers)
+    return JSONResponse(_analysis_json_outside_request(analysis))
+
+def _score_json(score):
+    white = score.white()
+    return {'cp': white.score(), 'mate': white.mate()}
+
+async def api_analyze_stream(req):
+    """GET /api/v1/analyze/stream?fen=... as server-sent events.
+
+    Sends an "ai" event with the fallback move, "info" events (depth, score
+    from White's side, principal variation) while Stockfish searches, and a
+    final "done" event carrying the same JSON as /api/v1/analyze. Cached
+    positions get "done" straight away; others must be admitted first and
+    get a 429 JSON answer when the engines are saturated.
+    """
+    import asyncio
+    from chess.engine import Limit
+    from analyze_chess.aio import EventStreamResponse, JSONResponse
+    fen = req.args.get('fen', '').strip()
+    if not fen:
+        return JSONResponse({'error': 'Please enter a FEN position'}, 400)
+    try:
+        board = chess.Board(fen)
+    except ValueError as e:
+        return JSONResponse({'error': f"Invalid FEN: {e}"}, 400)
+    cached = _cached_analysis(board)
+    control = get_admission() if cached is None else None
+    ticket = None
+    if control is not None:
+        try:
+            ticket = await control.acquire_async('normal')
+        except admission.Overloaded as e:
+            body, headers = _busy_json(e)
+            return JSONResponse(body, 429, headers)
+
+    async def events():
+        if cached is not None:
+            yield 'done', _analysis_json_outside_request(cached)
+            return
+        ai_text, ai_best = await asyncio.get_running_loop().run_in_executor(None, fallback_move, board.copy())
+        yield 'ai', {'text': ai_text, 'move': ai_best.uci() if ai_best else None}
+        pool = get_async_engine_pool()
+        if pool is None or board.is_game_over():
+            if pool is None:
+                ENGINE_UNAVAILABLE.labels('no_engine').inc()
+            stockfish_text, stockfish_best = _first_legal_move(board)
+        else:
+            stockfish_best = None
+            last_info = {}
+            started = time.perf_counter()
+            try:
+                async for info in pool.analysis(board, Limit(time=ENGINE_THINK_TIME)):
+                    last_info.update(info)
+                    pv = info.get('pv') or []
+                    if pv:
+                        stockfish_best = pv[0]
+                    if 'depth' in info and 'score' in info:
+                        yield 'info', {'depth': info['depth'], 'score': _score_json(info['score']),
+                                       'pv': [move.uci() for move in pv]}
+                stockfish_text = str(stockfish_best) if stockfish_best else "No legal moves available"
+                _record_search('stream', last_info, time.perf_counter() - started)
+            except Exception as e:
+                ENGINE_UNAVAILABLE.labels('error').inc()
+                stockfish_text, stockfish_best = f"Engine error: {e}", None
+        analysis = _store_analysis(board, stockfish_text, stockfish_best, ai_text, ai_best)
+        yield 'done', _analysis_json_outside_request(analysis)
+
+    # The turn is held until the stream ends or the client goes away
+    return EventStreamResponse(events(), on_close=(lambda: control.release(ticket)) if ticket is not None else None)
+
+def asgi_application():
+    """ASGI app for the async serving mode (`uvicorn --factory app:asgi_application`)."""
+    import asyncio
+    from analyze_chess.aio import AsgiApp
+
+    async def use_async_engines():
+        # Page routes run on the WSGI threads; their searches go to this
+        # loop's AsyncEnginePool too, so the engine budget is not doubled
+        global _serving_loop, _engine_pool
+        _serving_loop = asyncio.get_running_loop()
+        with _engine_pool_lock:
+            pool, _engine_pool = _engine_pool, None
+        if pool is not None:
+            pool.close()
+
+    async def close_engines():
+        global _async_engine_pool, _serving_loop
+        _serving_loop = None
+        pool, _async_engine_pool = _async_engine_pool, None
+        if pool is not None:
+            await pool.close()
+
+    return AsgiApp(app, routes={
+        '/api/v1/analyze': {'GET': api_analyze_async},
+        '/api/v1/analyze/stream': {'GET': api_analyze_stream},
+    }, on_startup=[use_async_engines], on_shutdown=[close_engines], observe=observe_request, threads=int(os.environ.get('ANALYZE_CHESS_THREADS', 0)) or 8)
+
+@app.get('/app')
+def app_shell():
+    """Front end that talks to /api/v1/analyze; only the asset fingerprints vary."""
+    response = app.make_response(render_template('shell.html'))
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/submit', methods=['POST'])
 def submit():
@@ -1052,6 +1056,8 @@ def update_engine_now():
     if path:
         global engine_path
         engine_path = path
+        BUILD_INFO.invalidate_engine()
+        reset_engine_pool()
         return redirect(url_for('analyze_chess_move', msg=f'Engine installed: {os.path.basename(path)}'))
     return redirect(url_for('analyze_chess_move', msg='Engine update failed. Check logs.'))
 
@@ -1071,6 +1077,40 @@ def schedule_update():
     else:
         return redirect(url_for('analyze_chess_move', msg='Unknown update type.'))
 
+# Pre-fork workers each hold their own engine_path. The worker that installs
+# or rolls back an engine records the choice in .engine_selected; the others
+# pick it up from there before their next request, so they all ask the
+# broker for the same binary.
+_follow_selection = False
+_selection_seen = None
+
+def _selection_stamp():
+    try:
+        st = os.stat(_paths()['selected'])
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def follow_engine_selection():
+    """Adopt .engine_selected changes made by other processes from now on."""
+    global _follow_selection, _selection_seen
+    _selection_seen = _selection_stamp()
+    _follow_selection = True
+
+@app.before_request
+def _sync_engine_selection():
+    global engine_path, _selection_seen
+    if not _follow_selection:
+        return
+    stamp = _selection_stamp()
+    if stamp == _selection_seen:
+        return
+    _selection_seen = stamp
+    chosen = _read_text(_paths()['selected'])
+    if chosen and os.path.isfile(chosen) and chosen != engine_path:
+        engine_path = chosen
+        BUILD_INFO.invalidate_engine()
+
 @app.post('/rollback_engine_now')
 def rollback_engine_now():
     import os
@@ -1080,51 +1120,278 @@ def rollback_engine_now():
         _write_text(p['selected'], prev)
         global engine_path
         engine_path = prev
+        BUILD_INFO.invalidate_engine()
+        reset_engine_pool()
         return redirect(url_for('analyze_chess_move', msg='Rolled back to previous engine.'))
     return redirect(url_for('analyze_chess_move', msg='No previous engine to rollback to.'))
 
 @app.errorhandler(500)
 def handle_internal_error(err):
     # Generic friendly error page with actions
-    return render_template_string('''
-        <html><body>
-        <div style="padding:8px;margin-bottom:10px;background:#fee;border:1px solid #c99;">
-          <strong>Unexpected error:</strong> {{err}}
-        </div>
-        <div style="display:flex;gap:10px;margin-bottom:16px;">
-          <form action="/update_engine_now" method="post"><button type="submit">Update Engine Now</button></form>
-          <form action="/schedule_update" method="post"><input type="hidden" name="what" value="engine" /><button type="submit">Update Engine Next Launch</button></form>
-          <form action="/schedule_update" method="post"><input type="hidden" name="what" value="deps" /><button type="submit">Update Packages Next Launch</button></form>
-          <form action="/rollback_engine_now" method="post"><button type="submit">Rollback Engine</button></form>
-        </div>
-        <div><a href="{{url_for('analyze_chess_move')}}">Go to Home</a></div>
-        </body></html>
-    ''', err=str(err)), 500
+    return render_template('error.html', err=str(err)), 500
+
+# --- BOARD IMAGES ---
+def _board_image_params():
+    """Normalized (placement, move, flip, size) from the query string.
+
+    Raises ValueError for an invalid FEN, move or size.
+    """
+    fen = request.args.get('fen', '').strip()
+    placement = chess.BaseBoard(fen.split()[0] if fen else chess.STARTING_BOARD_FEN).board_fen()
+    move = request.args.get('move', '').strip()
+    move = chess.Move.from_uci(move).uci() if move else ''
+    size = min(max(int(request.args.get('size', BOARD_SVG_SIZE)), 64), 1024)
+    flip = request.args.get('flip', '').lower() in ('1', 'true', 'yes')
+    return placement, move, flip, size
+
+def _board_image_response(kind, render, mimetype):
+    """Conditional, long-cacheable response for a board image.
+
+    The strong ETag covers the normalized inputs and the renderer version,
+    so If-None-Match hits are answered with 304 before anything is rendered.
+    Only URLs carrying the current ?v= (as built by board_svg_url) are
+    immutable; others revalidate, so an upgrade is picked up.
+    """
+    import hashlib
+    from flask import Response
+    try:
+        placement, move, flip, size = _board_image_params()
+    except ValueError:
+        return 'Invalid board parameters', 400
+    version = board_image_version()
+    etag = hashlib.sha1(f"{kind}|{version}|{placement}|{move}|{int(flip)}|{size}".encode('utf-8')).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(render(placement, move or None, flip, size), mimetype=mimetype)
+    response.set_etag(etag)
+    if request.args.get('v') == version:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'public, no-cache'
+    return response
+
+@app.get('/board.svg')
+def board_svg():
+    """SVG board image; the response depends only on the normalized query."""
+    return _board_image_response('svg', _render_board_svg, 'image/svg+xml')
+
+@functools.lru_cache(maxsize=256)
+def _render_board_png(placement, move_uci, flip_board, size):
+    from analyze_chess import thumbnails
+    move = chess.Move.from_uci(move_uci) if move_uci else None
+    return thumbnails.render_png(chess.BaseBoard(placement), size, move, flip_board)
+
+@app.get('/board.png')
+def board_png():
+    """PNG board thumbnail (social previews, study sheets); needs Pillow."""
+    from analyze_chess import thumbnails
+    if not thumbnails.available():
+        return 'PNG rendering requires Pillow', 501
+    return _board_image_response('png', _render_board_png, 'image/png')
 
 # --- ASSETS ROUTE ---
+# Files under ./static and ./assets are served from memory with content-hash
+# ETags and precompressed variants. URLs built with asset_url() carry the hash
+# as ?v=..., so those responses can be cached forever; anything else is
+# revalidated with the ETag.
+_ASSET_STORES = {
+    'static': assets.AssetStore(app.static_folder),
+    'serve_assets': assets.AssetStore(os.path.join(os.path.dirname(__file__), 'assets')),
+}
+
+def asset_url(filename, endpoint='static'):
+    """Fingerprinted URL for a file in ./static (or ./assets with endpoint='serve_assets')."""
+    fingerprint = _ASSET_STORES[endpoint].fingerprint(filename)
+    if fingerprint is None:
+        return url_for(endpoint, filename=filename)
+    return url_for(endpoint, filename=filename, v=fingerprint)
+
+app.add_template_global(asset_url)
+
+def _send_asset(endpoint, filename):
+    from flask import Response, abort
+    asset = _ASSET_STORES[endpoint].get(filename)
+    if asset is None:
+        abort(404)
+    encoding = assets.negotiate(request.accept_encodings) if assets.compressible(asset.mimetype) else None
+    body = asset.variant(encoding)
+    if body is None:
+        body, encoding = asset.data, None
+    response = Response(body, mimetype=asset.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if assets.compressible(asset.mimetype):
+        response.vary.add('Accept-Encoding')
+    response.set_etag(f"{asset.digest}-{encoding}" if encoding else asset.digest)
+    if request.args.get('v') == asset.fingerprint:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def static_files(filename):
+    return _send_asset('static', filename)
+
+app.view_functions['static'] = static_files
+
 @app.route('/assets/<path:filename>')
 def serve_assets(filename):
-    import os
-    from flask import send_from_directory
-    assets_dir = os.path.join(os.path.dirname(__file__), 'assets')
-    return send_from_directory(assets_dir, filename)
+    return _send_asset('serve_assets', filename)
 
 @app.route('/favicon.ico')
 def favicon():
-    import os
-    from flask import send_from_directory
-    assets_dir = os.path.join(os.path.dirname(__file__), 'assets')
-    return send_from_directory(assets_dir, 'chess_icon.ico')
+    return _send_asset('serve_assets', 'chess_icon.ico')
+
+# --- REQUEST TIMING ---
+# Stage timings (analyze_chess.timing) go out as a Server-Timing header and,
+# for slow or sampled requests, one JSON log line. Registered before
+# compress_response, like the metrics hook below, so 'compress' is included.
+@app.after_request
+def report_request_timing(response):
+    timer = timing.current()
+    if timer is None:
+        return response
+    total = timer.elapsed()
+    if timing.SERVER_TIMING:
+        response.headers['Server-Timing'] = timer.server_timing(total)
+    if timer.should_log(total):
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        timing.emit(timer.record(total, method=request.method, route=route, path=request.path,
+                                 status=response.status_code))
+    return response
+
+@app.teardown_request
+def _finish_request_timing(exc):
+    token = request.environ.pop('analyze_chess.timer_token', None)
+    if token is not None:
+        timing.finish(token)
+
+# --- METRICS ---
+# Prometheus text format at /metrics (analyze_chess.metrics, no client
+# library). Latency is recorded per URL rule, so /board.svg?fen=... is one
+# series. This after_request hook is registered before compress_response and
+# therefore runs after it: the recorded time includes compression.
+REQUEST_SECONDS = REGISTRY.histogram(
+    'analyze_chess_request_seconds', 'Time to produce a response, by route.', ['route', 'method'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+REQUESTS = REGISTRY.counter(
+    'analyze_chess_requests_total', 'Responses by route and status code.', ['route', 'method', 'status'])
+
+def observe_request(route, method, status, seconds):
+    REQUEST_SECONDS.labels(route, method).observe(seconds)
+    REQUESTS.labels(route, method, status).inc()
+
+@app.after_request
+def record_request_metrics(response):
+    started = request.environ.get('analyze_chess.started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_request(route, request.method, response.status_code, time.perf_counter() - started)
+    return response
+
+def _pool_stats():
+    pools = []
+    sync_pool = _engine_pool
+    if sync_pool is None and os.environ.get('ANALYZE_CHESS_ENGINE_BROKER'):
+        # Any worker can report the broker's pool, searched through it or not
+        sync_pool = get_engine_pool()
+    for name, pool in (('sync', sync_pool), ('async', _async_engine_pool)):
+        if pool is not None:
+            pools.append((name, pool.stats()))
+    return pools
+
+# Pre-fork workers all report the broker's one pool (a broker round trip), so
+# only the worker answering a scrape reads it
+REGISTRY.callback('analyze_chess_engine_pool_size', 'Engines the pool may run.',
+                  lambda: [((name, ), stats.get('size', 0)) for name, stats in _pool_stats()], labelnames=['pool'],
+                  shared=False)
+REGISTRY.callback('analyze_chess_engine_pool_started', 'Engine processes currently running.',
+                  lambda: [((name, ), stats.get('started', 0)) for name, stats in _pool_stats()], labelnames=['pool'],
+                  shared=False)
+REGISTRY.callback('analyze_chess_engine_pool_busy', 'Engines checked out by a search.',
+                  lambda: [((name, ), stats.get('started', 0) - stats.get('idle', 0)) for name, stats in _pool_stats()],
+                  labelnames=['pool'], shared=False)
+def _admission_stats():
+    return _admission.stats() if _admission is not None else {}
+
+REGISTRY.callback('analyze_chess_admission_in_flight', 'Analyses currently admitted.',
+                  lambda: _admission_stats().get('in_flight'))
+REGISTRY.callback('analyze_chess_admission_waiting', 'Analyses queued for admission.',
+                  lambda: list(((priority, ), n) for priority, n in _admission_stats().get('waiting', {}).items()),
+                  labelnames=['priority'])
+REGISTRY.callback('analyze_chess_admission_drain_rate', 'Analyses expected to finish per second.',
+                  lambda: _admission_stats().get('drain_rate'))
+REGISTRY.callback('analyze_chess_analysis_cache_entries', 'Analyses held in the analysis cache.',
+                  lambda: len(_analysis_cache))
+
+def _board_cache_lookups():
+    for name, cached in (('html', _render_board), ('svg', _render_board_svg), ('png', _render_board_png)):
+        info = cached.cache_info()
+        yield (name, 'hit'), info.hits
+        yield (name, 'miss'), info.misses
+
+REGISTRY.callback('analyze_chess_board_cache_lookups_total', 'Rendered board cache lookups by result.',
+                  _board_cache_lookups, type='counter', labelnames=['cache', 'result'])
+
+@app.get('/metrics')
+def metrics_endpoint():
+    from flask import Response
+    response = Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli for dynamic HTML, JSON and SVG responses."""
+    # Responses that vary on Accept-Encoding already (static files) were negotiated by their view
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers or 'Accept-Encoding' in response.vary
+            or not assets.compressible(response.mimetype)):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    encoding = assets.negotiate(request.accept_encodings)
+    if encoding is None or len(data) < assets.MIN_SIZE:
+        return response
+    with timing.stage('compress'):
+        compressed = assets.compress(data, encoding)
+    if len(compressed) >= len(data):
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # Like nginx: a strong ETag names the identity bytes, so the compressed
+    # representation only keeps it as a weak validator
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
 
 # --- HEALTH CHECK (add near your other routes) ---
 @app.get("/__ac_health")
 def ac_health():
     # return a fixed token the launcher will look for
+    if request.args.get('verbose'):
+        from flask import jsonify
+        # Startup milestones in seconds since the process started
+        return jsonify(status='analyze_chess_ok', pid=os.getpid(), startup=startup.timeline(),
+                       admission=_admission_stats() or None)
     return "analyze_chess_ok"
 
+@app.before_request
+def _start_request():
+    request.environ['analyze_chess.started'] = time.perf_counter()
+    request.environ['analyze_chess.timer_token'] = timing.start()[1]
+    startup.mark('first_request')
+
+# --- PACKAGE UPDATE JOBS ---
+# pip runs in the background, one at a time; the page follows the job's log
+# through /jobs/<id> instead of holding a worker for the whole install.
+PIP_JOBS = JobRunner()
+PIP_TIMEOUT = 120
+
 @app.route('/update_package', methods=['POST'])
 def update_package():
-    import subprocess
     import sys
     
     package = request.form.get('package', '').strip()
@@ -1133,32 +1400,20 @@ def update_package():
     if not package:
         return redirect(url_for('analyze_chess_move', msg=f"Error: No package specified"))
     
-    try:
-        # Update the specific package
-        if version:
-            cmd = [sys.executable, '-m', 'pip', 'install', f'{package}=={version}']
-        else:
-            cmd = [sys.executable, '-m', 'pip', 'install', '--upgrade', package]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        
-        if result.returncode == 0:
-            msg = f"Successfully updated {package}"
-            if version:
-                msg += f" to version {version}"
-        else:
-            msg = f"Failed to update {package}: {result.stderr}"
-            
-    except subprocess.TimeoutExpired:
-        msg = f"Timeout while updating {package}"
-    except Exception as e:
-        msg = f"Error updating {package}: {str(e)}"
+    # Update the specific package
+    if version:
+        cmd = [sys.executable, '-m', 'pip', 'install', f'{package}=={version}']
+        success_msg = f"Successfully updated {package} to version {version}"
+    else:
+        cmd = [sys.executable, '-m', 'pip', 'install', '--upgrade', package]
+        success_msg = f"Successfully updated {package}"
     
-    return redirect(url_for('analyze_chess_move', msg=msg))
+    job = PIP_JOBS.submit(f"Updating {package}", cmd, timeout=PIP_TIMEOUT,
+                          success_msg=success_msg, failure_msg=f"Failed to update {package}")
+    return redirect(url_for('analyze_chess_move', job=job.id))
 
 @app.route('/rollback_package', methods=['POST'])
 def rollback_package():
-    import subprocess
     import sys
     
     package = request.form.get('package', '').strip()
@@ -1166,24 +1421,35 @@ def rollback_package():
     if not package:
         return redirect(url_for('analyze_chess_move', msg=f"Error: No package specified"))
     
-    try:
-        # Get package history or downgrade to a previous version
-        # For now, we'll reinstall the current version (force reinstall)
-        cmd = [sys.executable, '-m', 'pip', 'install', '--force-reinstall', package]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        
-        if result.returncode == 0:
-            msg = f"Successfully reinstalled {package}"
-        else:
-            msg = f"Failed to rollback {package}: {result.stderr}"
-            
-    except subprocess.TimeoutExpired:
-        msg = f"Timeout while rolling back {package}"
-    except Exception as e:
-        msg = f"Error rolling back {package}: {str(e)}"
-    
-    return redirect(url_for('analyze_chess_move', msg=msg))
+    # Get package history or downgrade to a previous version
+    # For now, we'll reinstall the current version (force reinstall)
+    cmd = [sys.executable, '-m', 'pip', 'install', '--force-reinstall', package]
+    job = PIP_JOBS.submit(f"Reinstalling {package}", cmd, timeout=PIP_TIMEOUT,
+                          success_msg=f"Successfully reinstalled {package}",
+                          failure_msg=f"Failed to rollback {package}")
+    return redirect(url_for('analyze_chess_move', job=job.id))
+
+@app.get('/jobs/<job_id>')
+def job_status(job_id):
+    """Job state as JSON; ?since=N returns only log lines from index N."""
+    from flask import jsonify
+    job = PIP_JOBS.get(job_id)
+    if job is None:
+        return jsonify(error='Unknown job'), 404
+    return jsonify(job.to_dict(since=request.args.get('since', 0, type=int)))
+
+@app.get('/jobs/<job_id>/log')
+def job_log(job_id):
+    """The job's output as a text/plain stream that ends when the job does."""
+    from flask import Response, stream_with_context
+    job = PIP_JOBS.get(job_id)
+    if job is None:
+        return 'Unknown job', 404
+    lines = (line + '\n' for line in job.follow())
+    response = Response(stream_with_context(lines), mimetype='text/plain')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 # Optional: standard Flask entry point
 import socket
@@ -1202,9 +1468,9 @@ def find_free_port(default_port=5002):
         s2.close()
         return port
 
-import webbrowser
-import os
-if __name__ == "__main__":
+def prepare_engine(interactive=True, warm=True):
+    """Locate Stockfish (offering to install it when interactive) and warm the caches."""
+    global engine_path
     # Auto-discover the engine if not explicitly set
     stockfish_path = engine_path or find_stockfish()
     # If not found, and running interactively, offer to download and install
@@ -1221,14 +1487,13 @@ if __name__ == "__main__":
             Returns the absolute path to the installed executable on success, or
             None on failure.
             """
-            try:
-                import requests, zipfile, io, tempfile
-            except ImportError:
+            import zipfile, io, tempfile
+            if not http_client.client().available():
                 print("requests package not available; cannot auto-install Stockfish.")
                 return None
             url = "https://github.com/official-stockfish/Stockfish/releases/latest/download/stockfish-windows-x86-64-avx2.zip"
             try:
-                resp = requests.get(url, timeout=30)
+                resp = http_client.client().session().get(url, timeout=30)
                 resp.raise_for_status()
                 with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
                     exe_candidates = [f for f in z.namelist() if f.lower().endswith('.exe')]
@@ -1261,7 +1526,7 @@ if __name__ == "__main__":
                 print(f"Stockfish install failed: {e}")
                 return None
 
-        if sys.stdin and sys.stdin.isatty():
+        if interactive and sys.stdin and sys.stdin.isatty():
             resp = input("Stockfish engine not found. Download and install Stockfish into './bin'? [Y/n]: ").strip().lower()
             if resp in ('', 'y', 'yes'):
                 print('Downloading Stockfish...')
@@ -1281,19 +1546,268 @@ if __name__ == "__main__":
         engine_path = stockfish_path
         if os.path.isfile(stockfish_path) and is_file_locked(stockfish_path):
             print(f"ERROR: The Stockfish engine file '{stockfish_path}' is locked by another process.\nPlease close all Python, Flask, or Stockfish windows and try again.")
-            input("Press Enter to exit...")
-            exit(1)
+            if interactive:
+                input("Press Enter to exit...")
+            raise SystemExit(1)
     else:
         print("Stockfish executable not found; engine features will fallback to a legal-move response.")
-    port = int(os.environ.get("PORT", 5000))
-    host = os.environ.get("HOST", "0.0.0.0")
-    print(f"Starting Analyze Chess Flask app on http://{host}:{port}/analyze_chess_move ...")
+    if warm:
+        # `stockfish --version` and `git describe` run beside the first requests, not before them
+        BUILD_INFO.warm_in_background(engine_path)
+        warm_sample_analyses()
+    else:
+        BUILD_INFO.warm(engine_path)
+    startup.mark('engine_ready')
+
+def serve(host, port, threads=None, connection_limit=None, backlog=None, channel_timeout=None):
+    """Run the app under waitress (production).
+
+    The thread count defaults to the engine pool size plus a few threads for
+    cache hits, static files and the JSON API, so analysis requests queue on
+    the pool rather than on the socket.
+    """
+    from waitress import serve as waitress_serve
+    from analyze_chess.engine_pool import default_size
+    threads = threads or int(os.environ.get('ANALYZE_CHESS_THREADS', 0)) or default_size() + 4
+    settings = {
+        'threads': threads,
+        'connection_limit': connection_limit or int(os.environ.get('ANALYZE_CHESS_CONNECTION_LIMIT', 100)),
+        'backlog': backlog or int(os.environ.get('ANALYZE_CHESS_BACKLOG', 1024)),
+        'channel_timeout': channel_timeout or int(os.environ.get('ANALYZE_CHESS_CHANNEL_TIMEOUT', 30)),
+    }
+    print(f"Serving Analyze Chess with waitress on http://{host}:{port}/analyze_chess_move "
+          f"({', '.join(f'{k}={v}' for k, v in settings.items())}, engines={default_size()})")
+    startup.mark('listening')
+    waitress_serve(app, host=host, port=port, ident='analyze-chess', **settings)
+
+def prefork(host, port, workers, threads=None, connection_limit=None, backlog=None, channel_timeout=None):
+    """Run `workers` waitress processes on one listening socket (Unix only).
+
+    The parent binds the socket, starts the engine broker process that owns
+    the Stockfish pool and forks the workers, restarting any that exit. Each
+    worker talks to the broker over a Unix socket, so Python-side work
+    (fallback search, board rendering, templates) runs on every core while
+    the engines are started only once. Update jobs, the pip lock, the
+    selected engine and the metrics are shared through files, so any worker
+    sees them.
+    """
+    import signal
+    import socket
+    import tempfile
+    from analyze_chess import engine_broker
+    from analyze_chess.engine_pool import default_size
+
+    backlog = backlog or int(os.environ.get('ANALYZE_CHESS_BACKLOG', 1024))
+    listener = socket.create_server((host, port), backlog=backlog)
+    broker_dir = tempfile.mkdtemp(prefix='analyze-chess-')
+    broker_socket = os.path.join(broker_dir, 'engines.sock')
+    # The broker and every worker publish their metrics here; /metrics on
+    # any worker merges them
+    os.environ['ANALYZE_CHESS_METRICS_DIR'] = os.path.join(broker_dir, 'metrics')
+    broker = engine_broker.start_broker(broker_socket, engine_path, default_size())
+    os.environ['ANALYZE_CHESS_ENGINE_BROKER'] = broker_socket
+    # Any worker may serve the status of a job another one started, and pip
+    # runs must stay one at a time across all of them
+    PIP_JOBS.share(os.path.join(broker_dir, 'jobs'))
+    # Workers admit analyses independently; split the engines between them
+    os.environ.setdefault('ANALYZE_CHESS_ADMIT_CONCURRENCY', str(max(1, -(-default_size() // workers))))
+    print(f"Engine broker (pid {broker.pid}) on {broker_socket}; starting {workers} workers")
+
+    def run_worker():
+        from waitress import serve as waitress_serve
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        follow_engine_selection()
+        share_from_environment()
+        # Every worker fills its own cache; the broker runs each sample's
+        # search once and hands the result to all of them
+        warm_sample_analyses()
+        startup.mark('listening')
+        waitress_serve(app, sockets=[listener], ident='analyze-chess',
+                       threads=threads or int(os.environ.get('ANALYZE_CHESS_THREADS', 0)) or 4,
+                       connection_limit=connection_limit or int(os.environ.get('ANALYZE_CHESS_CONNECTION_LIMIT', 100)),
+                       channel_timeout=channel_timeout or int(os.environ.get('ANALYZE_CHESS_CHANNEL_TIMEOUT', 30)))
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker()
+            finally:
+                os._exit(0)
+        return pid
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    children = set()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        children.add(spawn())
+    print(f"Serving Analyze Chess on http://{host}:{port}/analyze_chess_move with {workers} worker processes")
+    try:
+        while children:
+            try:
+                pid, status = os.wait()
+            except InterruptedError:
+                continue
+            except ChildProcessError:
+                break
+            if pid == broker.pid:
+                if not stopping:
+                    print('Engine broker exited; restarting it')
+                    broker = engine_broker.start_broker(broker_socket, engine_path, default_size())
+                continue
+            children.discard(pid)
+            if not stopping:
+                print(f"Worker {pid} exited with status {status}; restarting it")
+                children.add(spawn())
+    finally:
+        broker.terminate()
+        broker.wait()
+        listener.close()
+        import shutil
+        shutil.rmtree(broker_dir, ignore_errors=True)
+
+def serve_asgi(host, port, connection_limit=None, backlog=None, keepalive=None):
+    """Run the async serving mode under uvicorn, one event loop per process."""
     try:
-        app.run(host=host, port=port)
+        import uvicorn
+    except ImportError:
+        raise SystemExit("The asgi mode needs uvicorn (pip install 'analyze-chess[asgi]'), "
+                         "or run any ASGI server with app:asgi_application as a factory.")
+    from analyze_chess.engine_pool import default_size
+    settings = {
+        'limit_concurrency': connection_limit or int(os.environ.get('ANALYZE_CHESS_CONNECTION_LIMIT', 0)) or None,
+        'backlog': backlog or int(os.environ.get('ANALYZE_CHESS_BACKLOG', 2048)),
+        'timeout_keep_alive': keepalive or int(os.environ.get('ANALYZE_CHESS_CHANNEL_TIMEOUT', 30)),
+    }
+    print(f"Serving Analyze Chess with uvicorn on http://{host}:{port}/analyze_chess_move "
+          f"({', '.join(f'{k}={v}' for k, v in settings.items())}, engines={default_size()})")
+    startup.mark('listening')
+    uvicorn.run(asgi_application(), host=host, port=port, lifespan='on', **settings)
+
+def profile_startup(command='serve', top=15, timeout=60.0):
+    """Print app.py's import-time breakdown and how long `command` takes to
+    answer its health check, each measured in a fresh process."""
+    import json
+    import sys
+    root = os.path.dirname(os.path.abspath(__file__))
+    total, rows = startup.import_profile('app', top, cwd=root)
+    print(f"import app: {total * 1000:.0f} ms (self time by top-level package)")
+    for package, seconds in rows:
+        print(f"  {package:<28}{seconds * 1000:8.1f} ms")
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    cmd = [sys.executable, os.path.join(root, 'app.py'), command, '--host', '127.0.0.1', '--port', str(port)]
+    seconds, body = startup.time_to_healthy(cmd, f"http://127.0.0.1:{port}/__ac_health?verbose=1",
+                                            timeout=timeout, cwd=root)
+    print(f"'{command}': healthy {seconds * 1000:.0f} ms after spawn")
+    for name, at in sorted(json.loads(body)['startup'].items(), key=lambda item: item[1]):
+        print(f"  {name:<28}{at * 1000:8.1f} ms")
+
+def main(argv=None):
+    """Entry point: 'serve' runs under waitress, 'prefork' runs several waitress
+    processes, 'asgi' runs the async mode, 'profile-startup' measures cold start,
+    'loadtest' benchmarks a deployment, no command runs the Flask dev server."""
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(prog='analyze-chess', description='Analyze Chess web app')
+    parser.add_argument('--host', default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument('--port', type=int, default=int(os.environ.get("PORT", 5000)))
+    commands = parser.add_subparsers(dest='command')
+    serve_parser = commands.add_parser('serve', help='run under waitress (production)')
+    serve_parser.add_argument('--host', default=argparse.SUPPRESS)
+    serve_parser.add_argument('--port', type=int, default=argparse.SUPPRESS)
+    serve_parser.add_argument('--threads', type=int, help='worker threads (default: engine pool size + 4)')
+    serve_parser.add_argument('--engines', type=int, help='Stockfish processes in the engine pool')
+    serve_parser.add_argument('--connection-limit', type=int)
+    serve_parser.add_argument('--backlog', type=int)
+    serve_parser.add_argument('--channel-timeout', type=int)
+    prefork_parser = commands.add_parser('prefork', help='run several waitress processes sharing one engine broker (Unix)')
+    prefork_parser.add_argument('--host', default=argparse.SUPPRESS)
+    prefork_parser.add_argument('--port', type=int, default=argparse.SUPPRESS)
+    prefork_parser.add_argument('--workers', type=int, default=int(os.environ.get('ANALYZE_CHESS_WORKERS', 0)) or os.cpu_count() or 2)
+    prefork_parser.add_argument('--threads', type=int, help='threads per worker (default: 4)')
+    prefork_parser.add_argument('--engines', type=int, help='Stockfish processes in the broker pool')
+    prefork_parser.add_argument('--connection-limit', type=int)
+    prefork_parser.add_argument('--backlog', type=int)
+    prefork_parser.add_argument('--channel-timeout', type=int)
+    asgi_parser = commands.add_parser('asgi', help='run the async (event loop) mode under uvicorn')
+    asgi_parser.add_argument('--host', default=argparse.SUPPRESS)
+    asgi_parser.add_argument('--port', type=int, default=argparse.SUPPRESS)
+    asgi_parser.add_argument('--engines', type=int, help='Stockfish processes in the async engine pool')
+    asgi_parser.add_argument('--connection-limit', type=int, help='concurrent connections before 503 (default: unlimited)')
+    asgi_parser.add_argument('--backlog', type=int)
+    asgi_parser.add_argument('--keepalive', type=int, help='idle keep-alive timeout in seconds')
+    profile_parser = commands.add_parser('profile-startup', help='measure import time and time to healthy')
+    profile_parser.add_argument('--mode', choices=['serve', 'prefork', 'asgi'], default='serve',
+                                help='serving mode to start (default: serve)')
+    profile_parser.add_argument('--top', type=int, default=15, help='packages to list')
+    profile_parser.add_argument('--timeout', type=float, default=60.0)
+    loadtest_parser = commands.add_parser('loadtest', help='measure throughput and latency under load')
+    argv = sys.argv[1:] if argv is None else argv
+    if 'loadtest' in argv:
+        # Only the loadtest command pays for importing the load generator
+        from analyze_chess import loadtest
+        loadtest.add_arguments(loadtest_parser)
+    args = parser.parse_args(argv)
+    try:
+        _run_command(parser, args)
+    finally:
+        # python-chess drives each pooled engine from a non-daemon thread; quit
+        # them so the interpreter can exit after Ctrl+C or a server shutdown
+        reset_engine_pool()
+
+def _run_command(parser, args):
+    if args.command == 'prefork':
+        if not hasattr(os, 'fork'):
+            parser.error('prefork needs os.fork(); use serve on this platform')
+        if args.engines:
+            os.environ['ANALYZE_CHESS_ENGINES'] = str(args.engines)
+        prepare_engine(interactive=False, warm=False)
+        prefork(args.host, args.port, args.workers, args.threads, args.connection_limit, args.backlog, args.channel_timeout)
+        return
+    if args.command == 'profile-startup':
+        profile_startup(args.mode, args.top, args.timeout)
+        return
+    if args.command == 'loadtest':
+        from analyze_chess import loadtest
+        status = loadtest.run_from_args(args)
+        if status:
+            raise SystemExit(status)
+        return
+    if args.command == 'asgi':
+        if args.engines:
+            os.environ['ANALYZE_CHESS_ENGINES'] = str(args.engines)
+        prepare_engine(interactive=False)
+        serve_asgi(args.host, args.port, args.connection_limit, args.backlog, args.keepalive)
+        return
+    if args.command == 'serve':
+        if args.engines:
+            os.environ['ANALYZE_CHESS_ENGINES'] = str(args.engines)
+        prepare_engine(interactive=False)
+        serve(args.host, args.port, args.threads, args.connection_limit, args.backlog, args.channel_timeout)
+        return
+    prepare_engine()
+    print(f"Starting Analyze Chess Flask app on http://{args.host}:{args.port}/analyze_chess_move ...")
+    startup.mark('listening')
+    try:
+        app.run(host=args.host, port=args.port)
     except Exception as e:
         print(f"Flask failed to start: {e}")
 
-def main():
-    """Entry point for package installation"""
-    if __name__ == "__main__":
-        pass  # The Flask app will run from the code above
+startup.mark('imported')
+
+if __name__ == "__main__":
+    main()
@@ -33,10 +33,12 @@ setup(
     entry_points={
         "console_scripts": [
             "analyze-chess=app:main",
+            "analyze-chess-uci=analyze_chess.fallback_uci:main",
+            "analyze-chess-fake-uci=analyze_chess.fake_uci:main",
         ],
     },
     include_package_data=True,
     package_data={
-        "": ["assets/*", "bin/*", "*.bat", "*.ps1"],
+        "": ["assets/*", "bin/*", "templates/*", "static/*", "*.bat", "*.ps1"],
     },
 )
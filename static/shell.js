@@ -0,0 +1,94 @@
+// Front end for /app: analyses go through /api/v1/analyze and only the
+// result section of the page is updated.
+(function () {
+    'use strict';
+
+    const fenInput = document.getElementById('fen');
+    const submitBtn = document.getElementById('submit-btn');
+    const resetBtn = document.getElementById('reset-btn');
+    const form = document.getElementById('analyze-form');
+    const results = document.getElementById('results');
+    const msg = document.getElementById('msg');
+
+    function validateFENInput() {
+        const empty = fenInput.value.trim() === '';
+        submitBtn.disabled = empty;
+        submitBtn.classList.remove('analyzed');
+        resetBtn.classList.remove('active');
+        submitBtn.title = empty ? 'Please enter a FEN position to analyze' : 'Click to analyze the chess position';
+    }
+
+    function showMessage(text) {
+        msg.textContent = text || '';
+        msg.hidden = !text;
+    }
+
+    function showRecommendation(key, data) {
+        document.getElementById(key + '-text').textContent = data.text;
+        const img = document.getElementById(key + '-board');
+        img.alt = (key === 'ai' ? 'AI' : 'Stockfish') + ' recommendation: ' + data.text;
+        img.src = data.board_url;
+        img.hidden = false;
+    }
+
+    async function analyze(fen) {
+        showMessage('');
+        submitBtn.disabled = true;
+        submitBtn.textContent = 'Analyzing...';
+        try {
+            const response = await fetch('/api/v1/analyze?fen=' + encodeURIComponent(fen), {
+                headers: { 'Accept': 'application/json' }
+            });
+            const data = await response.json();
+            if (!response.ok) {
+                showMessage(data.error || ('Analysis failed (' + response.status + ')'));
+                results.hidden = true;
+                return;
+            }
+            showRecommendation('stockfish', data.stockfish);
+            showRecommendation('ai', data.ai);
+            results.hidden = false;
+            history.replaceState(null, '', '?fen=' + encodeURIComponent(fen));
+            submitBtn.classList.add('analyzed');
+            submitBtn.title = 'Analysis completed';
+            resetBtn.classList.add('active');
+        } catch (err) {
+            showMessage('Analysis failed: ' + err);
+        } finally {
+            submitBtn.textContent = 'Analyze Position';
+            submitBtn.disabled = submitBtn.classList.contains('analyzed');
+        }
+    }
+
+    form.addEventListener('submit', function (event) {
+        event.preventDefault();
+        const fen = fenInput.value.trim();
+        if (fen) {
+            analyze(fen);
+        }
+    });
+
+    fenInput.addEventListener('input', validateFENInput);
+
+    resetBtn.addEventListener('click', function () {
+        fenInput.value = '';
+        results.hidden = true;
+        showMessage('');
+        history.replaceState(null, '', location.pathname);
+        validateFENInput();
+    });
+
+    document.querySelectorAll('.sample-fen-btn').forEach(function (button) {
+        button.addEventListener('click', function () {
+            fenInput.value = button.dataset.fen;
+            validateFENInput();
+        });
+    });
+
+    validateFENInput();
+    const initialFen = new URLSearchParams(location.search).get('fen');
+    if (initialFen) {
+        fenInput.value = initialFen;
+        analyze(initialFen);
+    }
+}());